@@ -0,0 +1,6 @@
+# encoding=utf-8
+"""
+Benchmarks of issyou-detector, run from the repository root, e.g.:
+
+    python -m benchmarks.detection_benchmark --output detection.json
+"""
@@ -0,0 +1,96 @@
+# encoding=utf-8
+__all__ = (
+    "LatencyRecorder",
+    "environment_info",
+    "write_results",
+    "load_results",
+)
+import datetime
+import json
+import math
+import pathlib
+import platform
+import sys
+import time
+from typing import Any, Optional
+
+import issyou_detector.version
+
+class LatencyRecorder:
+    """
+    Records latencies of operations, and summarizes them.
+    """
+    def __init__(
+        self,
+    ):
+        self.__latencies: list[float] = []
+        self.__started_at: Optional[float] = None
+        self.__elapsed: float = 0.0
+
+    def __enter__(self) -> "LatencyRecorder":
+        self.__started_at = time.perf_counter()
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.__elapsed += time.perf_counter() - self.__started_at
+        self.__started_at = None
+
+    def record(self, latency: float) -> None:
+        """
+        Record the latency (in seconds) of one operation.
+        """
+        self.__latencies.append(latency)
+
+    def summarize(self) -> dict[str, Any]:
+        """
+        Summarize recorded latencies (in microseconds) and throughput (in operations per second).
+
+        Throughput is based on the wall time spent within `with` blocks if any,
+        otherwise on the sum of latencies.
+        """
+        latencies = sorted(self.__latencies)
+        elapsed = self.__elapsed if self.__elapsed > 0 else math.fsum(latencies)
+        return {
+            "operations": len(latencies),
+            "seconds": elapsed,
+            "operations_per_second": len(latencies) / elapsed if elapsed > 0 else None,
+            "latency_microseconds": {
+                "p50": _percentile(latencies, 0.50) * 1e6,
+                "p90": _percentile(latencies, 0.90) * 1e6,
+                "p99": _percentile(latencies, 0.99) * 1e6,
+                "max": latencies[-1] * 1e6 if latencies else math.nan,
+            },
+        }
+
+def _percentile(sorted_values: list[float], quantile: float) -> float:
+    """
+    Nearest-rank percentile.
+    """
+    if not sorted_values:
+        return math.nan
+    rank = max(1, math.ceil(quantile * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+def environment_info() -> dict[str, Any]:
+    return {
+        "version": issyou_detector.version.__version__,
+        "python": sys.version,
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+    }
+
+def write_results(output_path: pathlib.Path, results: dict[str, Any]) -> None:
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    with output_path.open("w", encoding="utf-8") as output_file:
+        json.dump(
+            results,
+            output_file,
+            indent=4,
+            ensure_ascii=False,
+        )
+
+def load_results(results_path: pathlib.Path) -> dict[str, Any]:
+    with results_path.open("r", encoding="utf-8") as results_file:
+        return json.load(results_file)
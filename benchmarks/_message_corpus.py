@@ -0,0 +1,247 @@
+# encoding=utf-8
+__all__ = (
+    "CorpusEntry",
+    "build_corpus",
+    "save_corpus",
+    "load_corpus",
+    "FakeUser",
+    "FakeChannel",
+    "FakeGuild",
+    "FakeEmbed",
+    "FakeMessage",
+    "build_fake_messages",
+)
+import dataclasses
+import datetime
+import itertools
+import json
+import pathlib
+import random
+import types
+from typing import Any, Iterable, Optional
+
+import discord.utils
+
+_SHORT_CHAT_FRAGMENTS: tuple[str, ...] = (
+    "lol", "gg", "ok", "nice", "wait what", "same", "good morning", "brb", "that's wild",
+    "草", "好耶", "真的假的", "笑死", "我也是", "今天好累", "晚安",
+    "わかる", "それな", "おはよう", "かわいい", "まじで", "やばい", "おつかれ",
+    "this song is so good", "did you watch the new episode", "see you tomorrow",
+)
+_LONG_PASTE_SENTENCES: tuple[str, ...] = (
+    "The quick brown fox jumps over the lazy dog.",
+    "Lorem ipsum dolor sit amet, consectetur adipiscing elit, sed do eiusmod tempor incididunt.",
+    "這是一段很長的複製文，用來測試偵測效能，裡面有各種標點符號和全形字元。",
+    "これは長いコピペです。いろいろな文字が含まれています。",
+    "```python\nfor index in range(10):\n    print(index)\n```",
+    "https://example.com/some/long/path?query=value&another=value",
+)
+_EMOJIS: tuple[str, ...] = (
+    "😂", "🤣", "😭", "🥺", "👍", "🐧", "🎸", "✨", "🔥", "💯", "❤️", "🙏", "👀", "🫠", "🎵",
+    "<:custom_emoji:123456789012345678>", "<a:animated:876543210987654321>",
+)
+_KEYWORD_VARIANTS: tuple[str, ...] = (
+    "一生", "一輩子", "いっしょう", "イッショウ", "ｲｯｼｮｳ", "壹生", "一​生", "一生ﾞ",
+)
+
+@dataclasses.dataclass(slots=True)
+class CorpusEntry:
+    category: str
+    content: str
+    embed_description: Optional[str] = None
+    """
+    Description of a link preview embed, if any.
+    """
+    has_keyword: bool = False
+    """
+    Whether a keyword variant is injected.
+    """
+
+def build_corpus(
+    size: int,
+    *,
+    seed: int,
+    keyword_ratio: float = 0.05,
+) -> list[CorpusEntry]:
+    """
+    Build a synthetic mixed-language corpus of message contents.
+    The same seed always builds the same corpus.
+    """
+    rng = random.Random(seed)
+    categories = (
+        ("short_chat", 0.60, _build_short_chat),
+        ("emoji_heavy", 0.15, _build_emoji_heavy),
+        ("link_preview", 0.10, _build_link_preview),
+        ("long_paste", 0.10, _build_long_paste),
+        ("copypasta", 0.05, _build_copypasta),
+    )
+    category_names = [name for name, _, _ in categories]
+    category_weights = [weight for _, weight, _ in categories]
+    builders = {name: builder for name, _, builder in categories}
+
+    corpus: list[CorpusEntry] = []
+    for _ in range(size):
+        category = rng.choices(category_names, weights=category_weights)[0]
+        entry = builders[category](rng)
+        if rng.random() < keyword_ratio:
+            entry.content = _inject(rng, entry.content, rng.choice(_KEYWORD_VARIANTS))
+            entry.has_keyword = True
+        corpus.append(entry)
+    return corpus
+
+def save_corpus(corpus_path: pathlib.Path, corpus: Iterable[CorpusEntry]) -> None:
+    """
+    Save the corpus as JSON lines, to be replayed later.
+    """
+    corpus_path.parent.mkdir(parents=True, exist_ok=True)
+    with corpus_path.open("w", encoding="utf-8") as corpus_file:
+        for entry in corpus:
+            corpus_file.write(json.dumps(dataclasses.asdict(entry), ensure_ascii=False))
+            corpus_file.write("\n")
+
+def load_corpus(corpus_path: pathlib.Path) -> list[CorpusEntry]:
+    with corpus_path.open("r", encoding="utf-8") as corpus_file:
+        return [
+            CorpusEntry(**json.loads(line))
+            for line in corpus_file
+            if line.strip()
+        ]
+
+def _build_short_chat(rng: random.Random) -> CorpusEntry:
+    return CorpusEntry(
+        category="short_chat",
+        content=" ".join(rng.choices(_SHORT_CHAT_FRAGMENTS, k=rng.randint(1, 4))),
+    )
+
+def _build_emoji_heavy(rng: random.Random) -> CorpusEntry:
+    return CorpusEntry(
+        category="emoji_heavy",
+        content="".join(
+            rng.choice(_EMOJIS) if rng.random() < 0.7 else rng.choice(_SHORT_CHAT_FRAGMENTS)
+            for _ in range(rng.randint(3, 30))
+        ),
+    )
+
+def _build_link_preview(rng: random.Random) -> CorpusEntry:
+    return CorpusEntry(
+        category="link_preview",
+        content=f"https://example.com/watch?v={rng.getrandbits(48):012x}",
+        embed_description=" ".join(rng.choices(_LONG_PASTE_SENTENCES, k=rng.randint(1, 3))),
+    )
+
+def _build_long_paste(rng: random.Random) -> CorpusEntry:
+    return CorpusEntry(
+        category="long_paste",
+        content="\n".join(rng.choices(_LONG_PASTE_SENTENCES, k=rng.randint(10, 40)))[:4000],
+    )
+
+def _build_copypasta(rng: random.Random) -> CorpusEntry:
+    # few distinct texts repeated many times
+    return CorpusEntry(
+        category="copypasta",
+        content=_LONG_PASTE_SENTENCES[rng.randrange(2)] * 5,
+    )
+
+def _inject(rng: random.Random, content: str, keyword: str) -> str:
+    position = rng.randint(0, len(content))
+    return f"{content[:position]}{keyword}{content[position:]}"
+
+@dataclasses.dataclass(eq=False)
+class FakeUser:
+    id: int
+    display_name: str
+    bot: bool = False
+    display_avatar: Any = dataclasses.field(default_factory=lambda: types.SimpleNamespace(url="https://example.com/avatar.png"))
+
+    def __str__(self):
+        return self.display_name
+
+@dataclasses.dataclass(eq=False)
+class FakeChannel:
+    """
+    Channel which accepts messages without sending them anywhere.
+    """
+    id: int
+    sent_count: int = 0
+
+    @property
+    def mention(self) -> str:
+        return f"<#{self.id}>"
+
+    async def send(self, *args, **kwargs) -> None:
+        self.sent_count += 1
+
+@dataclasses.dataclass(eq=False)
+class FakeGuild:
+    id: int
+    channels: dict[int, FakeChannel] = dataclasses.field(default_factory=dict)
+
+    def get_channel_or_thread(self, channel_id: int) -> Optional[FakeChannel]:
+        return self.channels.get(channel_id)
+
+@dataclasses.dataclass(eq=False)
+class FakeEmbed:
+    title: Optional[str] = None
+    description: Optional[str] = None
+    author: Any = dataclasses.field(default_factory=lambda: types.SimpleNamespace(name=None))
+    footer: Any = dataclasses.field(default_factory=lambda: types.SimpleNamespace(text=None))
+    fields: list = dataclasses.field(default_factory=list)
+
+@dataclasses.dataclass(eq=False)
+class FakeMessage:
+    """
+    Lightweight stand-in of `discord.Message`, with the attributes used by detection and reporting.
+    """
+    id: int
+    content: str
+    guild: FakeGuild
+    channel: FakeChannel
+    author: FakeUser
+    embeds: list[FakeEmbed] = dataclasses.field(default_factory=list)
+
+    @property
+    def jump_url(self) -> str:
+        return f"https://discord.com/channels/{self.guild.id}/{self.channel.id}/{self.id}"
+
+    @property
+    def created_at(self) -> datetime.datetime:
+        return discord.utils.snowflake_time(self.id)
+
+    async def forward(self, channel: FakeChannel) -> None:
+        await channel.send()
+
+def build_fake_messages(
+    corpus: Iterable[CorpusEntry],
+    *,
+    guild_count: int,
+    seed: int,
+) -> list[FakeMessage]:
+    """
+    Build fake messages of the corpus entries, spread over fake guilds,
+    each of which has a report channel (with ID = guild ID + 1) and a chat channel (with ID = guild ID + 2).
+    """
+    rng = random.Random(seed)
+    guilds = [
+        FakeGuild(id=guild_id)
+        for guild_id in range(1_000_000, 1_000_000 + guild_count * 10, 10)
+    ]
+    for guild in guilds:
+        for channel_id in (guild.id + 1, guild.id + 2):
+            guild.channels[channel_id] = FakeChannel(id=channel_id)
+    users = [
+        FakeUser(id=user_id, display_name=f"user-{user_id}")
+        for user_id in range(1, 101)
+    ]
+    message_ids = itertools.count(10 ** 17)
+    messages: list[FakeMessage] = []
+    for entry in corpus:
+        guild = rng.choice(guilds)
+        messages.append(FakeMessage(
+            id=next(message_ids),
+            content=entry.content,
+            guild=guild,
+            channel=guild.channels[guild.id + 2],
+            author=rng.choice(users),
+            embeds=[] if entry.embed_description is None else [FakeEmbed(description=entry.embed_description)],
+        ))
+    return messages
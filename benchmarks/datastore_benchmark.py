@@ -0,0 +1,451 @@
+#!/usr/bin/env python
+# encoding=utf-8
+"""
+Benchmark of `ChannelRegisterRepo` implements, under a shared workload at several data sizes.
+
+Each implement and size is run in a fresh process, for a meaningful peak RSS:
+- cold start: the first lookup on a new instance, over data seeded beforehand.
+- read: concurrent lookups of random guilds, 90% of which are registered.
+- churn: concurrent register/replace/unregister of a few contended guilds.
+- mixed: concurrent lookups (90%), registers (5%) and unregisters (5%) of random guilds.
+
+Every result of the workload is checked against the seeded data and the other results,
+e.g. a channel is unregistered only if it is registered, and at most once;
+the final data is checked again on a reopened instance.
+Thus the benchmark doubles as a correctness check under concurrency, exiting with 1 on any violation.
+
+Example:
+    python -m benchmarks.datastore_benchmark --output results/datastore.json
+    python -m benchmarks.datastore_benchmark --repos sqlite binary --sizes 1000000 --compare results/datastore.json
+"""
+import argparse
+import asyncio
+import collections
+import concurrent.futures
+import dataclasses
+import itertools
+import json
+import multiprocessing
+import pathlib
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Optional
+
+from issyou_detector.datastore import *
+from issyou_detector.datastore.impl import *
+from issyou_detector.datastore.impl import _binary_channel_register_repo
+
+from ._common import *
+
+try:
+    import resource
+except ImportError:
+    # not available on Windows
+    resource = None
+
+_GUILD_ID_BASE: int = 100_000_000_000_000_000
+_SEEDED_CHANNEL_ID_OFFSET: int = 1
+_NEW_CHANNEL_ID_BASE: int = 900_000_000_000_000_000
+
+_REPO_FACTORIES: dict[str, Callable[[pathlib.Path], ChannelRegisterRepo]] = {
+    "in_memory": lambda data_root_path: InMemoryChannelRegisterRepo(),
+    "json": lambda data_root_path: JsonChannelRegisterRepo(data_root_path),
+    "journal": lambda data_root_path: JournalChannelRegisterRepo(data_root_path),
+    "sqlite": lambda data_root_path: SqliteChannelRegisterRepo(data_root_path),
+    "binary": lambda data_root_path: BinaryChannelRegisterRepo(data_root_path),
+}
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class _CaseOptions:
+    operations: int
+    """
+    Number of operations of the read and mixed workloads.
+    """
+    writes: int
+    """
+    Number of operations of the churn workload.
+    """
+    concurrency: int
+    seed: int
+
+def _seeded_guild_ids(size: int) -> range:
+    return range(_GUILD_ID_BASE, _GUILD_ID_BASE + size)
+
+def _seeded_channel_id(guild_id: int, size: int) -> Optional[int]:
+    if _GUILD_ID_BASE <= guild_id < _GUILD_ID_BASE + size:
+        return guild_id + _SEEDED_CHANNEL_ID_OFFSET
+    return None
+
+def _build_seed_data(size: int) -> dict[int, int]:
+    return {
+        guild_id: guild_id + _SEEDED_CHANNEL_ID_OFFSET
+        for guild_id in _seeded_guild_ids(size)
+    }
+
+# Data is seeded in the format of each implement directly,
+# since registering one by one would take hours for some implements at large sizes.
+
+def _seed_json(data_root_path: pathlib.Path, size: int) -> None:
+    repo = JsonChannelRegisterRepo(data_root_path)
+    asyncio.run(repo._save_data(_build_seed_data(size)))
+    repo.close()
+
+def _seed_journal(data_root_path: pathlib.Path, size: int) -> None:
+    with data_root_path.joinpath("report-channels.snapshot.json").open("w", encoding="utf-8") as snapshot_file:
+        json.dump(
+            [
+                {
+                    "guild_id": guild_id,
+                    "channel_id": channel_id,
+                }
+                for guild_id, channel_id in _build_seed_data(size).items()
+            ],
+            snapshot_file,
+        )
+
+def _seed_sqlite(data_root_path: pathlib.Path, size: int) -> None:
+    repo = SqliteChannelRegisterRepo(data_root_path)
+    # create the database as the implement does
+    asyncio.run(repo.get_report_channel(0))
+    repo.close()
+    with sqlite3.connect(data_root_path.joinpath("report-channels.sqlite3")) as connection:
+        connection.executemany(
+            "INSERT INTO report_channels (guild_id, channel_id) VALUES (?, ?)",
+            _build_seed_data(size).items(),
+        )
+    connection.close()
+
+def _seed_binary(data_root_path: pathlib.Path, size: int) -> None:
+    # records are already sorted by guild ID
+    header_struct = _binary_channel_register_repo._HEADER
+    record_struct = _binary_channel_register_repo._RECORD
+    with data_root_path.joinpath("report-channels.bin").open("wb") as data_file:
+        data_file.write(header_struct.pack(
+            _binary_channel_register_repo._MAGIC,
+            _binary_channel_register_repo._FORMAT_VERSION,
+            size,
+        ))
+        for guild_id, channel_id in _build_seed_data(size).items():
+            data_file.write(record_struct.pack(guild_id, channel_id))
+
+_SEEDERS: dict[str, Callable[[pathlib.Path, int], None]] = {
+    "json": _seed_json,
+    "journal": _seed_journal,
+    "sqlite": _seed_sqlite,
+    "binary": _seed_binary,
+}
+
+_OPERATION = tuple[str, int, Optional[int]]
+"""
+(operation name, guild_id, channel_id to register)
+"""
+
+class _Ledger:
+    """
+    Results of operations, to be checked against each other and the seeded data.
+
+    Since concurrent operations may be applied in any order, results are not compared with a replayed model;
+    instead, per guild, every unregistered channel must be the seeded one or a registered one, and at most once,
+    which leaves at most one channel registered in the end.
+    """
+    def __init__(
+        self,
+        size: int,
+    ):
+        self.__size = size
+        self.__registered_channel_ids: collections.defaultdict[int, list[int]] = collections.defaultdict(list)
+        self.__unregistered_channel_ids: collections.defaultdict[int, list[int]] = collections.defaultdict(list)
+        self.__read_channel_ids: collections.defaultdict[int, set[Optional[int]]] = collections.defaultdict(set)
+        self.conflict_count: int = 0
+
+    async def perform(self, repo: ChannelRegisterRepo, operation: _OPERATION) -> None:
+        operation_name, guild_id, channel_id = operation
+        try:
+            match operation_name:
+                case "get":
+                    self.__read_channel_ids[guild_id].add(await repo.get_report_channel(guild_id))
+                case "register":
+                    await repo.register_report_channel(guild_id, channel_id)
+                    self.__registered_channel_ids[guild_id].append(channel_id)
+                case "replace":
+                    replaced_channel_id = await repo.replace_report_channel(guild_id, channel_id)
+                    if replaced_channel_id is not None:
+                        self.__unregistered_channel_ids[guild_id].append(replaced_channel_id)
+                    self.__registered_channel_ids[guild_id].append(channel_id)
+                case "unregister":
+                    self.__unregistered_channel_ids[guild_id].append(await repo.unregister_report_channel(guild_id))
+        except (ChannelAlreadyRegisteredError, ChannelNotRegisteredError):
+            self.conflict_count += 1
+
+    @property
+    def written_guild_ids(self) -> set[int]:
+        return self.__registered_channel_ids.keys() | self.__unregistered_channel_ids.keys()
+
+    def expected_channel_id(self, guild_id: int) -> Optional[int]:
+        """
+        Channel expected to be registered in the guild after all operations,
+        assuming no violations.
+        """
+        seeded_channel_id = _seeded_channel_id(guild_id, self.__size)
+        remaining_channel_ids = collections.Counter(self.__registered_channel_ids.get(guild_id, ()))
+        if seeded_channel_id is not None:
+            remaining_channel_ids[seeded_channel_id] += 1
+        remaining_channel_ids.subtract(self.__unregistered_channel_ids.get(guild_id, ()))
+        return next((channel_id for channel_id, count in remaining_channel_ids.items() if count > 0), None)
+
+    def verify(self, final_channel_ids: dict[int, Optional[int]]) -> list[str]:
+        """
+        Returns:
+            Descriptions of violations found.
+        """
+        violations: list[str] = []
+        written_guild_ids = self.written_guild_ids
+        for guild_id in written_guild_ids:
+            seeded_channel_id = _seeded_channel_id(guild_id, self.__size)
+            registerable_channel_ids = collections.Counter(self.__registered_channel_ids.get(guild_id, ()))
+            if seeded_channel_id is not None:
+                registerable_channel_ids[seeded_channel_id] += 1
+            unregistered_channel_ids = collections.Counter(self.__unregistered_channel_ids.get(guild_id, ()))
+            if unregistered_channel_ids - registerable_channel_ids:
+                violations.append(f"Guild {guild_id}: unregistered channels {dict(unregistered_channel_ids - registerable_channel_ids)} which are never registered, or more than once.")
+                continue
+            remaining_count = registerable_channel_ids.total() - unregistered_channel_ids.total()
+            if remaining_count > 1:
+                violations.append(f"Guild {guild_id}: {remaining_count} channels registered without being unregistered in between.")
+                continue
+            expected_channel_id = self.expected_channel_id(guild_id)
+            if guild_id in final_channel_ids and final_channel_ids[guild_id] != expected_channel_id:
+                violations.append(f"Guild {guild_id}: channel {final_channel_ids[guild_id]} registered in the end, while {expected_channel_id} is expected.")
+        for guild_id, read_channel_ids in self.__read_channel_ids.items():
+            if guild_id in written_guild_ids:
+                possible_channel_ids = {None, _seeded_channel_id(guild_id, self.__size), *self.__registered_channel_ids.get(guild_id, ())}
+            else:
+                possible_channel_ids = {_seeded_channel_id(guild_id, self.__size)}
+            if read_channel_ids - possible_channel_ids:
+                violations.append(f"Guild {guild_id}: read channels {read_channel_ids - possible_channel_ids} which are never registered.")
+        return violations
+
+async def _run_workload(
+    repo: ChannelRegisterRepo,
+    ledger: _Ledger,
+    operations: list[_OPERATION],
+    concurrency: int,
+) -> dict[str, Any]:
+    """
+    Perform operations by concurrent lanes, each of which performs its share in order.
+    """
+    recorder = LatencyRecorder()
+
+    async def run_lane(lane_operations: list[_OPERATION]) -> None:
+        for operation in lane_operations:
+            started_at = time.perf_counter()
+            await ledger.perform(repo, operation)
+            recorder.record(time.perf_counter() - started_at)
+
+    conflict_count = ledger.conflict_count
+    with recorder:
+        await asyncio.gather(*(
+            run_lane(operations[lane_index::concurrency])
+            for lane_index in range(concurrency)
+        ))
+    return {
+        **recorder.summarize(),
+        "conflicts": ledger.conflict_count - conflict_count,
+    }
+
+def _build_read_operations(rng: random.Random, size: int, count: int) -> list[_OPERATION]:
+    return [
+        ("get", _GUILD_ID_BASE + rng.randrange(size) if size > 0 and rng.random() < 0.9 else _GUILD_ID_BASE - 1 - rng.randrange(1000), None)
+        for _ in range(count)
+    ]
+
+def _build_churn_operations(rng: random.Random, count: int, concurrency: int, channel_ids: itertools.count) -> list[_OPERATION]:
+    # a few unseeded guilds, contended by lanes
+    guild_ids = [_GUILD_ID_BASE - 10_000 - index for index in range(max(1, concurrency // 4))]
+    return [
+        (rng.choice(("register", "replace")), guild_id, next(channel_ids)) if rng.random() < 2 / 3 else ("unregister", guild_id, None)
+        for guild_id in (rng.choice(guild_ids) for _ in range(count))
+    ]
+
+def _build_mixed_operations(rng: random.Random, size: int, count: int, channel_ids: itertools.count) -> list[_OPERATION]:
+    operations: list[_OPERATION] = []
+    for _ in range(count):
+        if size > 0 and rng.random() < 0.9:
+            guild_id = _GUILD_ID_BASE + rng.randrange(size)
+        else:
+            guild_id = _GUILD_ID_BASE - 20_000 - rng.randrange(1000)
+        dice = rng.random()
+        if dice < 0.90:
+            operations.append(("get", guild_id, None))
+        elif dice < 0.95:
+            operations.append(("register", guild_id, next(channel_ids)))
+        else:
+            operations.append(("unregister", guild_id, None))
+    return operations
+
+def _peak_rss_bytes() -> Optional[int]:
+    if resource is None:
+        return None
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # in bytes on macOS, in kibibytes elsewhere
+    return peak_rss if sys.platform == "darwin" else peak_rss * 1024
+
+def _run_case(repo_name: str, size: int, data_root_path: pathlib.Path, options: _CaseOptions) -> dict[str, Any]:
+    """
+    Run the workload of the implement on seeded data. Run in a fresh process.
+    """
+    return asyncio.run(_run_case_async(repo_name, size, data_root_path, options))
+
+async def _run_case_async(repo_name: str, size: int, data_root_path: pathlib.Path, options: _CaseOptions) -> dict[str, Any]:
+    baseline_rss_bytes = _peak_rss_bytes()
+    rng = random.Random(options.seed)
+    ledger = _Ledger(size)
+    channel_ids = itertools.count(_NEW_CHANNEL_ID_BASE)
+
+    repo_factory = _REPO_FACTORIES[repo_name]
+    repo = repo_factory(data_root_path)
+    if isinstance(repo, InMemoryChannelRegisterRepo):
+        # nothing to load from, thus seeded in place
+        await repo._save_data(_build_seed_data(size))
+    started_at = time.perf_counter()
+    await repo.get_report_channel(_GUILD_ID_BASE)
+    cold_start_seconds = time.perf_counter() - started_at
+
+    workloads = {
+        "read": _build_read_operations(rng, size, options.operations),
+        "churn": _build_churn_operations(rng, options.writes, options.concurrency, channel_ids),
+        "mixed": _build_mixed_operations(rng, size, options.operations, channel_ids),
+    }
+    workload_results = {
+        workload_name: await _run_workload(repo, ledger, operations, options.concurrency)
+        for workload_name, operations in workloads.items()
+    }
+
+    # check the final data, plus some untouched guilds, on the running instance then on a reopened one
+    checked_guild_ids = ledger.written_guild_ids | {
+        _GUILD_ID_BASE + rng.randrange(size)
+        for _ in range(min(size, 100))
+    }
+    violations = ledger.verify({
+        guild_id: await repo.get_report_channel(guild_id)
+        for guild_id in checked_guild_ids
+    })
+    # closed before reopening, as on restarting
+    repo.close()
+    reopened = not isinstance(repo, InMemoryChannelRegisterRepo)
+    if reopened:
+        reopened_repo = repo_factory(data_root_path)
+        violations.extend(
+            f"(reopened) {violation}"
+            for violation in ledger.verify({
+                guild_id: await reopened_repo.get_report_channel(guild_id)
+                for guild_id in checked_guild_ids
+            })
+        )
+        reopened_repo.close()
+
+    return {
+        "repo": repo_name,
+        "size": size,
+        "cold_start_seconds": cold_start_seconds,
+        "workloads": workload_results,
+        "baseline_rss_bytes": baseline_rss_bytes,
+        "peak_rss_bytes": _peak_rss_bytes(),
+        "file_bytes": {
+            file_path.name: file_path.stat().st_size
+            for file_path in sorted(data_root_path.iterdir())
+            if file_path.is_file()
+        },
+        "correctness": {
+            "checked_guilds": len(checked_guild_ids),
+            "reopened": reopened,
+            "violation_count": len(violations),
+            "violations": violations[:20],
+        },
+    }
+
+def _print_case(case_result: dict[str, Any], baseline: Optional[dict[str, Any]]) -> None:
+    peak_rss_bytes = case_result["peak_rss_bytes"]
+    print(" ".join((
+        f"{case_result["repo"]:>10} x {case_result["size"]:<9,}",
+        f"cold start {case_result["cold_start_seconds"] * 1e3:10.1f} ms,",
+        f"peak RSS {"-" if peak_rss_bytes is None else f"{peak_rss_bytes / 2**20:8.1f} MiB"},",
+        f"files {sum(case_result["file_bytes"].values()) / 2**20:8.1f} MiB,",
+        f"violations {case_result["correctness"]["violation_count"]}",
+    )))
+    for workload_name, summary in case_result["workloads"].items():
+        latency = summary["latency_microseconds"]
+        line = f"{workload_name:>24}: {summary["operations_per_second"]:12,.0f} op/s, p50 {latency["p50"]:10.1f} us, p99 {latency["p99"]:10.1f} us, conflicts {summary["conflicts"]}"
+        if baseline is not None and workload_name in baseline["workloads"]:
+            baseline_summary = baseline["workloads"][workload_name]
+            throughput_ratio = summary["operations_per_second"] / baseline_summary["operations_per_second"]
+            p99_ratio = latency["p99"] / baseline_summary["latency_microseconds"]["p99"]
+            line += f" (throughput x{throughput_ratio:.2f}, p99 x{p99_ratio:.2f} vs. baseline)"
+        print(line)
+    for violation in case_result["correctness"]["violations"]:
+        print(f"{"":>24}! {violation}")
+
+def _main(arguments: argparse.Namespace) -> int:
+    options = _CaseOptions(
+        operations=arguments.operations,
+        writes=arguments.writes,
+        concurrency=arguments.concurrency,
+        seed=arguments.seed,
+    )
+    baseline_cases = {}
+    if arguments.compare is not None:
+        baseline_cases = {
+            (case_result["repo"], case_result["size"]): case_result
+            for case_result in load_results(arguments.compare)["cases"]
+        }
+
+    case_results: list[dict[str, Any]] = []
+    with tempfile.TemporaryDirectory(prefix="issyou-detector-datastore-benchmark-", dir=arguments.data_root) as temporary_path:
+        for size in arguments.sizes:
+            for repo_name in arguments.repos:
+                data_root_path = pathlib.Path(temporary_path).joinpath(f"{repo_name}-{size}")
+                data_root_path.mkdir()
+                if repo_name in _SEEDERS:
+                    _SEEDERS[repo_name](data_root_path, size)
+                # a new process per case, so that peak RSS is of the case only
+                with concurrent.futures.ProcessPoolExecutor(
+                    max_workers=1,
+                    mp_context=multiprocessing.get_context("spawn"),
+                ) as process_executor:
+                    case_result = process_executor.submit(_run_case, repo_name, size, data_root_path, options).result()
+                case_results.append(case_result)
+                _print_case(case_result, baseline_cases.get((repo_name, size)))
+
+    if arguments.output is not None:
+        write_results(arguments.output, {
+            "benchmark": "datastore",
+            "environment": environment_info(),
+            "options": dataclasses.asdict(options),
+            "cases": case_results,
+        })
+        print(f"Results written to {arguments.output.as_posix()}.")
+
+    violation_count = sum(case_result["correctness"]["violation_count"] for case_result in case_results)
+    if violation_count > 0:
+        print(f"Found {violation_count} violations in total.")
+        return 1
+    return 0
+
+def _parse_arguments() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark and check ChannelRegisterRepo implements.")
+    parser.add_argument("--repos", nargs="+", choices=tuple(_REPO_FACTORIES), default=tuple(_REPO_FACTORIES))
+    parser.add_argument("--sizes", nargs="+", type=int, default=(10, 10_000, 1_000_000), help="numbers of guilds registered beforehand")
+    parser.add_argument("--operations", type=int, default=10_000, help="number of operations of the read and mixed workloads")
+    parser.add_argument("--writes", type=int, default=1_000, help="number of operations of the churn workload")
+    parser.add_argument("--concurrency", type=int, default=32, help="number of concurrent tasks performing operations")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the workloads")
+    parser.add_argument("--data-root", type=pathlib.Path, help="directory to create data files in, instead of the system temporary directory")
+    parser.add_argument("--output", type=pathlib.Path, help="write results as JSON to this file")
+    parser.add_argument("--compare", type=pathlib.Path, help="compare with results previously written to this file")
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    sys.exit(_main(_parse_arguments()))
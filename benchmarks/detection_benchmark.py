@@ -0,0 +1,166 @@
+#!/usr/bin/env python
+# encoding=utf-8
+"""
+Benchmark of the message detection path, driven by a synthetic (or replayed) message corpus.
+
+Scenarios:
+- scan: keyword scanning of each message (`MessageScanner.scan`).
+- detect: detection, report channel lookup and report submission of each message (`IssyouDetector._detect_message`).
+- on_message: gateway event handling of each message, drained by detection workers (`IssyouDetector.on_message`).
+
+Example:
+    python -m benchmarks.detection_benchmark --messages 50000 --output results/detection.json
+    python -m benchmarks.detection_benchmark --corpus results/corpus.jsonl --compare results/detection.json
+"""
+import argparse
+import asyncio
+import collections
+import logging
+import pathlib
+import time
+from typing import Any, Optional
+
+from issyou_detector import IssyouDetector
+from issyou_detector.datastore.impl import InMemoryChannelRegisterRepo
+from issyou_detector.detection import MessageScanner
+
+from ._common import *
+from ._message_corpus import *
+
+LOGGER = logging.getLogger(__name__)
+
+_SCENARIOS: tuple[str, ...] = (
+    "scan",
+    "detect",
+    "on_message",
+)
+
+async def _run_scan(messages: list[FakeMessage], categories: list[str], fuzzy_max_distance: Optional[int]) -> dict[str, Any]:
+    scanner = MessageScanner(IssyouDetector.DEFAULT_KEYWORDS, fuzzy_max_distance=fuzzy_max_distance)
+    recorder = LatencyRecorder()
+    category_recorders: dict[str, LatencyRecorder] = collections.defaultdict(LatencyRecorder)
+    hit_count = 0
+    with recorder:
+        for message, category in zip(messages, categories):
+            started_at = time.perf_counter()
+            scan_hit = await scanner.scan(message)
+            latency = time.perf_counter() - started_at
+            recorder.record(latency)
+            category_recorders[category].record(latency)
+            hit_count += scan_hit is not None
+    return {
+        **recorder.summarize(),
+        "hits": hit_count,
+        "categories": {
+            category: category_recorder.summarize()
+            for category, category_recorder in sorted(category_recorders.items())
+        },
+    }
+
+async def _create_bot(messages: list[FakeMessage], fuzzy_max_distance: Optional[int]) -> IssyouDetector:
+    channel_register_repo = InMemoryChannelRegisterRepo()
+    for guild in {message.guild.id: message.guild for message in messages}.values():
+        await channel_register_repo.register_report_channel(guild.id, guild.id + 1)
+    return IssyouDetector(
+        channel_register_repo=channel_register_repo,
+        detection_queue_size=len(messages),
+        fuzzy_max_distance=fuzzy_max_distance,
+    )
+
+async def _run_detect(messages: list[FakeMessage], fuzzy_max_distance: Optional[int]) -> dict[str, Any]:
+    bot = await _create_bot(messages, fuzzy_max_distance)
+    recorder = LatencyRecorder()
+    with recorder:
+        for message in messages:
+            started_at = time.perf_counter()
+            await bot._detect_message(message)
+            recorder.record(time.perf_counter() - started_at)
+    # reports are paced by rate limits, which is out of the scope
+    await bot._report_scheduler.aclose(timeout=0.1)
+    return recorder.summarize()
+
+async def _run_on_message(messages: list[FakeMessage], max_pending: int, fuzzy_max_distance: Optional[int]) -> dict[str, Any]:
+    bot = await _create_bot(messages, fuzzy_max_distance)
+    pipeline = bot._detection_pipeline
+    pipeline.start()
+    recorder = LatencyRecorder()
+    with recorder:
+        for message in messages:
+            while pipeline.queue_size >= max_pending:
+                # let workers catch up, instead of measuring load shedding
+                await asyncio.sleep(0)
+            started_at = time.perf_counter()
+            await bot.on_message(message)
+            recorder.record(time.perf_counter() - started_at)
+        await pipeline.aclose()
+    await bot._report_scheduler.aclose(timeout=0.1)
+    return {
+        **recorder.summarize(),
+        "shed": pipeline.shed_count,
+    }
+
+def _print_summary(scenario: str, summary: dict[str, Any], baseline: Optional[dict[str, Any]]) -> None:
+    latency = summary["latency_microseconds"]
+    line = f"{scenario:>12}: {summary["operations_per_second"]:12,.0f} msg/s, p50 {latency["p50"]:8.1f} us, p99 {latency["p99"]:8.1f} us"
+    if baseline is not None:
+        throughput_ratio = summary["operations_per_second"] / baseline["operations_per_second"]
+        p99_ratio = latency["p99"] / baseline["latency_microseconds"]["p99"]
+        line += f" (throughput x{throughput_ratio:.2f}, p99 x{p99_ratio:.2f} vs. baseline)"
+    print(line)
+    for category, category_summary in summary.get("categories", {}).items():
+        category_latency = category_summary["latency_microseconds"]
+        print(f"{category:>20}: {category_summary["operations"]:8} msgs, p50 {category_latency["p50"]:8.1f} us, p99 {category_latency["p99"]:8.1f} us")
+
+async def _main(arguments: argparse.Namespace) -> None:
+    corpus: list[CorpusEntry]
+    if arguments.corpus is not None:
+        corpus = load_corpus(arguments.corpus)
+        corpus_info = {"source": arguments.corpus.as_posix(), "size": len(corpus)}
+    else:
+        corpus = build_corpus(arguments.messages, seed=arguments.seed)
+        corpus_info = {"source": "synthetic", "size": len(corpus), "seed": arguments.seed}
+    if arguments.save_corpus is not None:
+        save_corpus(arguments.save_corpus, corpus)
+    categories = [entry.category for entry in corpus]
+    baseline = load_results(arguments.compare)["scenarios"] if arguments.compare is not None else {}
+
+    scenario_results: dict[str, Any] = {}
+    for scenario in arguments.scenarios:
+        # fresh messages per scenario, since messages are memorized by ID once scanned
+        scenario_messages = build_fake_messages(corpus, guild_count=arguments.guilds, seed=arguments.seed)
+        match scenario:
+            case "scan":
+                summary = await _run_scan(scenario_messages, categories, arguments.fuzzy_max_distance)
+            case "detect":
+                summary = await _run_detect(scenario_messages, arguments.fuzzy_max_distance)
+            case "on_message":
+                summary = await _run_on_message(scenario_messages, max_pending=arguments.guilds, fuzzy_max_distance=arguments.fuzzy_max_distance)
+        scenario_results[scenario] = summary
+        _print_summary(scenario, summary, baseline.get(scenario))
+
+    if arguments.output is not None:
+        write_results(arguments.output, {
+            "benchmark": "detection",
+            "environment": environment_info(),
+            "corpus": corpus_info,
+            "scenarios": scenario_results,
+        })
+        print(f"Results written to {arguments.output.as_posix()}.")
+
+def _parse_arguments() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark the message detection path.")
+    parser.add_argument("--messages", type=int, default=20000, help="number of messages in the synthetic corpus")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the synthetic corpus")
+    parser.add_argument("--guilds", type=int, default=50, help="number of fake guilds to spread messages over")
+    parser.add_argument("--corpus", type=pathlib.Path, help="replay the corpus saved in this file instead of building one")
+    parser.add_argument("--save-corpus", type=pathlib.Path, help="save the corpus to this file for replaying")
+    parser.add_argument("--scenarios", nargs="+", choices=_SCENARIOS, default=_SCENARIOS)
+    parser.add_argument("--fuzzy-max-distance", type=int, help="enable the fuzzy tier of detection with this max edit distance")
+    parser.add_argument("--output", type=pathlib.Path, help="write results as JSON to this file")
+    parser.add_argument("--compare", type=pathlib.Path, help="compare with results previously written to this file")
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    # detection logs are out of the scope
+    logging.basicConfig(level=logging.ERROR)
+    asyncio.run(_main(_parse_arguments()))
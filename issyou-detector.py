@@ -1,31 +1,61 @@
 #!/usr/bin/env python
 # encoding=utf-8
+import time
+# before the other imports, to measure them
+_LAUNCHED_AT = time.monotonic()
+
+import asyncio
+import atexit
+import dataclasses
+import multiprocessing
+import queue
+import signal
 import sys
 import os
 import logging
 import logging.config
+import logging.handlers
 import pathlib
-import yaml
+from typing import Optional
 
 import dotenv
 
 import issyou_detector.version
 from issyou_detector import IssyouDetector
-from issyou_detector.datastore import ChannelRegisterRepo
+from issyou_detector.backfill import HistoryBackfiller
+from issyou_detector.datastore import ChannelRegisterRepo, DetectionStatsRepo
 from issyou_detector.datastore.impl import InMemoryChannelRegisterRepo
 from issyou_detector.datastore.impl import JsonChannelRegisterRepo
+from issyou_detector.datastore.impl import JournalChannelRegisterRepo
+from issyou_detector.datastore.impl import SqliteChannelRegisterRepo
+from issyou_detector.datastore.impl import BinaryChannelRegisterRepo
+from issyou_detector.datastore.impl import InMemoryDetectionStatsRepo
+from issyou_detector.datastore.impl import SqliteDetectionStatsRepo
+from issyou_detector.detection import DetectionPipeline, MessageScanner
+from issyou_detector.metrics import MetricsAggregator, MetricsExporter, MetricsRegistry
+from issyou_detector.reporting import ReportDigester
+from issyou_detector.statistics import DetectionStatistics
+from issyou_detector.util.logging import ForwardingHandler
 
 LOGGER = logging.getLogger(__name__)
 
+_IMPORTED_AT = time.monotonic()
+
+_LOG_CONFIG_FILE_PATH = pathlib.Path(__file__).parent.joinpath("logging-config.yaml")
+
+def _load_log_config() -> dict:
+    # imported only when needed, as it is not used after logging is configured
+    import yaml
+    with _LOG_CONFIG_FILE_PATH.open("r", encoding="utf-8") as log_config_file:
+        return yaml.safe_load(
+            stream=log_config_file,
+        )
+
 def _configure_logging() -> None:
-    log_config_file_path = pathlib.Path(__file__).parent.joinpath("logging-config.yaml")
-    log_config: dict
+    log_config_file_path = _LOG_CONFIG_FILE_PATH
     try:
-        with log_config_file_path.open("r", encoding="utf-8") as log_config_file:
-            log_config = yaml.safe_load(
-                stream=log_config_file,
-            )
-        logging.config.dictConfig(log_config)
+        logging.config.dictConfig(_load_log_config())
+        _start_queue_listeners()
     except FileNotFoundError as error:
         _configure_logging_minimal()
         LOGGER.info(f"Expected logging config file ({log_config_file_path}) does not exist.")
@@ -34,6 +64,20 @@ def _configure_logging() -> None:
         LOGGER.warning(f"Failed to load logging configuration from file {log_config_file_path}.", exc_info=error)
     LOGGER.info("Finished configuring logging.")
 
+def _start_queue_listeners() -> None:
+    """
+    Start listeners of queue handlers configured (by `handlers` of a `logging.handlers.QueueHandler`),
+    which `dictConfig` creates but never starts.
+
+    Records are then handled by the listener thread, so that logging never blocks the event loop on I/O;
+    the listeners are stopped at exit, to flush records still queued.
+    """
+    for handler_name in logging.getHandlerNames():
+        handler = logging.getHandlerByName(handler_name)
+        if isinstance(handler, logging.handlers.QueueHandler) and handler.listener is not None:
+            handler.listener.start()
+            atexit.register(handler.listener.stop)
+
 def _configure_logging_minimal() -> None:
     logging_config = {
         "version": 1,
@@ -62,6 +106,372 @@ def _configure_logging_minimal() -> None:
     logging.config.dictConfig(logging_config)
     LOGGER.info("Using minimal logging configuration.")
 
+def _parse_keywords(config_value: Optional[str]) -> tuple[str, ...]:
+    if config_value is None:
+        return IssyouDetector.DEFAULT_KEYWORDS
+    return tuple(
+        keyword.strip()
+        for keyword in config_value.split(",")
+        if keyword.strip()
+    )
+
+def _parse_keyword_max_distances(config_value: Optional[str]) -> dict[str, int]:
+    if config_value is None:
+        return {}
+    keyword_max_distances: dict[str, int] = {}
+    for entry in config_value.split(","):
+        if not entry.strip():
+            continue
+        keyword, separator, max_distance = entry.rpartition(":")
+        if not separator or not keyword.strip():
+            raise ValueError(f"Expected <keyword>:<max distance>, got {entry!r}.")
+        keyword_max_distances[keyword.strip()] = int(max_distance)
+    return keyword_max_distances
+
+def _parse_guild_ids(config_value: Optional[str]) -> tuple[int, ...]:
+    if config_value is None:
+        return ()
+    return tuple(
+        int(guild_id)
+        for guild_id in config_value.split(",")
+        if guild_id.strip()
+    )
+
+def _create_channel_register_repo(
+    datastore_type: str,
+    data_root_path: pathlib.Path,
+) -> ChannelRegisterRepo:
+    match datastore_type:
+        case "json":
+            return JsonChannelRegisterRepo(
+                data_root_path=data_root_path,
+            )
+        case "journal":
+            return JournalChannelRegisterRepo(
+                data_root_path=data_root_path,
+            )
+        case "sqlite":
+            return SqliteChannelRegisterRepo(
+                data_root_path=data_root_path,
+            )
+        case "binary":
+            return BinaryChannelRegisterRepo(
+                data_root_path=data_root_path,
+            )
+        case _:
+            raise ValueError(f"Unknown datastore type {datastore_type!r}.")
+
+def _parse_optional_int(config_value: Optional[str]) -> Optional[int]:
+    if not config_value:
+        return None
+    return int(config_value)
+
+def _create_bot(
+    *,
+    metrics_registry: Optional[MetricsRegistry],
+    metrics_port: Optional[int],
+    metrics_host: str,
+    shard_count: Optional[int],
+    shard_ids: Optional[tuple[int, ...]],
+    sync_commands: bool,
+) -> IssyouDetector:
+    """
+    Create the bot as configured by environment variables.
+    """
+    data_root_path = pathlib.Path(os.environ.get("ISSYOU_DETECTOR_DATA_ROOT_PATH", "./data"))
+    use_in_memory_data = "ISSYOU_DETECTOR_USE_IN_MEMORY_DATA" in os.environ
+    datastore_type = os.environ.get("ISSYOU_DETECTOR_DATASTORE", "json")
+    keywords = _parse_keywords(os.environ.get("ISSYOU_DETECTOR_KEYWORDS"))
+    try:
+        digest_guild_ids = _parse_guild_ids(os.environ.get("ISSYOU_DETECTOR_DIGEST_GUILD_IDS"))
+        digest_window = float(os.environ.get("ISSYOU_DETECTOR_DIGEST_WINDOW_SECONDS", ReportDigester.DEFAULT_WINDOW))
+    except ValueError as error:
+        LOGGER.error(f"Invalid digest mode configuration: {error}")
+        exit(1)
+    try:
+        detection_worker_count = int(os.environ.get("ISSYOU_DETECTOR_DETECTION_WORKERS", DetectionPipeline.DEFAULT_WORKER_COUNT))
+        detection_queue_size = int(os.environ.get("ISSYOU_DETECTOR_DETECTION_QUEUE_SIZE", DetectionPipeline.DEFAULT_MAX_QUEUE_SIZE))
+    except ValueError as error:
+        LOGGER.error(f"Invalid detection pipeline configuration: {error}")
+        exit(1)
+    try:
+        backfill_concurrency = int(os.environ.get("ISSYOU_DETECTOR_BACKFILL_CONCURRENCY", HistoryBackfiller.DEFAULT_CONCURRENCY))
+    except ValueError as error:
+        LOGGER.error(f"Invalid backfill configuration: {error}")
+        exit(1)
+
+    try:
+        fuzzy_max_distance = _parse_optional_int(os.environ.get("ISSYOU_DETECTOR_FUZZY_MAX_DISTANCE"))
+        fuzzy_keyword_max_distances = _parse_keyword_max_distances(os.environ.get("ISSYOU_DETECTOR_FUZZY_KEYWORD_MAX_DISTANCES"))
+        fuzzy_process_count = int(os.environ.get("ISSYOU_DETECTOR_FUZZY_PROCESSES", 0))
+        fuzzy_process_min_length = int(os.environ.get("ISSYOU_DETECTOR_FUZZY_PROCESS_MIN_LENGTH", MessageScanner.DEFAULT_FUZZY_PROCESS_MIN_LENGTH))
+    except ValueError as error:
+        LOGGER.error(f"Invalid fuzzy matching configuration: {error}")
+        exit(1)
+    try:
+        statistics_flush_interval = float(os.environ.get("ISSYOU_DETECTOR_STATISTICS_FLUSH_SECONDS", DetectionStatistics.DEFAULT_FLUSH_INTERVAL))
+    except ValueError as error:
+        LOGGER.error(f"Invalid statistics configuration: {error}")
+        exit(1)
+
+    channel_register_repo: ChannelRegisterRepo
+    detection_stats_repo: DetectionStatsRepo
+    command_sync_state_path: Optional[pathlib.Path] = None
+    backfill_checkpoint_path: Optional[pathlib.Path] = None
+    if use_in_memory_data:
+        channel_register_repo = InMemoryChannelRegisterRepo()
+        detection_stats_repo = InMemoryDetectionStatsRepo()
+    else:
+        try:
+            channel_register_repo = _create_channel_register_repo(datastore_type, data_root_path)
+        except ValueError as error:
+            LOGGER.error(f"Invalid datastore configuration in environment variable ISSYOU_DETECTOR_DATASTORE: {error}")
+            exit(1)
+        # SQLite regardless of the datastore type, for aggregating queries; shared by all processes
+        detection_stats_repo = SqliteDetectionStatsRepo(data_root_path)
+        command_sync_state_path = data_root_path.joinpath("synced-commands.sha256")
+        # one file per process, as each process backfills only guilds of its own shards
+        backfill_checkpoint_path = data_root_path.joinpath(
+            "backfill-checkpoints.json"
+            if shard_ids is None else
+            f"backfill-checkpoints.shards-{shard_ids[0]}-{shard_ids[-1]}.json"
+        )
+
+    return IssyouDetector(
+        channel_register_repo=channel_register_repo,
+        keywords=keywords,
+        digest_guild_ids=digest_guild_ids,
+        digest_window=digest_window,
+        detection_worker_count=detection_worker_count,
+        detection_queue_size=detection_queue_size,
+        metrics_registry=metrics_registry,
+        metrics_port=metrics_port,
+        metrics_host=metrics_host,
+        shard_count=shard_count,
+        shard_ids=shard_ids,
+        sync_commands=sync_commands,
+        command_sync_state_path=command_sync_state_path,
+        low_memory="ISSYOU_DETECTOR_LOW_MEMORY" in os.environ,
+        backfill_checkpoint_path=backfill_checkpoint_path,
+        backfill_concurrency=backfill_concurrency,
+        detection_stats_repo=detection_stats_repo,
+        statistics_flush_interval=statistics_flush_interval,
+        fuzzy_max_distance=fuzzy_max_distance,
+        fuzzy_keyword_max_distances=fuzzy_keyword_max_distances,
+        fuzzy_process_count=fuzzy_process_count,
+        fuzzy_process_min_length=fuzzy_process_min_length,
+    )
+
+_IDENTIFY_INTERVAL: float = 5.0
+"""
+Interval (in seconds) Discord allows between identifying shards (with the default max concurrency of 1).
+"""
+_METRICS_PUBLISH_INTERVAL: float = 5.0
+"""
+Interval (in seconds) of workers sending metrics to the launcher process.
+"""
+_WORKER_STOP_TIMEOUT: float = 30.0
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class _WorkerConfig:
+    worker_index: int
+    shard_ids: tuple[int, ...]
+    shard_count: int
+    start_delay: float
+    """
+    Seconds to wait before connecting, so that workers never identify shards at the same time.
+    """
+
+    @property
+    def name(self) -> str:
+        return f"worker-{self.worker_index}"
+
+def _plan_workers(shard_count: int, process_count: int) -> list[_WorkerConfig]:
+    """
+    Split shards into contiguous ranges, one per worker process.
+    """
+    worker_configs: list[_WorkerConfig] = []
+    for worker_index in range(process_count):
+        shard_ids = tuple(range(
+            worker_index * shard_count // process_count,
+            (worker_index + 1) * shard_count // process_count,
+        ))
+        worker_configs.append(_WorkerConfig(
+            worker_index=worker_index,
+            shard_ids=shard_ids,
+            shard_count=shard_count,
+            # shards of earlier workers are identified one by one first
+            start_delay=shard_ids[0] * _IDENTIFY_INTERVAL,
+        ))
+    return worker_configs
+
+def _configure_worker_logging(log_queue: "multiprocessing.Queue") -> None:
+    """
+    Send records of the worker process to the launcher process, to be handled by the handlers configured there.
+
+    Only the levels of loggers are configured here, so that records to be dropped anyway are never created.
+    """
+    try:
+        log_config = _load_log_config()
+    except Exception:
+        log_config = {}
+    logging.config.dictConfig({
+        "version": 1,
+        "disable_existing_loggers": False,
+        "root": {
+            "level": log_config.get("root", {}).get("level", "DEBUG"),
+        },
+        "loggers": {
+            logger_name: {
+                "level": logger_config["level"],
+            }
+            for logger_name, logger_config in log_config.get("loggers", {}).items()
+            if "level" in logger_config
+        },
+    })
+    logging.getLogger().addHandler(logging.handlers.QueueHandler(log_queue))
+
+def _run_worker(
+    worker_config: _WorkerConfig,
+    log_queue: "multiprocessing.Queue",
+    metrics_queue: "multiprocessing.Queue",
+) -> None:
+    """
+    Entry point of a worker process, running the bot on a range of shards.
+    """
+    _configure_worker_logging(log_queue)
+    LOGGER.info(f"Worker {worker_config.worker_index} is going to run shards {worker_config.shard_ids!r} out of {worker_config.shard_count}, in {worker_config.start_delay} seconds.")
+    time.sleep(worker_config.start_delay)
+
+    metrics_registry = MetricsRegistry()
+    bot = _create_bot(
+        metrics_registry=metrics_registry,
+        # exported by the launcher process
+        metrics_port=None,
+        metrics_host=MetricsExporter.DEFAULT_HOST,
+        shard_count=worker_config.shard_count,
+        shard_ids=worker_config.shard_ids,
+        sync_commands=worker_config.worker_index == 0,
+    )
+    try:
+        asyncio.run(_run_bot_publishing_metrics(bot, os.environ["ISSYOU_DETECTOR_TOKEN"], metrics_registry, metrics_queue, worker_config.name))
+    except KeyboardInterrupt:
+        LOGGER.info(f"Worker {worker_config.worker_index} interrupted.")
+
+async def _run_bot_publishing_metrics(
+    bot: IssyouDetector,
+    bot_token: str,
+    metrics_registry: MetricsRegistry,
+    metrics_queue: "multiprocessing.Queue",
+    source: str,
+) -> None:
+    async def publish_metrics() -> None:
+        while True:
+            await asyncio.sleep(_METRICS_PUBLISH_INTERVAL)
+            metrics_queue.put((source, metrics_registry.snapshot()))
+
+    async with bot:
+        metrics_publisher = asyncio.create_task(publish_metrics())
+        try:
+            await bot.start(bot_token)
+        finally:
+            metrics_publisher.cancel()
+
+def _run_workers(
+    worker_configs: list[_WorkerConfig],
+    *,
+    metrics_port: Optional[int],
+    metrics_host: str,
+) -> int:
+    """
+    Run worker processes, aggregating their logs and metrics, until any of them exits.
+
+    Returns:
+        Exit code for the launcher process.
+    """
+    context = multiprocessing.get_context("spawn")
+    log_queue = context.Queue()
+    metrics_queue = context.Queue()
+    log_listener = logging.handlers.QueueListener(log_queue, ForwardingHandler())
+    log_listener.start()
+    processes = [
+        context.Process(
+            target=_run_worker,
+            args=(worker_config, log_queue, metrics_queue),
+            name=f"issyou-detector-{worker_config.name}",
+        )
+        for worker_config in worker_configs
+    ]
+    for process in processes:
+        process.start()
+    LOGGER.info(f"Started {len(processes)} worker processes.")
+    try:
+        return asyncio.run(_supervise_workers(worker_configs, processes, metrics_queue, metrics_port=metrics_port, metrics_host=metrics_host))
+    except KeyboardInterrupt:
+        LOGGER.info("Interrupted. Stopping worker processes...")
+        return 0
+    finally:
+        _stop_workers(processes)
+        log_listener.stop()
+
+async def _supervise_workers(
+    worker_configs: list[_WorkerConfig],
+    processes: list[multiprocessing.Process],
+    metrics_queue: "multiprocessing.Queue",
+    *,
+    metrics_port: Optional[int],
+    metrics_host: str,
+) -> int:
+    metrics_aggregator = MetricsAggregator()
+    worker_up_gauge = metrics_aggregator.gauge(
+        "issyou_detector_worker_up",
+        "Whether the worker process is running.",
+        ("worker",),
+    )
+    for worker_config, process in zip(worker_configs, processes):
+        worker_up_gauge.labels(worker_config.name).set_function(lambda process=process: float(process.is_alive()))
+    metrics_exporter: Optional[MetricsExporter] = None
+    if metrics_port is not None:
+        metrics_exporter = MetricsExporter(metrics_aggregator, port=metrics_port, host=metrics_host)
+        await metrics_exporter.start()
+
+    loop = asyncio.get_running_loop()
+    stopping = asyncio.Event()
+    if sys.platform != "win32":
+        # e.g. stopping the container
+        loop.add_signal_handler(signal.SIGTERM, stopping.set)
+    try:
+        while not stopping.is_set():
+            for worker_config, process in zip(worker_configs, processes):
+                if not process.is_alive():
+                    LOGGER.error(f"Worker {worker_config.worker_index} exited with code {process.exitcode}. Stopping all workers.")
+                    return process.exitcode or 1
+            try:
+                source, snapshots = await loop.run_in_executor(None, metrics_queue.get, True, 1.0)
+            except queue.Empty:
+                continue
+            metrics_aggregator.update(source, snapshots)
+        LOGGER.info("Terminated. Stopping worker processes...")
+        return 0
+    finally:
+        if metrics_exporter is not None:
+            await metrics_exporter.aclose()
+
+def _stop_workers(processes: list[multiprocessing.Process]) -> None:
+    """
+    Interrupt workers, so that each closes the bot gracefully, then wait for them.
+    """
+    for process in processes:
+        if process.is_alive():
+            os.kill(process.pid, signal.SIGINT)
+    deadline = time.monotonic() + _WORKER_STOP_TIMEOUT
+    for process in processes:
+        process.join(timeout=max(0.0, deadline - time.monotonic()))
+        if process.is_alive():
+            LOGGER.warning(f"Worker process {process.name} did not stop in time. Killing it.")
+            process.kill()
+            process.join()
+
 if __name__ == "__main__":
     dotenv.load_dotenv(
         verbose=True,
@@ -75,24 +485,49 @@ if __name__ == "__main__":
         LOGGER.error("Please provide the discord bot token as environment variable ISSYOU_DETECTOR_TOKEN, maybe via dotenv file.")
         exit(1)
     LOGGER.info(f"Going to run issyou-detector, version {issyou_detector.version.__version__}...")
+    LOGGER.info(f"Modules imported in {_IMPORTED_AT - _LAUNCHED_AT:.3f} seconds.")
 
     bot_token = os.environ["ISSYOU_DETECTOR_TOKEN"]
-    data_root_path = pathlib.Path(os.environ.get("ISSYOU_DETECTOR_DATA_ROOT_PATH", "./data"))
-    use_in_memory_data = "ISSYOU_DETECTOR_USE_IN_MEMORY_DATA" in os.environ
+    try:
+        metrics_port = _parse_optional_int(os.environ.get("ISSYOU_DETECTOR_METRICS_PORT"))
+    except ValueError as error:
+        LOGGER.error(f"Invalid metrics configuration: {error}")
+        exit(1)
+    metrics_host = os.environ.get("ISSYOU_DETECTOR_METRICS_HOST", MetricsExporter.DEFAULT_HOST)
+    try:
+        shard_count = _parse_optional_int(os.environ.get("ISSYOU_DETECTOR_SHARD_COUNT"))
+        process_count = int(os.environ.get("ISSYOU_DETECTOR_PROCESS_COUNT", 1))
+    except ValueError as error:
+        LOGGER.error(f"Invalid sharding configuration: {error}")
+        exit(1)
 
-    channel_register_repo: ChannelRegisterRepo
-    if use_in_memory_data:
-        channel_register_repo = InMemoryChannelRegisterRepo()
-    else:
-        channel_register_repo = JsonChannelRegisterRepo(
-            data_root_path=data_root_path,
+    if process_count <= 1:
+        bot = _create_bot(
+            metrics_registry=None,
+            metrics_port=metrics_port,
+            metrics_host=metrics_host,
+            shard_count=shard_count,
+            shard_ids=None,
+            sync_commands=True,
         )
+        bot.run(
+            token=bot_token,
+            log_handler=None,
+        )
+        exit(0)
 
-    bot = IssyouDetector(
-        channel_register_repo=channel_register_repo,
-    )
-
-    bot.run(
-        token=bot_token,
-        log_handler=None,
-    )
+    if shard_count is None or shard_count < process_count:
+        LOGGER.error(f"ISSYOU_DETECTOR_SHARD_COUNT should be set to at least ISSYOU_DETECTOR_PROCESS_COUNT ({process_count}) to run multiple processes.")
+        exit(1)
+    shared_datastore_types = ("sqlite", "binary") if BinaryChannelRegisterRepo.SHAREABLE_BETWEEN_PROCESSES else ("sqlite",)
+    if "ISSYOU_DETECTOR_USE_IN_MEMORY_DATA" in os.environ or os.environ.get("ISSYOU_DETECTOR_DATASTORE") not in shared_datastore_types:
+        # the other datastores hold data in memory, or rewrite the whole file on changes without locking it across processes,
+        # which loses changes by other processes
+        LOGGER.error(f"ISSYOU_DETECTOR_DATASTORE should be one of {shared_datastore_types!r} to run multiple processes, which share the datastore.")
+        exit(1)
+    worker_configs = _plan_workers(shard_count, process_count)
+    exit(_run_workers(
+        worker_configs,
+        metrics_port=metrics_port,
+        metrics_host=metrics_host,
+    ))
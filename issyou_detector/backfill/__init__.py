@@ -0,0 +1,3 @@
+# encoding=utf-8
+from ._backfill_checkpoint_store import *
+from ._history_backfiller import *
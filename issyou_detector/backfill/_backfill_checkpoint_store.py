@@ -0,0 +1,140 @@
+# encoding=utf-8
+__all__ = (
+    "ChannelCheckpoint",
+    "BackfillCheckpointStore",
+)
+import asyncio
+import dataclasses
+import json
+import logging
+import pathlib
+from typing import Optional
+
+from ..util.atomic_file import *
+
+LOGGER = logging.getLogger(__name__)
+
+@dataclasses.dataclass(slots=True)
+class ChannelCheckpoint:
+    """
+    Progress of backfilling a channel, over messages in (start_message_id, end_message_id).
+
+    IDs are snowflakes, which need not be IDs of existing messages, but encode the time they stand for.
+    """
+    start_message_id: int
+    end_message_id: int
+    last_message_id: int
+    """
+    The latest message scanned, or `start_message_id` if none yet; scanning resumes after it.
+    """
+    completed: bool = False
+
+class BackfillCheckpointStore:
+    """
+    Checkpoints of backfilling channels, per guild, persisted in a JSON file.
+
+    Checkpoints are updated in memory, and written to the file by `flush`,
+    which is expected to be called periodically rather than on every update.
+    Without a file path, checkpoints are kept in memory only.
+    """
+    def __init__(
+        self,
+        checkpoint_file_path: Optional[pathlib.Path],
+    ):
+        self.__checkpoint_file_path = checkpoint_file_path
+        self.__guild_checkpoints: Optional[dict[int, dict[int, ChannelCheckpoint]]] = None
+        """
+        guild ID -> channel ID -> checkpoint; loaded on first use
+        """
+        self.__dirty = False
+        self.__flush_lock = asyncio.Lock()
+
+    def __str__(self):
+        return f"{self.__class__.__name__}<checkpoint file path: {self.__checkpoint_file_path}>"
+
+    async def get_guild_checkpoints(self, guild_id: int) -> dict[int, ChannelCheckpoint]:
+        """
+        Get checkpoints of channels in the guild, to be updated in place then marked by `mark_updated`.
+        """
+        guild_checkpoints = await self.__get_data()
+        return guild_checkpoints.setdefault(guild_id, {})
+
+    async def get_incomplete_guild_ids(self) -> list[int]:
+        """
+        Get guilds with any channel not completely backfilled, e.g. interrupted by restarting.
+        """
+        return [
+            guild_id
+            for guild_id, channel_checkpoints in (await self.__get_data()).items()
+            if any(not checkpoint.completed for checkpoint in channel_checkpoints.values())
+        ]
+
+    def mark_updated(self) -> None:
+        self.__dirty = True
+
+    def drop_completed(self, guild_id: int) -> None:
+        """
+        Drop checkpoints of channels completely backfilled in the guild, and the guild if none is left,
+        so that checkpoints are kept only as long as needed for resuming.
+        """
+        if self.__guild_checkpoints is None:
+            return
+        channel_checkpoints = self.__guild_checkpoints.get(guild_id)
+        if channel_checkpoints is None:
+            return
+        for channel_id in [
+            channel_id
+            for channel_id, checkpoint in channel_checkpoints.items()
+            if checkpoint.completed
+        ]:
+            del channel_checkpoints[channel_id]
+        if not channel_checkpoints:
+            del self.__guild_checkpoints[guild_id]
+        self.__dirty = True
+
+    async def flush(self) -> None:
+        """
+        Write checkpoints to the file, if updated since last written.
+        """
+        async with self.__flush_lock:
+            if not self.__dirty or self.__checkpoint_file_path is None or self.__guild_checkpoints is None:
+                return
+            self.__dirty = False
+            json_object = {
+                str(guild_id): {
+                    str(channel_id): dataclasses.asdict(checkpoint)
+                    for channel_id, checkpoint in channel_checkpoints.items()
+                }
+                for guild_id, channel_checkpoints in self.__guild_checkpoints.items()
+            }
+            try:
+                await asyncio.to_thread(
+                    write_file_atomically,
+                    self.__checkpoint_file_path,
+                    lambda checkpoint_file: checkpoint_file.write(json.dumps(json_object).encode("utf-8")),
+                )
+            except BaseException:
+                self.__dirty = True
+                raise
+
+    async def __get_data(self) -> dict[int, dict[int, ChannelCheckpoint]]:
+        if self.__guild_checkpoints is None:
+            self.__guild_checkpoints = await asyncio.to_thread(self.__load)
+        return self.__guild_checkpoints
+
+    def __load(self) -> dict[int, dict[int, ChannelCheckpoint]]:
+        if self.__checkpoint_file_path is None:
+            return {}
+        try:
+            with self.__checkpoint_file_path.open("rb") as checkpoint_file:
+                json_object = json.load(checkpoint_file)
+        except FileNotFoundError:
+            LOGGER.debug(f"Checkpoint file {self.__checkpoint_file_path.as_posix()!r} does not exist, considering as no checkpoints.")
+            return {}
+        return {
+            int(guild_id): {
+                int(channel_id): ChannelCheckpoint(**checkpoint)
+                for channel_id, checkpoint in channel_checkpoints.items()
+            }
+            for guild_id, channel_checkpoints in json_object.items()
+        }
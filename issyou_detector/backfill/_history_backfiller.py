@@ -0,0 +1,314 @@
+# encoding=utf-8
+__all__ = (
+    "BackfillProgress",
+    "HistoryBackfiller",
+)
+import asyncio
+import datetime
+import logging
+import time
+from typing import Awaitable, Callable, Optional
+
+import discord
+import discord.utils
+
+from ..metrics import *
+from ._backfill_checkpoint_store import *
+
+LOGGER = logging.getLogger(__name__)
+
+class BackfillProgress:
+    """
+    Progress of backfilling a guild, estimated by the time span covered in each channel,
+    since message IDs (snowflakes) encode the time messages are sent.
+    """
+    def __init__(
+        self,
+        guild_id: int,
+        checkpoints: list[ChannelCheckpoint],
+    ):
+        self.guild_id = guild_id
+        self.__checkpoints = checkpoints
+        self.__started_at = time.monotonic()
+        self.__started_fraction = self.fraction
+        self.scanned_message_count: int = 0
+        self.failed_channel_count: int = 0
+
+    def __str__(self):
+        eta = self.eta
+        return (
+            f"{self.fraction:.1%} of {self.channel_count} channels ({self.completed_channel_count} completed, {self.failed_channel_count} failed), "
+            f"{self.scanned_message_count:,} messages scanned at {self.messages_per_second:,.1f} messages/s, "
+            f"ETA {"unknown" if eta is None else datetime.timedelta(seconds=round(eta))}"
+        )
+
+    @property
+    def channel_count(self) -> int:
+        return len(self.__checkpoints)
+
+    @property
+    def completed_channel_count(self) -> int:
+        return sum(checkpoint.completed for checkpoint in self.__checkpoints)
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.__started_at
+
+    @property
+    def fraction(self) -> float:
+        """
+        Fraction of the total time span of all channels covered, including that covered before resuming.
+        """
+        total_span = 0
+        covered_span = 0
+        for checkpoint in self.__checkpoints:
+            span = _snowflake_timestamp(checkpoint.end_message_id) - _snowflake_timestamp(checkpoint.start_message_id)
+            total_span += span
+            if checkpoint.completed:
+                covered_span += span
+            else:
+                covered_span += _snowflake_timestamp(checkpoint.last_message_id) - _snowflake_timestamp(checkpoint.start_message_id)
+        if total_span <= 0:
+            return 1.0
+        return covered_span / total_span
+
+    @property
+    def messages_per_second(self) -> float:
+        elapsed = self.elapsed
+        return self.scanned_message_count / elapsed if elapsed > 0 else 0.0
+
+    @property
+    def eta(self) -> Optional[float]:
+        """
+        Estimated seconds to complete, by the rate of covering time spans since started (or resumed).
+        """
+        fraction = self.fraction
+        covered_fraction = fraction - self.__started_fraction
+        if covered_fraction <= 0:
+            return None
+        return (1.0 - fraction) * self.elapsed / covered_fraction
+
+class HistoryBackfiller:
+    """
+    Scans history of channels, passing messages to the same detection as messages received live,
+    so that messages sent before (e.g. before registering a report channel) are reported as well.
+
+    Channels are scanned oldest message first, concurrently up to `concurrency` channels across all guilds;
+    requests are paced by rate limit handling of discord.py, which waits for rate limits to reset.
+    The latest message scanned in each channel is checkpointed,
+    so that backfilling interrupted (e.g. by restarting) resumes from there;
+    checkpoints of channels completed are dropped once their guild is done.
+
+    History is scanned up to the first message received live in each channel (see `observe_live_message`),
+    so that messages are never detected by both backfilling and the live path.
+    """
+    DEFAULT_CONCURRENCY: int = 4
+    DEFAULT_PROGRESS_INTERVAL: float = 10.0
+    """
+    Default interval (in seconds) of logging progress and writing checkpoints.
+    """
+
+    def __init__(
+        self,
+        detect: Callable[[discord.Message], Awaitable[None]],
+        checkpoint_store: BackfillCheckpointStore,
+        *,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        progress_interval: float = DEFAULT_PROGRESS_INTERVAL,
+        metrics_registry: Optional[MetricsRegistry] = None,
+    ):
+        if concurrency <= 0:
+            raise ValueError(f"concurrency should be positive, got {concurrency!r}.")
+        self.__detect = detect
+        self.__checkpoint_store = checkpoint_store
+        self.__concurrency = concurrency
+        self.__progress_interval = progress_interval
+        self.__semaphore = asyncio.Semaphore(concurrency)
+        self.__guild_tasks: dict[int, asyncio.Task] = {}
+        self.__guild_progresses: dict[int, BackfillProgress] = {}
+        self.__reporter: Optional[asyncio.Task] = None
+        self.__first_live_message_ids: dict[int, int] = {}
+        """
+        channel ID -> ID of the first message received live in the channel
+        """
+
+        if metrics_registry is None:
+            metrics_registry = MetricsRegistry()
+        self.__scanned_message_counter = metrics_registry.counter(
+            "issyou_detector_backfill_messages_total",
+            "Number of messages scanned by backfilling history.",
+        )
+        metrics_registry.gauge(
+            "issyou_detector_backfilling_guilds",
+            "Number of guilds being backfilled.",
+        ).set_function(lambda: len(self.__guild_tasks))
+
+    def __str__(self):
+        return f"{self.__class__.__name__}<concurrency: {self.__concurrency}, checkpoint store: {self.__checkpoint_store}>"
+
+    def observe_live_message(self, message: discord.Message) -> None:
+        """
+        Observe a message received live, i.e. detected by the live path;
+        to be called for every message received, before it is detected.
+        """
+        self.__first_live_message_ids.setdefault(message.channel.id, message.id)
+
+    def get_progress(self, guild_id: int) -> Optional[BackfillProgress]:
+        """
+        Get the progress of backfilling the guild, or `None` if not being backfilled.
+        """
+        return self.__guild_progresses.get(guild_id)
+
+    async def start(
+        self,
+        guild: discord.Guild,
+        *,
+        since: Optional[datetime.datetime],
+    ) -> Optional[BackfillProgress]:
+        """
+        Start backfilling readable text channels of the guild in the background,
+        from `since` until now (or the first message received live) for channels never backfilled,
+        and resuming channels with incomplete checkpoints.
+        Without `since`, only incomplete checkpoints are resumed.
+
+        Channels completely backfilled from a time later than `since` are backfilled for the time before it;
+        channels with incomplete checkpoints are only resumed, within their original time span.
+
+        Returns:
+            The progress (of the one started earlier if still running), or `None` if there is nothing to backfill.
+        """
+        progress = self.__guild_progresses.get(guild.id)
+        if progress is not None:
+            return progress
+
+        checkpoints = await self.__checkpoint_store.get_guild_checkpoints(guild.id)
+        now_message_id = discord.utils.time_snowflake(discord.utils.utcnow())
+        since_message_id = None if since is None else discord.utils.time_snowflake(since)
+        pending_channels: list[tuple[discord.TextChannel, ChannelCheckpoint]] = []
+        for channel in guild.text_channels:
+            permissions = channel.permissions_for(guild.me)
+            if not (permissions.view_channel and permissions.read_message_history):
+                continue
+            checkpoint = checkpoints.get(channel.id)
+            # no message is older than the channel
+            start_message_id = None if since_message_id is None else max(since_message_id, channel.id)
+            if checkpoint is None:
+                if start_message_id is None:
+                    continue
+                checkpoint = checkpoints[channel.id] = ChannelCheckpoint(
+                    start_message_id=start_message_id,
+                    end_message_id=min(now_message_id, self.__first_live_message_ids.get(channel.id, now_message_id)),
+                    last_message_id=start_message_id,
+                )
+            elif checkpoint.completed and start_message_id is not None and start_message_id < checkpoint.start_message_id:
+                # extended to the time before, which has never been backfilled
+                checkpoint = checkpoints[channel.id] = ChannelCheckpoint(
+                    start_message_id=start_message_id,
+                    end_message_id=checkpoint.start_message_id,
+                    last_message_id=start_message_id,
+                )
+            if not checkpoint.completed:
+                pending_channels.append((channel, checkpoint))
+        self.__checkpoint_store.mark_updated()
+        if not pending_channels:
+            self.__checkpoint_store.drop_completed(guild.id)
+            LOGGER.info(f"Nothing to backfill in guild {guild}.")
+            return None
+
+        progress = self.__guild_progresses[guild.id] = BackfillProgress(
+            guild.id,
+            [checkpoint for _, checkpoint in pending_channels],
+        )
+        self.__guild_tasks[guild.id] = asyncio.create_task(
+            self.__backfill_guild(guild, pending_channels, progress),
+            name=f"{self.__class__.__name__}-{guild.id}",
+        )
+        if self.__reporter is None:
+            self.__reporter = asyncio.create_task(self.__report_progress())
+        LOGGER.info(f"Started backfilling {len(pending_channels)} channels in guild {guild}.")
+        return progress
+
+    async def resume_all(self, guilds: dict[int, discord.Guild]) -> None:
+        """
+        Resume backfilling the given guilds (guild ID -> guild) with incomplete checkpoints.
+        """
+        for guild_id in await self.__checkpoint_store.get_incomplete_guild_ids():
+            guild = guilds.get(guild_id)
+            if guild is not None:
+                await self.start(guild, since=None)
+
+    async def aclose(self) -> None:
+        """
+        Stop backfilling, and write checkpoints to be resumed later.
+        """
+        for task in (*self.__guild_tasks.values(), self.__reporter):
+            if task is not None:
+                task.cancel()
+        await asyncio.gather(*self.__guild_tasks.values(), return_exceptions=True)
+        await self.__checkpoint_store.flush()
+
+    async def __backfill_guild(
+        self,
+        guild: discord.Guild,
+        pending_channels: list[tuple[discord.TextChannel, ChannelCheckpoint]],
+        progress: BackfillProgress,
+    ) -> None:
+        try:
+            await asyncio.gather(*(
+                self.__backfill_channel(channel, checkpoint, progress)
+                for channel, checkpoint in pending_channels
+            ))
+            LOGGER.info(f"Finished backfilling guild {guild} in {progress.elapsed:.1f} seconds: {progress}.")
+        finally:
+            del self.__guild_tasks[guild.id]
+            del self.__guild_progresses[guild.id]
+            self.__checkpoint_store.drop_completed(guild.id)
+            await self.__checkpoint_store.flush()
+
+    async def __backfill_channel(
+        self,
+        channel: discord.TextChannel,
+        checkpoint: ChannelCheckpoint,
+        progress: BackfillProgress,
+    ) -> None:
+        async with self.__semaphore:
+            self_user_id = channel.guild.me.id
+            try:
+                async for message in channel.history(
+                    limit=None,
+                    after=discord.Object(id=checkpoint.last_message_id),
+                    before=discord.Object(id=checkpoint.end_message_id),
+                    oldest_first=True,
+                ):
+                    if message.author.id != self_user_id:
+                        await self.__detect(message)
+                    checkpoint.last_message_id = message.id
+                    progress.scanned_message_count += 1
+                    self.__scanned_message_counter.inc()
+                    self.__checkpoint_store.mark_updated()
+            except discord.Forbidden as error:
+                # e.g. permissions changed meanwhile; not to be retried
+                LOGGER.warning(f"Not permitted to read history of channel {channel!r}. Skipping it: {error}")
+            except Exception as error:
+                # left incomplete, to be resumed
+                LOGGER.error(f"Failed to backfill channel {channel!r}; to be resumed from message {checkpoint.last_message_id}.", exc_info=error)
+                progress.failed_channel_count += 1
+                return
+            checkpoint.completed = True
+            self.__checkpoint_store.mark_updated()
+
+    async def __report_progress(self) -> None:
+        try:
+            while self.__guild_tasks:
+                await asyncio.sleep(self.__progress_interval)
+                for progress in self.__guild_progresses.values():
+                    LOGGER.info(f"Backfilling guild {progress.guild_id}: {progress}.")
+                try:
+                    await self.__checkpoint_store.flush()
+                except Exception as error:
+                    LOGGER.error("Failed to write backfill checkpoints.", exc_info=error)
+        finally:
+            self.__reporter = None
+
+def _snowflake_timestamp(snowflake: int) -> float:
+    return discord.utils.snowflake_time(snowflake).timestamp()
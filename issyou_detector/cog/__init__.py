@@ -1,3 +1,6 @@
 # encoding=utf-8
 from .version import *
 from .channelregister import *
+from .stats import *
+from .backfill import *
+from .leaderboard import *
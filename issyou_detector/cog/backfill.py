@@ -0,0 +1,68 @@
+# encoding=utf-8
+__all__ = (
+    "BackfillCog",
+)
+import datetime
+import logging
+
+import discord.ext.commands
+import discord.app_commands
+import discord.utils
+
+from ..backfill._history_backfiller import *
+
+LOGGER = logging.getLogger(__name__)
+
+class BackfillCog(discord.ext.commands.Cog):
+    """
+    Cog that defines commands for backfilling history of channels.
+    """
+    def __init__(
+        self,
+        *,
+        history_backfiller: HistoryBackfiller,
+    ):
+        super().__init__()
+        self._history_backfiller = history_backfiller
+
+    @discord.app_commands.command(
+        name="backfill",
+        description="回頭抓出過去幾天的一輩子🐧",
+    )
+    @discord.app_commands.describe(
+        days="往回找幾天",
+    )
+    @discord.app_commands.guild_only
+    @discord.app_commands.default_permissions(manage_guild=True)
+    async def _backfill(
+        self,
+        interaction: discord.Interaction,
+        days: discord.app_commands.Range[int, 1, 365] = 7,
+    ) -> None:
+        """
+        Backfill history of channels in the guild, or show the progress if backfilling.
+        """
+        guild: discord.Guild = interaction.guild
+        LOGGER.info(f"User {interaction.user} is attempting to backfill {days} days within guild {guild!r}.")
+
+        progress = self._history_backfiller.get_progress(guild.id)
+        if progress is not None:
+            await interaction.response.send_message(f"還在回頭找一輩子🐧\n{to_progress_text(progress)}")
+            return
+
+        progress = await self._history_backfiller.start(
+            guild,
+            since=discord.utils.utcnow() - datetime.timedelta(days=days),
+        )
+        if progress is None:
+            await interaction.response.send_message("沒有需要回頭找的頻道🐧")
+            return
+        await interaction.response.send_message(f"開始回頭找 {progress.channel_count} 個頻道裡的一輩子🐧")
+
+def to_progress_text(progress: BackfillProgress) -> str:
+    eta = progress.eta
+    return (
+        f"進度：{progress.fraction:.1%}（{progress.completed_channel_count}/{progress.channel_count} 個頻道）\n"
+        f"已掃過 {progress.scanned_message_count:,} 則訊息（每秒 {progress.messages_per_second:,.1f} 則）\n"
+        f"預計剩下：{"未知" if eta is None else datetime.timedelta(seconds=round(eta))}"
+    )
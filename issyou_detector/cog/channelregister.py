@@ -3,11 +3,13 @@ __all__ = (
     "ChannelRegisterCog",
 )
 import logging
+from typing import Optional
 
 import discord.ext.commands
 import discord.app_commands
 
 from ..datastore._channel_register_repo import *
+from ..reporting import *
 from ..util.discord import *
 
 LOGGER = logging.getLogger(__name__)
@@ -20,9 +22,15 @@ class ChannelRegisterCog(discord.ext.commands.Cog):
         self,
         *,
         channel_register_repo: ChannelRegisterRepo,
+        report_channel_resolver: Optional[ReportChannelResolver] = None,
     ):
+        """
+        Args:
+            report_channel_resolver: Resolver caching report channels, to be invalidated on registration changes.
+        """
         super().__init__()
         self._channel_register_repo = channel_register_repo
+        self._report_channel_resolver = report_channel_resolver
 
     @discord.app_commands.command(
         name="show",
@@ -111,16 +119,15 @@ class ChannelRegisterCog(discord.ext.commands.Cog):
         guild: discord.Guild = interaction.guild
         LOGGER.info(f"User {interaction.user} is attempting to registering channel {text_channel.id!r} within guild {guild!r}.")
 
+        # replaced as one change, so that detected messages are always reported to either channel
+        replaced_channel_id = await self._channel_register_repo.replace_report_channel(guild.id, text_channel.id)
         registered_channel_info_message: str
-        try:
-            await self._channel_register_repo.register_report_channel(guild.id, text_channel.id)
-        except ChannelAlreadyRegisteredError as exception:
-            LOGGER.info(f"Guild {exception.guild_id!r} already has a registered report channel {exception.channel_id!r}. Overwriting it.")
-            await self._channel_register_repo.unregister_report_channel(guild.id)
-            await self._channel_register_repo.register_report_channel(guild.id, text_channel.id)
-            registered_channel_info_message = f"{to_stroke(to_channel_mention(exception.channel_id))} {text_channel.mention}"
+        if replaced_channel_id is not None and replaced_channel_id != text_channel.id:
+            LOGGER.info(f"Replaced registered report channel {replaced_channel_id!r} of guild {guild.id!r}.")
+            registered_channel_info_message = f"{to_stroke(to_channel_mention(replaced_channel_id))} {text_channel.mention}"
         else:
             registered_channel_info_message = text_channel.mention
+        self.__invalidate_report_channel(guild.id)
         await interaction.response.send_message(f"{registered_channel_info_message} 🎵ずっと ずっと 離さないでいてー🎵")
 
     @discord.app_commands.command(
@@ -144,4 +151,9 @@ class ChannelRegisterCog(discord.ext.commands.Cog):
             LOGGER.info("Guild {interaction.guild_id!r} has no registered report channel to unregister.")
             await interaction.response.send_message("找不到...一輩子頻道在哪...")
         else:
+            self.__invalidate_report_channel(guild.id)
             await interaction.response.send_message(f"{to_channel_mention(unregistered_channel_id)} 本当にやめちゃうの...？")
+
+    def __invalidate_report_channel(self, guild_id: int) -> None:
+        if self._report_channel_resolver is not None:
+            self._report_channel_resolver.invalidate(guild_id)
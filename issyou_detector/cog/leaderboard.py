@@ -0,0 +1,79 @@
+# encoding=utf-8
+__all__ = (
+    "LeaderboardCog",
+)
+import datetime
+import logging
+from typing import Optional
+
+import discord.ext.commands
+import discord.app_commands
+import discord.utils
+
+from ..statistics._detection_statistics import *
+from ..util.discord import *
+
+LOGGER = logging.getLogger(__name__)
+
+class LeaderboardCog(discord.ext.commands.Cog):
+    """
+    Cog that defines commands for leaderboards of messages detected.
+    """
+    LEADERBOARD_SIZE: int = 10
+
+    def __init__(
+        self,
+        *,
+        detection_statistics: DetectionStatistics,
+    ):
+        super().__init__()
+        self._detection_statistics = detection_statistics
+
+    @discord.app_commands.command(
+        name="leaderboard",
+        description="看看誰最常說一輩子🐧",
+    )
+    @discord.app_commands.describe(
+        ranking="排名的對象",
+        days="只看最近幾天（預設全部）",
+    )
+    @discord.app_commands.choices(
+        ranking=[
+            discord.app_commands.Choice(name="使用者", value="users"),
+            discord.app_commands.Choice(name="日子", value="days"),
+        ],
+    )
+    @discord.app_commands.guild_only
+    async def _show_leaderboard(
+        self,
+        interaction: discord.Interaction,
+        ranking: str = "users",
+        days: Optional[discord.app_commands.Range[int, 1, 3650]] = None,
+    ) -> None:
+        """
+        Show the leaderboard of users or days with the most messages detected in the guild.
+        """
+        guild: discord.Guild = interaction.guild
+        LOGGER.info(f"User {interaction.user} is attempting to see leaderboard of {ranking} within guild {guild!r}.")
+
+        since = None if days is None else discord.utils.utcnow() - datetime.timedelta(days=days - 1)
+        hit_count = await self._detection_statistics.get_hit_count(guild.id, since=since)
+        if hit_count == 0:
+            await interaction.response.send_message("還沒有人說過一輩子🐧")
+            return
+
+        lines = [f"{"全部" if days is None else f"最近 {days} 天"}共 {hit_count:,} 次一輩子🐧"]
+        if ranking == "days":
+            top_days = await self._detection_statistics.get_top_days(guild.id, since=since, limit=self.LEADERBOARD_SIZE)
+            lines.extend(
+                f"{rank}. {date.isoformat()}：{count:,} 次"
+                for rank, (date, count) in enumerate(top_days, start=1)
+            )
+        else:
+            top_users = await self._detection_statistics.get_top_users(guild.id, since=since, limit=self.LEADERBOARD_SIZE)
+            lines.extend(
+                f"{rank}. {to_user_mention(user_id)}：{count:,} 次"
+                for rank, (user_id, count) in enumerate(top_users, start=1)
+            )
+        # mentioned only for display, not to notify users
+        await interaction.response.send_message("\n".join(lines), allowed_mentions=discord.AllowedMentions.none())
@@ -0,0 +1,97 @@
+# encoding=utf-8
+__all__ = (
+    "StatsCog",
+)
+import logging
+from typing import Iterator, Optional
+
+import discord.ext.commands
+import discord.app_commands
+
+from ..metrics import *
+
+LOGGER = logging.getLogger(__name__)
+
+class StatsCog(discord.ext.commands.Cog):
+    """
+    Cog that defines commands for checking runtime statistics, from the metrics collected.
+    """
+    def __init__(
+        self,
+        *,
+        metrics_registry: MetricsRegistry,
+    ):
+        super().__init__()
+        self._metrics_registry = metrics_registry
+
+    @discord.app_commands.command(
+        name="stats",
+        description="確認一輩子警察的運作狀況🐧",
+    )
+    @discord.app_commands.guild_only
+    # shows process-wide details (e.g. memory, queues), not for every member
+    @discord.app_commands.default_permissions(manage_guild=True)
+    async def _show_stats(
+        self,
+        interaction: discord.Interaction,
+    ) -> None:
+        """
+        Show runtime statistics.
+        """
+        guild: discord.Guild = interaction.guild
+        LOGGER.info(f"User {interaction.user} is attempting to see stats within guild {guild!r}.")
+
+        await interaction.response.send_message("\n".join(self._build_stats_lines()))
+
+    def _build_stats_lines(self) -> Iterator[str]:
+        scanned_count = self.__sum_counter("issyou_detector_messages_scanned_total")
+        matched_count = self.__sum_counter("issyou_detector_messages_matched_total")
+        shed_count = self.__sum_counter("issyou_detector_messages_shed_total")
+        yield f"掃描訊息：{scanned_count:,.0f}（一輩子：{matched_count:,.0f}，來不及掃描而略過：{shed_count:,.0f}）"
+        yield f"待掃描訊息：{self.__gauge_value("issyou_detector_queued_messages"):,.0f}"
+        yield from self.__latency_lines("issyou_detector_on_message_seconds", "收到訊息")
+        yield from self.__latency_lines("issyou_detector_detection_seconds", "掃描及回報")
+        yield from self.__latency_lines("issyou_detector_datastore_call_seconds", "資料存取")
+        yield from self.__latency_lines("issyou_detector_discord_request_seconds", "Discord API")
+        yield f"待傳送回報：{self.__gauge_value("issyou_detector_queued_reports"):,.0f}，被限速（429）：{self.__sum_counter("issyou_detector_discord_rate_limited_total"):,.0f}"
+        yield from self.__latency_lines("issyou_detector_event_loop_lag_seconds", "Event loop 延遲")
+        yield from self.__memory_lines()
+
+    def __sum_counter(self, name: str) -> float:
+        metric = self._metrics_registry.get(name)
+        if not isinstance(metric, Counter):
+            return 0.0
+        return sum(child.value for _, child in metric.children())
+
+    def __gauge_value(self, name: str) -> float:
+        metric = self._metrics_registry.get(name)
+        if not isinstance(metric, Gauge):
+            return 0.0
+        return sum(child.value for _, child in metric.children())
+
+    def __memory_lines(self) -> Iterator[str]:
+        yield f"記憶體（RSS）：{self.__gauge_value("process_resident_memory_bytes") / 2**20:,.1f} MiB"
+        metric = self._metrics_registry.get("issyou_detector_cached_objects")
+        if not isinstance(metric, Gauge):
+            return
+        yield "快取物件：" + "，".join(
+            f"{labels["cache"]} {child.value:,.0f}"
+            for labels, child in metric.children()
+        )
+
+    def __latency_lines(self, name: str, title: str) -> Iterator[str]:
+        metric = self._metrics_registry.get(name)
+        if not isinstance(metric, Histogram):
+            return
+        for labels, child in metric.children():
+            if child.count == 0:
+                continue
+            label_text = f"（{", ".join(labels.values())}）" if labels else ""
+            yield f"{title}{label_text}：{child.count:,} 次，p50 {_format_seconds(child.quantile(0.5))}，p99 {_format_seconds(child.quantile(0.99))}"
+
+def _format_seconds(seconds: Optional[float]) -> str:
+    if seconds is None:
+        return "-"
+    if seconds < 1.0:
+        return f"{seconds * 1000:.1f}ms"
+    return f"{seconds:.2f}s"
@@ -1,2 +1,3 @@
 # encoding=utf-8
 from ._channel_register_repo import *
+from ._detection_stats_repo import *
@@ -6,7 +6,7 @@ __all__ = (
     "ChannelNotRegisteredError",
 )
 import abc
-from typing import Optional
+from typing import AsyncIterator, Iterable, Optional
 
 class ChannelRegisterRepo(abc.ABC):
     """
@@ -40,6 +40,23 @@ class ChannelRegisterRepo(abc.ABC):
             ChannelAlreadyRegisteredError: If there is already a channel registered.
         """
 
+    @abc.abstractmethod
+    async def replace_report_channel(
+        self,
+        guild_id: int,
+        channel_id: int,
+        /,
+    ) -> Optional[int]:
+        """
+        Register a channel to report detected messages in the given guild,
+        replacing the channel registered if any, as one atomic change.
+
+        Unlike unregistering then registering, the guild never has no channel registered in between.
+
+        Returns:
+            The ID of the replaced channel, or `None` if there was none registered.
+        """
+
     @abc.abstractmethod
     async def unregister_report_channel(
         self,
@@ -56,6 +73,67 @@ class ChannelRegisterRepo(abc.ABC):
             The ID of the unregistered channel.
         """
 
+    async def get_report_channels(
+        self,
+        guild_ids: Iterable[int],
+        /,
+    ) -> dict[int, int]:
+        """
+        Get the channels to report detected messages in the given guilds.
+
+        Implements should override this to read all of them at once;
+        by default, they are read one by one.
+
+        Returns:
+            Guild ID -> channel ID, of the given guilds with a channel registered.
+        """
+        report_channel_ids: dict[int, int] = {}
+        for guild_id in guild_ids:
+            report_channel_id = await self.get_report_channel(guild_id)
+            if report_channel_id is not None:
+                report_channel_ids[guild_id] = report_channel_id
+        return report_channel_ids
+
+    @abc.abstractmethod
+    def iter_report_channels(
+        self,
+    ) -> AsyncIterator[tuple[int, int]]:
+        """
+        Iterate over (guild ID, channel ID) of all registrations, in batches read from the data store.
+
+        Registrations changed during the iteration may or may not be included.
+        """
+
+    async def unregister_report_channels(
+        self,
+        guild_ids: Iterable[int],
+        /,
+    ) -> dict[int, int]:
+        """
+        Unregister the channels from reporting detected messages in the given guilds,
+        skipping guilds with no channel registered.
+
+        Implements should override this to write all changes at once;
+        by default, they are unregistered one by one.
+
+        Returns:
+            Guild ID -> ID of the unregistered channel, of the guilds unregistered.
+        """
+        unregistered_channel_ids: dict[int, int] = {}
+        for guild_id in guild_ids:
+            try:
+                unregistered_channel_ids[guild_id] = await self.unregister_report_channel(guild_id)
+            except ChannelNotRegisteredError:
+                pass
+        return unregistered_channel_ids
+
+    def close(self) -> None:
+        """
+        Release resources held (e.g. files, connections, I/O threads), after all calls are done.
+
+        Implements holding resources should override this; by default, nothing is done.
+        """
+
 class ChannelRegisterException(RuntimeError):
     """
     Base class for exceptions in the datastore module.
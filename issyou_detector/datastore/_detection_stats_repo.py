@@ -0,0 +1,85 @@
+# encoding=utf-8
+__all__ = (
+    "DetectionStatsRepo",
+    "HitBucket",
+)
+import abc
+from typing import Mapping, NamedTuple, Optional
+
+class HitBucket(NamedTuple):
+    """
+    Bucket of messages detected, by guild, day and author.
+    """
+    guild_id: int
+    day: int
+    """
+    Days since the Unix epoch, in UTC.
+    """
+    user_id: int
+
+class DetectionStatsRepo(abc.ABC):
+    """
+    Abstract base class for repositories of detection statistics,
+    keeping counts of messages detected per bucket, aggregated for leaderboards.
+    """
+
+    @abc.abstractmethod
+    async def add_hit_counts(
+        self,
+        hit_counts: Mapping[HitBucket, int],
+        /,
+    ) -> None:
+        """
+        Add counts of messages detected to the buckets, as one atomic change.
+        """
+
+    @abc.abstractmethod
+    async def get_top_users(
+        self,
+        guild_id: int,
+        /,
+        *,
+        since_day: Optional[int] = None,
+        limit: int,
+    ) -> list[tuple[int, int]]:
+        """
+        Get users with the most messages detected in the guild, since the given day (inclusive) or of all time.
+
+        Returns:
+            Pairs of user ID and count, in descending order of count.
+        """
+
+    @abc.abstractmethod
+    async def get_top_days(
+        self,
+        guild_id: int,
+        /,
+        *,
+        since_day: Optional[int] = None,
+        limit: int,
+    ) -> list[tuple[int, int]]:
+        """
+        Get days with the most messages detected in the guild, since the given day (inclusive) or of all time.
+
+        Returns:
+            Pairs of day and count, in descending order of count.
+        """
+
+    @abc.abstractmethod
+    async def get_hit_count(
+        self,
+        guild_id: int,
+        /,
+        *,
+        since_day: Optional[int] = None,
+    ) -> int:
+        """
+        Get the number of messages detected in the guild, since the given day (inclusive) or of all time.
+        """
+
+    def close(self) -> None:
+        """
+        Release resources held (e.g. connections, I/O threads), after all calls are done.
+
+        Implements holding resources should override this; by default, nothing is done.
+        """
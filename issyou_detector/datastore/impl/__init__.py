@@ -1,6 +1,19 @@
 # encoding=utf-8
 __all__ = (
     "InMemoryChannelRegisterRepo",
+    "JsonChannelRegisterRepo",
+    "JournalChannelRegisterRepo",
+    "SqliteChannelRegisterRepo",
+    "BinaryChannelRegisterRepo",
+    "InstrumentedChannelRegisterRepo",
+    "InMemoryDetectionStatsRepo",
+    "SqliteDetectionStatsRepo",
 )
 from ._in_memory_channel_register_repo import *
 from ._json_channel_register_repo import *
+from ._journal_channel_register_repo import *
+from ._sqlite_channel_register_repo import *
+from ._binary_channel_register_repo import *
+from ._instrumented_channel_register_repo import *
+from ._in_memory_detection_stats_repo import *
+from ._sqlite_detection_stats_repo import *
@@ -0,0 +1,407 @@
+# encoding=utf-8
+__all__ = (
+    "BinaryChannelRegisterRepo",
+)
+import asyncio
+import concurrent.futures
+import contextlib
+import logging
+import math
+import mmap
+import os
+import pathlib
+import struct
+import time
+from typing import AsyncIterator, BinaryIO, Callable, Iterable, Iterator, Optional, TypeVar, override
+
+from .._channel_register_repo import *
+from ...util.atomic_file import *
+
+try:
+    import fcntl
+except ImportError:
+    # e.g. Windows
+    fcntl = None
+
+LOGGER = logging.getLogger(__name__)
+
+_T = TypeVar("_T")
+
+_MAGIC: bytes = b"ISRC"
+_FORMAT_VERSION: int = 1
+_HEADER = struct.Struct("<4sIQ")
+"""
+magic, format version, record count
+"""
+_RECORD = struct.Struct("<QQ")
+"""
+guild_id, channel_id
+"""
+_RECORD_KEY = struct.Struct("<Q")
+"""
+guild_id, the first field of a record
+"""
+
+_ITERATION_BATCH_SIZE: int = 4096
+"""
+Number of records unpacked at once when iterating over all records.
+"""
+
+_FILE_STAT = tuple[int, int, int]
+"""
+(inode number, modification time in nanoseconds, size in bytes) of the data file
+"""
+
+class BinaryChannelRegisterRepo(ChannelRegisterRepo):
+    """
+    Read-optimized implement storing records of fixed-width (guild_id, channel_id) unsigned 64-bit integers,
+    sorted by guild_id, in a single binary file.
+
+    The file is memory-mapped and looked up by binary search,
+    so loading costs nearly nothing regardless of the number of records,
+    and processes mapping the same file share its memory through the page cache.
+    Writes rewrite the file atomically (copying the records around the changed one as raw bytes),
+    which is noticed by other processes within `revalidate_interval` seconds.
+    Each write reads the latest file and rewrites it while holding an exclusive lock on a lock file (`fcntl.flock`),
+    so that writes of processes sharing the file never overwrite each other;
+    without `fcntl` (e.g. on Windows), only one process should write the file.
+    """
+    SHAREABLE_BETWEEN_PROCESSES: bool = fcntl is not None
+    """
+    Whether processes can share the data file, i.e. whether writes are locked across processes.
+    """
+    DEFAULT_REVALIDATE_INTERVAL: float = 1.0
+    """
+    Default interval (in seconds) between checks of the data file for changes by other processes.
+    """
+
+    def __init__(
+        self,
+        data_root_path: pathlib.Path,
+        *,
+        revalidate_interval: float = DEFAULT_REVALIDATE_INTERVAL,
+    ):
+        super().__init__()
+        self.__data_file_path = data_root_path.joinpath("report-channels.bin")
+        self.__lock_file_path = data_root_path.joinpath("report-channels.bin.lock")
+        self.__revalidate_interval = revalidate_interval
+        self.__io_executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=1,
+            thread_name_prefix=f"{self.__class__.__name__}-io",
+        )
+        self.__write_lock = asyncio.Lock()
+        self.__lock_file: Optional[BinaryIO] = None
+        """
+        Opened on the I/O thread on first write; only accessed on the I/O thread.
+        """
+
+        self.__mapped_records: Optional[_MappedRecords] = None
+        self.__mapped_file_stat: Optional[_FILE_STAT] = None
+        self.__mapping_validated_at: float = -math.inf
+
+    def __str__(self):
+        return f"{self.__class__.__name__}<data file path: {self.__data_file_path}>"
+
+    @override
+    async def get_report_channel(
+        self,
+        guild_id: int,
+        /,
+    ) -> Optional[int]:
+        mapped_records = await self.__get_mapped_records()
+        return mapped_records.get(guild_id)
+
+    @override
+    async def register_report_channel(
+        self,
+        guild_id: int,
+        channel_id: int,
+        /,
+    ) -> None:
+        async with self.__write_lock, self.__hold_file_lock():
+            mapped_records = await self.__get_mapped_records(revalidate=True)
+            index, registered_channel_id = mapped_records.find(guild_id)
+            if registered_channel_id is not None:
+                raise ChannelAlreadyRegisteredError(guild_id, registered_channel_id)
+            LOGGER.debug(f"Registering report channel {channel_id!r} in guild {guild_id!r}.")
+            await self.__replace_records(mapped_records, index, index, _RECORD.pack(guild_id, channel_id))
+
+    @override
+    async def replace_report_channel(
+        self,
+        guild_id: int,
+        channel_id: int,
+        /,
+    ) -> Optional[int]:
+        async with self.__write_lock, self.__hold_file_lock():
+            mapped_records = await self.__get_mapped_records(revalidate=True)
+            index, registered_channel_id = mapped_records.find(guild_id)
+            if registered_channel_id == channel_id:
+                return registered_channel_id
+            LOGGER.debug(f"Replacing report channel {registered_channel_id!r} with {channel_id!r} in guild {guild_id!r}.")
+            end_index = index if registered_channel_id is None else index + 1
+            await self.__replace_records(mapped_records, index, end_index, _RECORD.pack(guild_id, channel_id))
+            return registered_channel_id
+
+    @override
+    async def unregister_report_channel(
+        self,
+        guild_id: int,
+        /,
+    ) -> int:
+        async with self.__write_lock, self.__hold_file_lock():
+            mapped_records = await self.__get_mapped_records(revalidate=True)
+            index, registered_channel_id = mapped_records.find(guild_id)
+            if registered_channel_id is None:
+                raise ChannelNotRegisteredError(guild_id)
+            LOGGER.debug(f"Unregistering report channel {registered_channel_id!r} in guild {guild_id!r}.")
+            await self.__replace_records(mapped_records, index, index + 1, b"")
+            return registered_channel_id
+
+    @override
+    async def get_report_channels(
+        self,
+        guild_ids: Iterable[int],
+        /,
+    ) -> dict[int, int]:
+        mapped_records = await self.__get_mapped_records()
+        report_channel_ids: dict[int, int] = {}
+        for guild_id in guild_ids:
+            channel_id = mapped_records.get(guild_id)
+            if channel_id is not None:
+                report_channel_ids[guild_id] = channel_id
+        return report_channel_ids
+
+    @override
+    async def iter_report_channels(
+        self,
+    ) -> AsyncIterator[tuple[int, int]]:
+        # the mapping stays valid even if the file is rewritten meanwhile
+        mapped_records = await self.__get_mapped_records()
+        for start_index in range(0, len(mapped_records), _ITERATION_BATCH_SIZE):
+            for guild_id, channel_id in mapped_records.iter_records(start_index, start_index + _ITERATION_BATCH_SIZE):
+                yield guild_id, channel_id
+
+    @override
+    async def unregister_report_channels(
+        self,
+        guild_ids: Iterable[int],
+        /,
+    ) -> dict[int, int]:
+        async with self.__write_lock, self.__hold_file_lock():
+            mapped_records = await self.__get_mapped_records(revalidate=True)
+            unregistered_channel_ids: dict[int, int] = {}
+            removed_indices: list[int] = []
+            for guild_id in set(guild_ids):
+                index, registered_channel_id = mapped_records.find(guild_id)
+                if registered_channel_id is not None:
+                    unregistered_channel_ids[guild_id] = registered_channel_id
+                    removed_indices.append(index)
+            if not removed_indices:
+                return unregistered_channel_ids
+            LOGGER.debug(f"Unregistering report channels in {len(removed_indices)} guilds.")
+            new_mapped_records, new_file_stat = await self.__run_io(self.__rewrite_records_without, mapped_records, sorted(removed_indices))
+            self.__mapped_records = new_mapped_records
+            self.__mapped_file_stat = new_file_stat
+            self.__mapping_validated_at = time.monotonic()
+            return unregistered_channel_ids
+
+    @override
+    def close(self) -> None:
+        """
+        Shut down the I/O thread.
+
+        Mappings are left to be closed on garbage collection, since they may still be used by someone.
+        """
+        self.__io_executor.shutdown(wait=True)
+        if self.__lock_file is not None:
+            self.__lock_file.close()
+            self.__lock_file = None
+
+    async def __get_mapped_records(
+        self,
+        *,
+        revalidate: bool = False,
+    ) -> "_MappedRecords":
+        now = time.monotonic()
+        if (
+            self.__mapped_records is not None
+            and not revalidate
+            and now - self.__mapping_validated_at < self.__revalidate_interval
+        ):
+            return self.__mapped_records
+
+        file_stat = await self.__run_io(self.__stat_data_file)
+        if self.__mapped_records is None or file_stat != self.__mapped_file_stat:
+            LOGGER.debug(f"Mapping data file {self.__data_file_path.as_posix()!r} (file stat: {file_stat!r}).")
+            self.__mapped_records = await self.__run_io(_MappedRecords.open, self.__data_file_path)
+            self.__mapped_file_stat = file_stat
+        self.__mapping_validated_at = now
+        return self.__mapped_records
+
+    async def __replace_records(
+        self,
+        mapped_records: "_MappedRecords",
+        start_index: int,
+        end_index: int,
+        replacement: bytes,
+    ) -> None:
+        """
+        Rewrite the data file with records in [start_index, end_index) replaced by the given raw records,
+        then map the new file.
+        """
+        new_mapped_records, new_file_stat = await self.__run_io(self.__rewrite_records, mapped_records, start_index, end_index, replacement)
+        # the old mapping is left to be closed on garbage collection,
+        # since it may still be used by someone
+        self.__mapped_records = new_mapped_records
+        self.__mapped_file_stat = new_file_stat
+        self.__mapping_validated_at = time.monotonic()
+
+    async def __run_io(self, function: Callable[..., _T], *args) -> _T:
+        return await asyncio.get_running_loop().run_in_executor(self.__io_executor, function, *args)
+
+    @contextlib.asynccontextmanager
+    async def __hold_file_lock(self) -> AsyncIterator[None]:
+        """
+        Hold the lock of the data file across processes within the context.
+        """
+        try:
+            await self.__run_io(self.__lock_data_file)
+            yield
+        finally:
+            # submitted even if cancelled, as the I/O thread may still take the lock;
+            # the single I/O thread releases it before taking it again
+            self.__io_executor.submit(self.__unlock_data_file)
+
+    def __lock_data_file(self) -> None:
+        if fcntl is None:
+            return
+        if self.__lock_file is None:
+            self.__lock_file_path.parent.mkdir(parents=True, exist_ok=True)
+            self.__lock_file = self.__lock_file_path.open("ab")
+        fcntl.flock(self.__lock_file.fileno(), fcntl.LOCK_EX)
+
+    def __unlock_data_file(self) -> None:
+        if fcntl is None or self.__lock_file is None:
+            return
+        fcntl.flock(self.__lock_file.fileno(), fcntl.LOCK_UN)
+
+    def __rewrite_records(
+        self,
+        mapped_records: "_MappedRecords",
+        start_index: int,
+        end_index: int,
+        replacement: bytes,
+    ) -> tuple["_MappedRecords", Optional[_FILE_STAT]]:
+        record_count = len(mapped_records) - (end_index - start_index) + len(replacement) // _RECORD.size
+
+        def write(data_file):
+            data_file.write(_HEADER.pack(_MAGIC, _FORMAT_VERSION, record_count))
+            data_file.write(mapped_records.raw_records(0, start_index))
+            data_file.write(replacement)
+            data_file.write(mapped_records.raw_records(end_index, len(mapped_records)))
+
+        write_file_atomically(self.__data_file_path, write)
+        return _MappedRecords.open(self.__data_file_path), self.__stat_data_file()
+
+    def __rewrite_records_without(
+        self,
+        mapped_records: "_MappedRecords",
+        removed_indices: list[int],
+    ) -> tuple["_MappedRecords", Optional[_FILE_STAT]]:
+        """
+        Rewrite the data file without records at the sorted indices, then map the new file.
+        """
+        def write(data_file):
+            data_file.write(_HEADER.pack(_MAGIC, _FORMAT_VERSION, len(mapped_records) - len(removed_indices)))
+            kept_start_index = 0
+            for removed_index in removed_indices:
+                data_file.write(mapped_records.raw_records(kept_start_index, removed_index))
+                kept_start_index = removed_index + 1
+            data_file.write(mapped_records.raw_records(kept_start_index, len(mapped_records)))
+
+        write_file_atomically(self.__data_file_path, write)
+        return _MappedRecords.open(self.__data_file_path), self.__stat_data_file()
+
+    def __stat_data_file(self) -> Optional[_FILE_STAT]:
+        try:
+            stat_result = self.__data_file_path.stat()
+        except FileNotFoundError:
+            return None
+        return (stat_result.st_ino, stat_result.st_mtime_ns, stat_result.st_size)
+
+class _MappedRecords:
+    """
+    Read-only view of records in a memory-mapped data file.
+    """
+    def __init__(
+        self,
+        mapping: Optional[mmap.mmap],
+        record_count: int,
+    ):
+        self.__mapping = mapping
+        self.__record_count = record_count
+
+    @classmethod
+    def open(cls, data_file_path: pathlib.Path) -> "_MappedRecords":
+        try:
+            data_file = data_file_path.open("rb")
+        except FileNotFoundError:
+            LOGGER.debug(f"Data file {data_file_path.as_posix()!r} does not exist, considering as no data.")
+            return cls(None, 0)
+        with data_file:
+            file_size = os.fstat(data_file.fileno()).st_size
+            if file_size < _HEADER.size:
+                raise ValueError(f"Data file {data_file_path.as_posix()!r} is too small ({file_size} bytes) to be valid.")
+            # the mapping stays valid after the file is closed
+            mapping = mmap.mmap(data_file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, format_version, record_count = _HEADER.unpack_from(mapping, 0)
+        if magic != _MAGIC or format_version != _FORMAT_VERSION:
+            raise ValueError(f"Data file {data_file_path.as_posix()!r} is not in a supported format (magic: {magic!r}, version: {format_version!r}).")
+        if file_size != _HEADER.size + record_count * _RECORD.size:
+            raise ValueError(f"Data file {data_file_path.as_posix()!r} is truncated or corrupted ({file_size} bytes for {record_count} records).")
+        return cls(mapping, record_count)
+
+    def __len__(self) -> int:
+        return self.__record_count
+
+    def get(self, guild_id: int) -> Optional[int]:
+        _, channel_id = self.find(guild_id)
+        return channel_id
+
+    def find(self, guild_id: int) -> tuple[int, Optional[int]]:
+        """
+        Binary search the record of the guild.
+
+        Returns:
+            The index of the record (or where it should be inserted if not found),
+            and the channel ID of the record if found.
+        """
+        mapping = self.__mapping
+        low = 0
+        high = self.__record_count
+        while low < high:
+            middle = (low + high) // 2
+            (middle_guild_id,) = _RECORD_KEY.unpack_from(mapping, _HEADER.size + middle * _RECORD.size)
+            if middle_guild_id < guild_id:
+                low = middle + 1
+            elif middle_guild_id > guild_id:
+                high = middle
+            else:
+                _, channel_id = _RECORD.unpack_from(mapping, _HEADER.size + middle * _RECORD.size)
+                return middle, channel_id
+        return low, None
+
+    def iter_records(self, start_index: int, end_index: int) -> Iterator[tuple[int, int]]:
+        """
+        Iterate over (guild_id, channel_id) of records in [start_index, end_index).
+        """
+        return _RECORD.iter_unpack(self.raw_records(start_index, min(end_index, self.__record_count)))
+
+    def raw_records(self, start_index: int, end_index: int) -> bytes:
+        """
+        Raw bytes of records in [start_index, end_index).
+        """
+        if self.__mapping is None or start_index >= end_index:
+            return b""
+        return self.__mapping[_HEADER.size + start_index * _RECORD.size : _HEADER.size + end_index * _RECORD.size]
@@ -3,7 +3,6 @@ __all__ = (
     "InMemoryChannelRegisterRepo",
 )
 import logging
-import threading
 from typing import override
 from typing import Optional
 
@@ -21,8 +20,9 @@ class InMemoryChannelRegisterRepo(SimpleChannelRegisterRepo):
 
     @override
     async def _fetch_data(self) -> SimpleChannelRegisterRepo._DATA_DICT:
-        return self.__guild_to_channels_map.copy()
+        # never mutated, see `SimpleChannelRegisterRepo`
+        return self.__guild_to_channels_map
 
     @override
     async def _save_data(self, data: SimpleChannelRegisterRepo._DATA_DICT) -> None:
-        self.__guild_to_channels_map = data.copy()
+        self.__guild_to_channels_map = data
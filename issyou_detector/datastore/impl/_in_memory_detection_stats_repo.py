@@ -0,0 +1,97 @@
+# encoding=utf-8
+__all__ = (
+    "InMemoryDetectionStatsRepo",
+)
+import heapq
+from typing import Mapping, Optional, override
+
+from .._detection_stats_repo import *
+
+class InMemoryDetectionStatsRepo(DetectionStatsRepo):
+    """
+    Implement keeping the aggregates in dicts, mostly for testing purpose.
+    """
+    def __init__(
+        self,
+    ):
+        super().__init__()
+        self.__daily_user_hit_counts: dict[int, dict[tuple[int, int], int]] = {}
+        """
+        guild ID -> (day, user ID) -> count
+        """
+        self.__user_hit_counts: dict[int, dict[int, int]] = {}
+        """
+        guild ID -> user ID -> count
+        """
+        self.__daily_hit_counts: dict[int, dict[int, int]] = {}
+        """
+        guild ID -> day -> count
+        """
+
+    @override
+    async def add_hit_counts(
+        self,
+        hit_counts: Mapping[HitBucket, int],
+        /,
+    ) -> None:
+        for (guild_id, day, user_id), count in hit_counts.items():
+            daily_user_hit_counts = self.__daily_user_hit_counts.setdefault(guild_id, {})
+            daily_user_hit_counts[day, user_id] = daily_user_hit_counts.get((day, user_id), 0) + count
+            user_hit_counts = self.__user_hit_counts.setdefault(guild_id, {})
+            user_hit_counts[user_id] = user_hit_counts.get(user_id, 0) + count
+            daily_hit_counts = self.__daily_hit_counts.setdefault(guild_id, {})
+            daily_hit_counts[day] = daily_hit_counts.get(day, 0) + count
+
+    @override
+    async def get_top_users(
+        self,
+        guild_id: int,
+        /,
+        *,
+        since_day: Optional[int] = None,
+        limit: int,
+    ) -> list[tuple[int, int]]:
+        if since_day is None:
+            user_hit_counts = self.__user_hit_counts.get(guild_id, {})
+        else:
+            user_hit_counts = {}
+            for (day, user_id), count in self.__daily_user_hit_counts.get(guild_id, {}).items():
+                if day >= since_day:
+                    user_hit_counts[user_id] = user_hit_counts.get(user_id, 0) + count
+        return _top(user_hit_counts, limit)
+
+    @override
+    async def get_top_days(
+        self,
+        guild_id: int,
+        /,
+        *,
+        since_day: Optional[int] = None,
+        limit: int,
+    ) -> list[tuple[int, int]]:
+        return _top(
+            {
+                day: count
+                for day, count in self.__daily_hit_counts.get(guild_id, {}).items()
+                if since_day is None or day >= since_day
+            },
+            limit,
+        )
+
+    @override
+    async def get_hit_count(
+        self,
+        guild_id: int,
+        /,
+        *,
+        since_day: Optional[int] = None,
+    ) -> int:
+        return sum(
+            count
+            for day, count in self.__daily_hit_counts.get(guild_id, {}).items()
+            if since_day is None or day >= since_day
+        )
+
+def _top(counts: dict[int, int], limit: int) -> list[tuple[int, int]]:
+    # ties broken by the smaller key, as the SQLite implement does
+    return heapq.nsmallest(limit, counts.items(), key=lambda item: (-item[1], item[0]))
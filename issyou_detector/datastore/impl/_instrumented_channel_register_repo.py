@@ -0,0 +1,110 @@
+# encoding=utf-8
+__all__ = (
+    "InstrumentedChannelRegisterRepo",
+)
+import logging
+from typing import AsyncIterator, Iterable, Optional, override
+
+from .._channel_register_repo import *
+from ...metrics import *
+
+LOGGER = logging.getLogger(__name__)
+
+class InstrumentedChannelRegisterRepo(ChannelRegisterRepo):
+    """
+    Wrapper measuring the latency of calls to another implement, labeled by the implement and method.
+    """
+    def __init__(
+        self,
+        channel_register_repo: ChannelRegisterRepo,
+        *,
+        metrics_registry: MetricsRegistry,
+    ):
+        super().__init__()
+        self.__channel_register_repo = channel_register_repo
+        implementation = channel_register_repo.__class__.__name__
+        call_latency_histogram = metrics_registry.histogram(
+            "issyou_detector_datastore_call_seconds",
+            "Latency of ChannelRegisterRepo calls.",
+            ("implementation", "method"),
+        )
+        self.__get_latency = call_latency_histogram.labels(implementation, "get_report_channel")
+        self.__register_latency = call_latency_histogram.labels(implementation, "register_report_channel")
+        self.__replace_latency = call_latency_histogram.labels(implementation, "replace_report_channel")
+        self.__unregister_latency = call_latency_histogram.labels(implementation, "unregister_report_channel")
+        self.__bulk_get_latency = call_latency_histogram.labels(implementation, "get_report_channels")
+        self.__bulk_unregister_latency = call_latency_histogram.labels(implementation, "unregister_report_channels")
+
+    def __str__(self):
+        return str(self.__channel_register_repo)
+
+    @property
+    def wrapped(self) -> ChannelRegisterRepo:
+        return self.__channel_register_repo
+
+    @override
+    async def get_report_channel(
+        self,
+        guild_id: int,
+        /,
+    ) -> Optional[int]:
+        with self.__get_latency.time():
+            return await self.__channel_register_repo.get_report_channel(guild_id)
+
+    @override
+    async def register_report_channel(
+        self,
+        guild_id: int,
+        channel_id: int,
+        /,
+    ) -> None:
+        with self.__register_latency.time():
+            await self.__channel_register_repo.register_report_channel(guild_id, channel_id)
+
+    @override
+    async def replace_report_channel(
+        self,
+        guild_id: int,
+        channel_id: int,
+        /,
+    ) -> Optional[int]:
+        with self.__replace_latency.time():
+            return await self.__channel_register_repo.replace_report_channel(guild_id, channel_id)
+
+    @override
+    async def unregister_report_channel(
+        self,
+        guild_id: int,
+        /,
+    ) -> int:
+        with self.__unregister_latency.time():
+            return await self.__channel_register_repo.unregister_report_channel(guild_id)
+
+    @override
+    async def get_report_channels(
+        self,
+        guild_ids: Iterable[int],
+        /,
+    ) -> dict[int, int]:
+        with self.__bulk_get_latency.time():
+            return await self.__channel_register_repo.get_report_channels(guild_ids)
+
+    @override
+    def iter_report_channels(
+        self,
+    ) -> AsyncIterator[tuple[int, int]]:
+        # not measured, as the time of iterating depends on the caller
+        return self.__channel_register_repo.iter_report_channels()
+
+    @override
+    async def unregister_report_channels(
+        self,
+        guild_ids: Iterable[int],
+        /,
+    ) -> dict[int, int]:
+        with self.__bulk_unregister_latency.time():
+            return await self.__channel_register_repo.unregister_report_channels(guild_ids)
+
+    @override
+    def close(self) -> None:
+        self.__channel_register_repo.close()
@@ -0,0 +1,365 @@
+# encoding=utf-8
+__all__ = (
+    "JournalChannelRegisterRepo",
+)
+import asyncio
+import concurrent.futures
+import json
+import logging
+import os
+import pathlib
+from typing import AsyncIterator, BinaryIO, Callable, Iterable, Optional, TypeVar, override
+
+from .._channel_register_repo import *
+from ...util.locks import *
+from ...util.atomic_file import *
+
+LOGGER = logging.getLogger(__name__)
+
+_T = TypeVar("_T")
+
+_DATA_DICT = dict[int, int]
+"""
+guild_id -> channel_id
+"""
+
+class JournalChannelRegisterRepo(ChannelRegisterRepo):
+    """
+    Implement which appends each change as a record to a journal file,
+    on top of a snapshot file of all data.
+
+    Data is loaded on first use by replaying the journal over the snapshot,
+    then held in memory to serve reads.
+    Once the journal grows beyond `compaction_threshold` bytes,
+    the in-memory data is written as the new snapshot and the journal is emptied, in the background.
+
+    File I/O is run on a dedicated single thread in submission order,
+    which keeps the journal consistent with the snapshot written by compaction.
+    """
+    DEFAULT_COMPACTION_THRESHOLD: int = 1024 * 1024
+    """
+    Default size (in bytes) of the journal to trigger compaction.
+    """
+
+    def __init__(
+        self,
+        data_root_path: pathlib.Path,
+        *,
+        compaction_threshold: int = DEFAULT_COMPACTION_THRESHOLD,
+    ):
+        super().__init__()
+        self.__snapshot_file_path = data_root_path.joinpath("report-channels.snapshot.json")
+        self.__journal_file_path = data_root_path.joinpath("report-channels.journal.jsonl")
+        self.__compaction_threshold = compaction_threshold
+        self.__io_executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=1,
+            thread_name_prefix=f"{self.__class__.__name__}-io",
+        )
+
+        self.__guild_to_channels_map: Optional[_DATA_DICT] = None
+        self.__load_lock = asyncio.Lock()
+        self.__guild_locks: KeyedLock[int] = KeyedLock()
+
+        self.__journal_file: Optional[BinaryIO] = None
+        """
+        Opened on the I/O thread on loading; only accessed on the I/O thread.
+        """
+        self.__journal_size: int = 0
+        """
+        Size of the records appended successfully; anything beyond it is a partial record of a failed append.
+        """
+        self.__journal_torn = False
+        """
+        Whether a partial record of a failed append is left beyond `__journal_size`, to be truncated before appending.
+        """
+        self.__compaction_task: Optional[asyncio.Task] = None
+
+        self.__appending_count: int = 0
+        """
+        Number of changes applied to the in-memory data but not yet confirmed appended (or rolled back).
+        """
+        self.__appends_settled = asyncio.Event()
+        self.__appends_settled.set()
+
+    def __str__(self):
+        return f"{self.__class__.__name__}<snapshot file path: {self.__snapshot_file_path}, journal file path: {self.__journal_file_path}>"
+
+    @override
+    async def get_report_channel(
+        self,
+        guild_id: int,
+        /,
+    ) -> Optional[int]:
+        guild_to_channels_map = await self.__get_data()
+        return guild_to_channels_map.get(guild_id, None)
+
+    @override
+    async def register_report_channel(
+        self,
+        guild_id: int,
+        channel_id: int,
+        /,
+    ) -> None:
+        guild_to_channels_map = await self.__get_data()
+        async with self.__guild_locks.hold(guild_id):
+            registered_channel_id = guild_to_channels_map.get(guild_id, None)
+            if registered_channel_id is not None:
+                raise ChannelAlreadyRegisteredError(guild_id, registered_channel_id)
+            LOGGER.debug(f"Registering report channel {channel_id!r} in guild {guild_id!r}.")
+            await self.__apply_changes({guild_id: channel_id})
+
+    @override
+    async def replace_report_channel(
+        self,
+        guild_id: int,
+        channel_id: int,
+        /,
+    ) -> Optional[int]:
+        guild_to_channels_map = await self.__get_data()
+        async with self.__guild_locks.hold(guild_id):
+            registered_channel_id = guild_to_channels_map.get(guild_id, None)
+            if registered_channel_id == channel_id:
+                return registered_channel_id
+            LOGGER.debug(f"Replacing report channel {registered_channel_id!r} with {channel_id!r} in guild {guild_id!r}.")
+            await self.__apply_changes({guild_id: channel_id})
+            return registered_channel_id
+
+    @override
+    async def unregister_report_channel(
+        self,
+        guild_id: int,
+        /,
+    ) -> int:
+        guild_to_channels_map = await self.__get_data()
+        async with self.__guild_locks.hold(guild_id):
+            registered_channel_id = guild_to_channels_map.get(guild_id, None)
+            if registered_channel_id is None:
+                raise ChannelNotRegisteredError(guild_id)
+            LOGGER.debug(f"Unregistering report channel {registered_channel_id!r} in guild {guild_id!r}.")
+            await self.__apply_changes({guild_id: None})
+            return registered_channel_id
+
+    @override
+    async def get_report_channels(
+        self,
+        guild_ids: Iterable[int],
+        /,
+    ) -> dict[int, int]:
+        guild_to_channels_map = await self.__get_data()
+        return {
+            guild_id: guild_to_channels_map[guild_id]
+            for guild_id in guild_ids
+            if guild_id in guild_to_channels_map
+        }
+
+    @override
+    async def iter_report_channels(
+        self,
+    ) -> AsyncIterator[tuple[int, int]]:
+        # copied, since the data may be changed while the caller awaits between items
+        for guild_id, channel_id in list((await self.__get_data()).items()):
+            yield guild_id, channel_id
+
+    @override
+    async def unregister_report_channels(
+        self,
+        guild_ids: Iterable[int],
+        /,
+    ) -> dict[int, int]:
+        guild_to_channels_map = await self.__get_data()
+        guild_ids = set(guild_ids)
+        async with self.__guild_locks.hold_all(guild_ids):
+            unregistered_channel_ids = {
+                guild_id: guild_to_channels_map[guild_id]
+                for guild_id in guild_ids
+                if guild_id in guild_to_channels_map
+            }
+            if unregistered_channel_ids:
+                LOGGER.debug(f"Unregistering report channels in {len(unregistered_channel_ids)} guilds.")
+                await self.__apply_changes(dict.fromkeys(unregistered_channel_ids, None))
+            return unregistered_channel_ids
+
+    @override
+    def close(self) -> None:
+        """
+        Shut down the I/O thread after the file I/O submitted (e.g. compaction) is done, then close the journal file.
+        """
+        self.__io_executor.shutdown(wait=True)
+        if self.__journal_file is not None:
+            self.__journal_file.close()
+            self.__journal_file = None
+
+    async def __get_data(self) -> _DATA_DICT:
+        if self.__guild_to_channels_map is not None:
+            return self.__guild_to_channels_map
+        async with self.__load_lock:
+            if self.__guild_to_channels_map is None:
+                self.__guild_to_channels_map = await self.__run_io(self.__load)
+            return self.__guild_to_channels_map
+
+    async def __apply_changes(
+        self,
+        changes: dict[int, Optional[int]],
+    ) -> None:
+        """
+        Apply changes (guild_id -> channel_id, or `None` to unregister) to the in-memory data,
+        then append them to the journal, flushed to disk once.
+
+        The in-memory data is changed before the records are appended (and rolled back on failure);
+        compaction waits until no append is in flight, so that it never snapshots changes not yet confirmed,
+        nor misses records appended before it.
+        The append is settled even if the caller is cancelled, since the I/O thread may append the records anyway.
+        """
+        guild_to_channels_map = self.__guild_to_channels_map
+        previous_channel_ids = {
+            guild_id: guild_to_channels_map.get(guild_id, None)
+            for guild_id in changes
+        }
+        for guild_id, channel_id in changes.items():
+            _apply_record(guild_to_channels_map, guild_id, channel_id)
+        self.__appending_count += 1
+        self.__appends_settled.clear()
+        await asyncio.shield(asyncio.create_task(self.__settle_append(changes, previous_channel_ids)))
+
+        if self.__journal_size >= self.__compaction_threshold and self.__compaction_task is None:
+            LOGGER.info(f"Journal size {self.__journal_size} exceeds threshold {self.__compaction_threshold}. Compacting.")
+            self.__compaction_task = asyncio.create_task(self.__compact())
+
+    async def __settle_append(
+        self,
+        changes: dict[int, Optional[int]],
+        previous_channel_ids: dict[int, Optional[int]],
+    ) -> None:
+        try:
+            await self.__run_io(self.__append_records, changes)
+        except BaseException:
+            LOGGER.warning(f"Failed to append changes of guilds {list(changes)!r} to journal. Rolling back.")
+            for guild_id, previous_channel_id in previous_channel_ids.items():
+                _apply_record(self.__guild_to_channels_map, guild_id, previous_channel_id)
+            raise
+        finally:
+            self.__appending_count -= 1
+            if self.__appending_count == 0:
+                self.__appends_settled.set()
+
+    async def __compact(self) -> None:
+        try:
+            while self.__appending_count > 0:
+                await self.__appends_settled.wait()
+            # copied and submitted in the same step, so that records appended later are kept in the journal after it
+            await self.__run_io(self.__write_snapshot, dict(self.__guild_to_channels_map))
+        except Exception as exception:
+            LOGGER.error("Failed to compact journal.", exc_info=exception)
+        finally:
+            self.__compaction_task = None
+
+    async def __run_io(self, function: Callable[..., _T], *args) -> _T:
+        return await asyncio.get_running_loop().run_in_executor(self.__io_executor, function, *args)
+
+    def __load(self) -> _DATA_DICT:
+        """
+        Load data by replaying the journal over the snapshot, and open the journal for appending.
+        """
+        guild_to_channels_map: _DATA_DICT
+        try:
+            with self.__snapshot_file_path.open("rb") as snapshot_file:
+                guild_to_channels_map = {
+                    record["guild_id"]: record["channel_id"]
+                    for record in json.load(snapshot_file)
+                }
+        except FileNotFoundError:
+            LOGGER.debug(f"Snapshot file {self.__snapshot_file_path.as_posix()!r} does not exist, considering as no data.")
+            guild_to_channels_map = {}
+
+        self.__journal_file_path.parent.mkdir(parents=True, exist_ok=True)
+        journal_file = self.__journal_file_path.open("a+b")
+        journal_file.seek(0)
+        record_count = 0
+        valid_size = 0
+        for line in journal_file:
+            if not line.endswith(b"\n"):
+                LOGGER.warning(f"Discarding incomplete trailing record in journal {self.__journal_file_path.as_posix()!r} (probably crashed while appending).")
+                break
+            try:
+                record = json.loads(line)
+            except ValueError as error:
+                LOGGER.error(f"Skipping corrupted record in journal {self.__journal_file_path.as_posix()!r}: {line!r}.", exc_info=error)
+            else:
+                _apply_record(guild_to_channels_map, record["guild_id"], record["channel_id"])
+                record_count += 1
+            valid_size += len(line)
+        if journal_file.tell() != valid_size:
+            journal_file.truncate(valid_size)
+        self.__journal_file = journal_file
+        self.__journal_size = valid_size
+
+        LOGGER.info(f"Loaded {len(guild_to_channels_map)} registrations, replayed {record_count} journal records.")
+        return guild_to_channels_map
+
+    def __append_records(
+        self,
+        changes: dict[int, Optional[int]],
+    ) -> None:
+        lines = b"".join(
+            json.dumps(
+                {
+                    "guild_id": guild_id,
+                    "channel_id": channel_id,
+                },
+                separators=(",", ":"),
+            ).encode("utf-8") + b"\n"
+            for guild_id, channel_id in changes.items()
+        )
+        # written to the file descriptor directly, so that nothing of a failed write stays buffered
+        journal_file_descriptor = self.__journal_file.fileno()
+        if self.__journal_torn:
+            os.ftruncate(journal_file_descriptor, self.__journal_size)
+            self.__journal_torn = False
+        try:
+            unwritten_lines = memoryview(lines)
+            while unwritten_lines:
+                unwritten_lines = unwritten_lines[os.write(journal_file_descriptor, unwritten_lines):]
+            os.fsync(journal_file_descriptor)
+        except BaseException:
+            # drop the partial record, so that the next record is never appended to it and skipped on replaying
+            self.__journal_torn = True
+            try:
+                os.ftruncate(journal_file_descriptor, self.__journal_size)
+                self.__journal_torn = False
+            except OSError as error:
+                LOGGER.error(f"Failed to truncate partial record in journal {self.__journal_file_path.as_posix()!r}. Retrying on next append.", exc_info=error)
+            raise
+        self.__journal_size += len(lines)
+
+    def __write_snapshot(self, guild_to_channels_map: _DATA_DICT) -> None:
+        """
+        Write the data as the new snapshot, then empty the journal.
+
+        Crashing in between leaves records already in the snapshot in the journal,
+        which is harmless since replaying a record is idempotent.
+        """
+        json_object = tuple(
+            {
+                "guild_id": guild_id,
+                "channel_id": channel_id,
+            }
+            for guild_id, channel_id in guild_to_channels_map.items()
+        )
+        write_file_atomically(
+            self.__snapshot_file_path,
+            lambda snapshot_file: snapshot_file.write(json.dumps(json_object).encode("utf-8")),
+        )
+        self.__journal_file.truncate(0)
+        os.fsync(self.__journal_file.fileno())
+        self.__journal_size = 0
+        LOGGER.info(f"Compacted journal into snapshot of {len(guild_to_channels_map)} registrations.")
+
+def _apply_record(
+    guild_to_channels_map: _DATA_DICT,
+    guild_id: int,
+    channel_id: Optional[int],
+) -> None:
+    if channel_id is None:
+        guild_to_channels_map.pop(guild_id, None)
+    else:
+        guild_to_channels_map[guild_id] = channel_id
@@ -2,10 +2,11 @@
 __all__ = (
     "JsonChannelRegisterRepo",
 )
+import concurrent.futures
 import json
 import logging
 import pathlib
-from typing import override
+from typing import BinaryIO, Optional, override
 
 from .._channel_register_repo import *
 from ._simple_channel_register_repo import *
@@ -17,8 +18,15 @@ class JsonChannelRegisterRepo(SingleFileChannelRegisterRepo):
     def __init__(
         self,
         data_root_path: pathlib.Path,
+        *,
+        revalidate_interval: float = SingleFileChannelRegisterRepo.DEFAULT_REVALIDATE_INTERVAL,
+        io_executor: Optional[concurrent.futures.Executor] = None,
     ):
-        super().__init__(data_root_path)
+        super().__init__(
+            data_root_path,
+            revalidate_interval=revalidate_interval,
+            io_executor=io_executor,
+        )
 
     @property
     @override
@@ -26,7 +34,7 @@ class JsonChannelRegisterRepo(SingleFileChannelRegisterRepo):
         return "report-channels.json"
 
     @override
-    async def _fetch_data_from_file(self, data_file_path: pathlib.Path) -> SimpleChannelRegisterRepo._DATA_DICT:
+    def _fetch_data_from_file(self, data_file_path: pathlib.Path) -> SimpleChannelRegisterRepo._DATA_DICT:
         try:
             with data_file_path.open("r", encoding="utf-8") as file:
                 json_object = json.load(file)
@@ -39,7 +47,7 @@ class JsonChannelRegisterRepo(SingleFileChannelRegisterRepo):
             return {}
 
     @override
-    async def _save_data_to_file(self, data_file_path: pathlib.Path, data: SimpleChannelRegisterRepo._DATA_DICT) -> None:
+    def _save_data_to_file(self, data_file: BinaryIO, data: SimpleChannelRegisterRepo._DATA_DICT) -> None:
         json_object = tuple(
             {
                 "guild_id": guild_id,
@@ -47,10 +55,9 @@ class JsonChannelRegisterRepo(SingleFileChannelRegisterRepo):
             }
             for guild_id, channel_id in data.items()
         )
-        data_file_path.parent.mkdir(parents=True, exist_ok=True)
-        with data_file_path.open("w", encoding="utf-8") as file:
-            json.dump(
+        data_file.write(
+            json.dumps(
                 json_object,
-                file,
                 indent=4,
-            )
+            ).encode("utf-8")
+        )
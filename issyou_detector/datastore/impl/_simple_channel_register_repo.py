@@ -3,18 +3,43 @@ __all__ = (
     "SimpleChannelRegisterRepo",
 )
 import abc
+import asyncio
+import dataclasses
 import logging
-import threading
-from typing import Optional, override
+from typing import AsyncIterator, Iterable, Optional, override
 
 from .._channel_register_repo import *
+from ...util.locks import *
 
 LOGGER = logging.getLogger(__name__)
 
+@dataclasses.dataclass(slots=True)
+class _PendingCommit:
+    changes: dict[int, Optional[int]] = dataclasses.field(default_factory=dict)
+    """
+    guild_id -> channel_id to register, or `None` to unregister
+    """
+    error: Optional[Exception] = None
+    writer_count: int = 0
+    """
+    Number of writers waiting for these changes to be saved.
+    """
+    merged_into: Optional["_PendingCommit"] = None
+    """
+    The commit these changes are moved into, to be saved by, after the save of it was cancelled.
+    """
+
 class SimpleChannelRegisterRepo(ChannelRegisterRepo):
     """
     Simple implement using an object representing all data,
     which the object is provided by subclasses.
+
+    The object provided by subclasses is treated as an immutable snapshot:
+    reads are served from it without locking or copying,
+    while changes are made on a copy, which is then passed back to be saved as the next snapshot.
+
+    Writes are locked per guild, so writes in different guilds never wait for each other's checks;
+    their changes are batched into as few saves as possible.
     """
     _DATA_DICT = dict[int, int]
     """
@@ -25,7 +50,9 @@ class SimpleChannelRegisterRepo(ChannelRegisterRepo):
         self,
     ):
         super().__init__()
-        self.__datasource_lock = threading.RLock()
+        self.__guild_locks: KeyedLock[int] = KeyedLock()
+        self.__commit_lock = asyncio.Lock()
+        self.__pending_commit: Optional[_PendingCommit] = None
 
     @override
     async def get_report_channel(
@@ -33,9 +60,8 @@ class SimpleChannelRegisterRepo(ChannelRegisterRepo):
         guild_id: int,
         /,
     ) -> Optional[int]:
-        with self.__datasource_lock:
-            guild_to_channels_map = await self._fetch_data()
-            return guild_to_channels_map.get(guild_id, None)
+        guild_to_channels_map = await self._fetch_data()
+        return guild_to_channels_map.get(guild_id, None)
 
     @override
     async def register_report_channel(
@@ -44,14 +70,29 @@ class SimpleChannelRegisterRepo(ChannelRegisterRepo):
         channel_id: int,
         /,
     ) -> None:
-        with self.__datasource_lock:
+        async with self.__guild_locks.hold(guild_id):
             guild_to_channels_map = await self._fetch_data()
             registered_channel_id = guild_to_channels_map.get(guild_id, None)
             if registered_channel_id is not None:
                 raise ChannelAlreadyRegisteredError(guild_id, registered_channel_id)
             LOGGER.debug(f"Registering report channel {channel_id!r} in guild {guild_id!r}.")
-            guild_to_channels_map[guild_id] = channel_id
-            await self._save_data(guild_to_channels_map)
+            await self.__commit({guild_id: channel_id})
+
+    @override
+    async def replace_report_channel(
+        self,
+        guild_id: int,
+        channel_id: int,
+        /,
+    ) -> Optional[int]:
+        async with self.__guild_locks.hold(guild_id):
+            guild_to_channels_map = await self._fetch_data()
+            registered_channel_id = guild_to_channels_map.get(guild_id, None)
+            if registered_channel_id == channel_id:
+                return registered_channel_id
+            LOGGER.debug(f"Replacing report channel {registered_channel_id!r} with {channel_id!r} in guild {guild_id!r}.")
+            await self.__commit({guild_id: channel_id})
+            return registered_channel_id
 
     @override
     async def unregister_report_channel(
@@ -59,24 +100,137 @@ class SimpleChannelRegisterRepo(ChannelRegisterRepo):
         guild_id: int,
         /,
     ) -> int:
-        with self.__datasource_lock:
+        async with self.__guild_locks.hold(guild_id):
             guild_to_channels_map = await self._fetch_data()
             registered_channel_id = guild_to_channels_map.get(guild_id, None)
             if registered_channel_id is None:
                 raise ChannelNotRegisteredError(guild_id)
             LOGGER.debug(f"Unregistering report channel {registered_channel_id!r} in guild {guild_id!r}.")
-            del guild_to_channels_map[guild_id]
-            await self._save_data(guild_to_channels_map)
+            await self.__commit({guild_id: None})
             return registered_channel_id
 
+    @override
+    async def get_report_channels(
+        self,
+        guild_ids: Iterable[int],
+        /,
+    ) -> dict[int, int]:
+        guild_to_channels_map = await self._fetch_data()
+        return {
+            guild_id: guild_to_channels_map[guild_id]
+            for guild_id in guild_ids
+            if guild_id in guild_to_channels_map
+        }
+
+    @override
+    async def iter_report_channels(
+        self,
+    ) -> AsyncIterator[tuple[int, int]]:
+        # the snapshot is never mutated, thus iterated as-is
+        for guild_id, channel_id in (await self._fetch_data()).items():
+            yield guild_id, channel_id
+
+    @override
+    async def unregister_report_channels(
+        self,
+        guild_ids: Iterable[int],
+        /,
+    ) -> dict[int, int]:
+        guild_ids = set(guild_ids)
+        async with self.__guild_locks.hold_all(guild_ids):
+            guild_to_channels_map = await self._fetch_data()
+            unregistered_channel_ids = {
+                guild_id: guild_to_channels_map[guild_id]
+                for guild_id in guild_ids
+                if guild_id in guild_to_channels_map
+            }
+            if unregistered_channel_ids:
+                LOGGER.debug(f"Unregistering report channels in {len(unregistered_channel_ids)} guilds.")
+                await self.__commit(dict.fromkeys(unregistered_channel_ids, None))
+            return unregistered_channel_ids
+
     @abc.abstractmethod
     async def _fetch_data(self) -> _DATA_DICT:
         """
         Build the data object from the data source.
+
+        The returned object may be shared with later calls, thus should not be mutated by callers.
         """
 
     @abc.abstractmethod
     async def _save_data(self, data: _DATA_DICT) -> None:
         """
         Save the data object to the data source.
+
+        The data object is owned by the implementation after this call,
+        i.e. it may be kept as-is and returned by later `_fetch_data` calls.
         """
+
+    async def __commit(
+        self,
+        changes: dict[int, Optional[int]],
+    ) -> None:
+        """
+        Apply changes (guild_id -> channel_id, or `None` to unregister) to the latest data, then save it.
+
+        Changes queued while another save is in progress are applied together by one save.
+        """
+        pending_commit = self.__pending_commit
+        if pending_commit is None:
+            pending_commit = self.__pending_commit = _PendingCommit()
+        pending_commit.changes.update(changes)
+        pending_commit.writer_count += 1
+        try:
+            await self.__commit_lock.acquire()
+        except BaseException:
+            _follow_merges(pending_commit).writer_count -= 1
+            raise
+
+        try:
+            # moved into another commit if a save was cancelled, thus to be saved with it
+            pending_commit = _follow_merges(pending_commit)
+            pending_commit.writer_count -= 1
+            if pending_commit is not self.__pending_commit:
+                # already saved (or failed) by the writer which took the lock earlier
+                if pending_commit.error is not None:
+                    raise pending_commit.error
+                return
+            self.__pending_commit = None
+
+            try:
+                guild_to_channels_map = dict(await self._fetch_data())
+                for changed_guild_id, changed_channel_id in pending_commit.changes.items():
+                    if changed_channel_id is None:
+                        guild_to_channels_map.pop(changed_guild_id, None)
+                    else:
+                        guild_to_channels_map[changed_guild_id] = changed_channel_id
+                if len(pending_commit.changes) > 1:
+                    LOGGER.debug(f"Saving {len(pending_commit.changes)} changes in one batch.")
+                await self._save_data(guild_to_channels_map)
+            except Exception as exception:
+                pending_commit.error = exception
+                raise
+            except BaseException:
+                # e.g. this writer cancelled, which is no failure of the others waiting;
+                # the next of them takes the lock and saves the changes again
+                if pending_commit.writer_count > 0:
+                    self.__requeue(pending_commit)
+                raise
+        finally:
+            self.__commit_lock.release()
+
+    def __requeue(self, pending_commit: _PendingCommit) -> None:
+        """
+        Make the commit pending again, before changes queued after it.
+        """
+        queued_commit = self.__pending_commit
+        if queued_commit is not None:
+            pending_commit.changes.update(queued_commit.changes)
+            pending_commit.writer_count += queued_commit.writer_count
+            queued_commit.merged_into = pending_commit
+        self.__pending_commit = pending_commit
+
+def _follow_merges(pending_commit: _PendingCommit) -> _PendingCommit:
+    while pending_commit.merged_into is not None:
+        pending_commit = pending_commit.merged_into
+    return pending_commit
@@ -3,23 +3,68 @@ __all__ = (
     "SingleFileChannelRegisterRepo",
 )
 import abc
+import asyncio
+import concurrent.futures
+import logging
+import math
 import pathlib
-from typing import Optional, override
+import time
+from typing import BinaryIO, Callable, Optional, TypeVar, override
 
 from .._channel_register_repo import *
+from ...util.atomic_file import *
 from ._simple_channel_register_repo import *
 
+LOGGER = logging.getLogger(__name__)
+
+_T = TypeVar("_T")
+
 class SingleFileChannelRegisterRepo(SimpleChannelRegisterRepo):
     """
     guild_id -> channel_id
+
+    The parsed data is held in memory as a snapshot, which is served to reads directly.
+    The data file is re-parsed only if its modification time or size has changed,
+    which is checked at most once per `revalidate_interval` seconds,
+    so that changes made outside this repo are still picked up.
+
+    File I/O is run on an executor (a dedicated single thread by default) instead of the event loop,
+    and the data file is written atomically so that a crash while saving never loses the old data.
+    """
+    DEFAULT_REVALIDATE_INTERVAL: float = 1.0
+    """
+    Default interval (in seconds) between checks of the data file for external changes.
+    """
+
+    _FILE_STAT = tuple[int, int]
+    """
+    (modification time in nanoseconds, size in bytes) of the data file
     """
 
     def __init__(
         self,
         data_root_path: pathlib.Path,
+        *,
+        revalidate_interval: float = DEFAULT_REVALIDATE_INTERVAL,
+        io_executor: Optional[concurrent.futures.Executor] = None,
     ):
+        """
+        Args:
+            io_executor: The executor to run file I/O on.
+                If not provided, a dedicated single-thread executor is used,
+                which also serializes all file I/O of this repo.
+        """
         super().__init__()
         self.__data_root_path = data_root_path
+        self.__revalidate_interval = revalidate_interval
+        self.__io_executor = io_executor if io_executor is not None else concurrent.futures.ThreadPoolExecutor(
+            max_workers=1,
+            thread_name_prefix=f"{self.__class__.__name__}-io",
+        )
+        self.__owns_io_executor = io_executor is None
+        self.__snapshot: Optional[SimpleChannelRegisterRepo._DATA_DICT] = None
+        self.__snapshot_file_stat: Optional[SingleFileChannelRegisterRepo._FILE_STAT] = None
+        self.__snapshot_validated_at: float = -math.inf
 
     def __str__(self):
         return f"{self.__class__.__name__}<data file path: {self.__data_file_path}>"
@@ -33,19 +78,64 @@ class SingleFileChannelRegisterRepo(SimpleChannelRegisterRepo):
 
     @override
     async def _fetch_data(self) -> SimpleChannelRegisterRepo._DATA_DICT:
-        return await self._fetch_data_from_file(self.__data_file_path)
+        now = time.monotonic()
+        if self.__snapshot is not None and now - self.__snapshot_validated_at < self.__revalidate_interval:
+            return self.__snapshot
+
+        file_stat = await self.__run_io(self.__stat_data_file)
+        if self.__snapshot is None or file_stat != self.__snapshot_file_stat:
+            LOGGER.debug(f"Loading data snapshot from file {self.__data_file_path.as_posix()!r} (file stat: {file_stat!r}).")
+            self.__snapshot = await self.__run_io(self._fetch_data_from_file, self.__data_file_path)
+            self.__snapshot_file_stat = file_stat
+        self.__snapshot_validated_at = now
+        return self.__snapshot
 
     @override
     async def _save_data(self, data: SimpleChannelRegisterRepo._DATA_DICT) -> None:
-        await self._save_data_to_file(self.__data_file_path, data)
+        self.__snapshot_file_stat = await self.__run_io(self.__write_data_file, data)
+        self.__snapshot = data
+        self.__snapshot_validated_at = time.monotonic()
+
+    @override
+    def close(self) -> None:
+        """
+        Shut down the dedicated I/O executor, if not provided by the caller.
+        """
+        if self.__owns_io_executor:
+            self.__io_executor.shutdown(wait=True)
 
     @abc.abstractmethod
-    async def _fetch_data_from_file(self, data_file_path: pathlib.Path) -> SimpleChannelRegisterRepo._DATA_DICT:
-        pass
+    def _fetch_data_from_file(self, data_file_path: pathlib.Path) -> SimpleChannelRegisterRepo._DATA_DICT:
+        """
+        Read the data object from the data file.
+
+        Called on the I/O executor, not on the event loop.
+        """
 
     @abc.abstractmethod
-    async def _save_data_to_file(self, data_file_path: pathlib.Path, data: SimpleChannelRegisterRepo._DATA_DICT) -> None:
-        pass
+    def _save_data_to_file(self, data_file: BinaryIO, data: SimpleChannelRegisterRepo._DATA_DICT) -> None:
+        """
+        Write the data object to the (temporary) data file opened for writing.
+
+        Called on the I/O executor, not on the event loop.
+        """
+
+    async def __run_io(self, function: Callable[..., _T], *args) -> _T:
+        return await asyncio.get_running_loop().run_in_executor(self.__io_executor, function, *args)
+
+    def __write_data_file(self, data: SimpleChannelRegisterRepo._DATA_DICT) -> Optional[_FILE_STAT]:
+        write_file_atomically(
+            self.__data_file_path,
+            lambda data_file: self._save_data_to_file(data_file, data),
+        )
+        return self.__stat_data_file()
+
+    def __stat_data_file(self) -> Optional[_FILE_STAT]:
+        try:
+            stat_result = self.__data_file_path.stat()
+        except FileNotFoundError:
+            return None
+        return (stat_result.st_mtime_ns, stat_result.st_size)
 
     @property
     def __data_file_path(self) -> pathlib.Path:
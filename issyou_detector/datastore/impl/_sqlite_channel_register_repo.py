@@ -0,0 +1,209 @@
+# encoding=utf-8
+__all__ = (
+    "SqliteChannelRegisterRepo",
+)
+import asyncio
+import concurrent.futures
+import logging
+import pathlib
+from typing import AsyncIterator, Callable, Iterable, Iterator, Optional, TypeVar, override
+
+from .._channel_register_repo import *
+from ._sqlite_connection import *
+
+LOGGER = logging.getLogger(__name__)
+
+_T = TypeVar("_T")
+
+# statements are kept as constants, so that each pooled connection compiles them once
+# and reuses the prepared statements from its statement cache
+_CREATE_TABLE_SQL: str = """
+CREATE TABLE IF NOT EXISTS report_channels (
+    guild_id INTEGER PRIMARY KEY,
+    channel_id INTEGER NOT NULL
+)
+"""
+_SELECT_CHANNEL_SQL: str = "SELECT channel_id FROM report_channels WHERE guild_id = ?"
+_INSERT_CHANNEL_SQL: str = "INSERT INTO report_channels (guild_id, channel_id) VALUES (?, ?)"
+_UPSERT_CHANNEL_SQL: str = """
+INSERT INTO report_channels (guild_id, channel_id) VALUES (?, ?)
+ON CONFLICT (guild_id) DO UPDATE SET channel_id = excluded.channel_id
+"""
+_DELETE_CHANNEL_SQL: str = "DELETE FROM report_channels WHERE guild_id = ? RETURNING channel_id"
+_SELECT_PAGE_SQL: str = "SELECT guild_id, channel_id FROM report_channels WHERE guild_id > ? ORDER BY guild_id LIMIT ?"
+_BATCH_SIZE: int = 500
+"""
+Max number of guilds per statement of bulk operations, within the default limit of SQLite on host parameters (999).
+"""
+
+class SqliteChannelRegisterRepo(ChannelRegisterRepo):
+    """
+    Implement backed by a SQLite database, keyed by guild ID.
+
+    The database is in WAL mode, so several processes can share it:
+    reads never wait for writes, and writes are serialized by SQLite.
+    Queries are run on a small pool of connections, each used by one executor thread at a time,
+    never on the event loop.
+    """
+    DEFAULT_POOL_SIZE: int = 4
+    DEFAULT_BUSY_TIMEOUT: float = 5.0
+    """
+    Default time (in seconds) to wait for other connections (possibly in other processes) holding the database lock.
+    """
+
+    def __init__(
+        self,
+        data_root_path: pathlib.Path,
+        *,
+        pool_size: int = DEFAULT_POOL_SIZE,
+        busy_timeout: float = DEFAULT_BUSY_TIMEOUT,
+    ):
+        super().__init__()
+        self.__database_file_path = data_root_path.joinpath("report-channels.sqlite3")
+        self.__connection_pool = ConnectionPool(
+            self.__database_file_path,
+            schema_statements=(_CREATE_TABLE_SQL,),
+            size=pool_size,
+            busy_timeout=busy_timeout,
+        )
+        self.__io_executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=pool_size,
+            thread_name_prefix=f"{self.__class__.__name__}-io",
+        )
+
+    def __str__(self):
+        return f"{self.__class__.__name__}<database file path: {self.__database_file_path}>"
+
+    @override
+    async def get_report_channel(
+        self,
+        guild_id: int,
+        /,
+    ) -> Optional[int]:
+        return await self.__run_io(self.__select_channel, guild_id)
+
+    @override
+    async def register_report_channel(
+        self,
+        guild_id: int,
+        channel_id: int,
+        /,
+    ) -> None:
+        LOGGER.debug(f"Registering report channel {channel_id!r} in guild {guild_id!r}.")
+        await self.__run_io(self.__insert_channel, guild_id, channel_id)
+
+    @override
+    async def replace_report_channel(
+        self,
+        guild_id: int,
+        channel_id: int,
+        /,
+    ) -> Optional[int]:
+        LOGGER.debug(f"Replacing report channel with {channel_id!r} in guild {guild_id!r}.")
+        return await self.__run_io(self.__upsert_channel, guild_id, channel_id)
+
+    @override
+    async def unregister_report_channel(
+        self,
+        guild_id: int,
+        /,
+    ) -> int:
+        LOGGER.debug(f"Unregistering report channel in guild {guild_id!r}.")
+        return await self.__run_io(self.__delete_channel, guild_id)
+
+    @override
+    async def get_report_channels(
+        self,
+        guild_ids: Iterable[int],
+        /,
+    ) -> dict[int, int]:
+        return await self.__run_io(self.__select_channels, list(guild_ids))
+
+    @override
+    async def iter_report_channels(
+        self,
+    ) -> AsyncIterator[tuple[int, int]]:
+        # paged by the key rather than holding a cursor open, so that no read transaction is held across awaits
+        last_guild_id = -1
+        while True:
+            rows = await self.__run_io(self.__select_page, last_guild_id)
+            for guild_id, channel_id in rows:
+                yield guild_id, channel_id
+            if len(rows) < _BATCH_SIZE:
+                return
+            last_guild_id = rows[-1][0]
+
+    @override
+    async def unregister_report_channels(
+        self,
+        guild_ids: Iterable[int],
+        /,
+    ) -> dict[int, int]:
+        guild_ids = list(guild_ids)
+        LOGGER.debug(f"Unregistering report channels in up to {len(guild_ids)} guilds.")
+        return await self.__run_io(self.__delete_channels, guild_ids)
+
+    @override
+    def close(self) -> None:
+        """
+        Close all connections to the database.
+        """
+        self.__io_executor.shutdown(wait=True)
+        self.__connection_pool.close()
+
+    async def __run_io(self, function: Callable[..., _T], *args) -> _T:
+        return await asyncio.get_running_loop().run_in_executor(self.__io_executor, function, *args)
+
+    def __select_channel(self, guild_id: int) -> Optional[int]:
+        with self.__connection_pool.connection() as connection:
+            row = connection.execute(_SELECT_CHANNEL_SQL, (guild_id,)).fetchone()
+        return None if row is None else row[0]
+
+    def __insert_channel(self, guild_id: int, channel_id: int) -> None:
+        with self.__connection_pool.connection() as connection, transaction(connection):
+            row = connection.execute(_SELECT_CHANNEL_SQL, (guild_id,)).fetchone()
+            if row is not None:
+                raise ChannelAlreadyRegisteredError(guild_id, row[0])
+            connection.execute(_INSERT_CHANNEL_SQL, (guild_id, channel_id))
+
+    def __upsert_channel(self, guild_id: int, channel_id: int) -> Optional[int]:
+        with self.__connection_pool.connection() as connection, transaction(connection):
+            row = connection.execute(_SELECT_CHANNEL_SQL, (guild_id,)).fetchone()
+            connection.execute(_UPSERT_CHANNEL_SQL, (guild_id, channel_id))
+        return None if row is None else row[0]
+
+    def __delete_channel(self, guild_id: int) -> int:
+        with self.__connection_pool.connection() as connection, transaction(connection):
+            # fetch all to finish the statement before committing
+            rows = connection.execute(_DELETE_CHANNEL_SQL, (guild_id,)).fetchall()
+            if not rows:
+                raise ChannelNotRegisteredError(guild_id)
+            return rows[0][0]
+
+    def __select_channels(self, guild_ids: list[int]) -> dict[int, int]:
+        report_channel_ids: dict[int, int] = {}
+        with self.__connection_pool.connection() as connection:
+            for batch in _batched(guild_ids):
+                report_channel_ids.update(connection.execute(
+                    f"SELECT guild_id, channel_id FROM report_channels WHERE guild_id IN ({", ".join("?" * len(batch))})",
+                    batch,
+                ).fetchall())
+        return report_channel_ids
+
+    def __select_page(self, last_guild_id: int) -> list[tuple[int, int]]:
+        with self.__connection_pool.connection() as connection:
+            return connection.execute(_SELECT_PAGE_SQL, (last_guild_id, _BATCH_SIZE)).fetchall()
+
+    def __delete_channels(self, guild_ids: list[int]) -> dict[int, int]:
+        unregistered_channel_ids: dict[int, int] = {}
+        with self.__connection_pool.connection() as connection, transaction(connection):
+            for batch in _batched(guild_ids):
+                unregistered_channel_ids.update(connection.execute(
+                    f"DELETE FROM report_channels WHERE guild_id IN ({", ".join("?" * len(batch))}) RETURNING guild_id, channel_id",
+                    batch,
+                ).fetchall())
+        return unregistered_channel_ids
+
+def _batched(guild_ids: list[int]) -> Iterator[list[int]]:
+    for start in range(0, len(guild_ids), _BATCH_SIZE):
+        yield guild_ids[start : start + _BATCH_SIZE]
@@ -0,0 +1,98 @@
+# encoding=utf-8
+__all__ = (
+    "ConnectionPool",
+    "transaction",
+)
+import contextlib
+import logging
+import pathlib
+import queue
+import sqlite3
+import threading
+from typing import Iterator, Sequence
+
+LOGGER = logging.getLogger(__name__)
+
+class ConnectionPool:
+    """
+    Pool of connections to a SQLite database, created on demand.
+    """
+    def __init__(
+        self,
+        database_file_path: pathlib.Path,
+        *,
+        schema_statements: Sequence[str],
+        size: int,
+        busy_timeout: float,
+    ):
+        """
+        Args:
+            schema_statements: Statements creating the schema if not exists, run once on the first connection.
+        """
+        self.__database_file_path = database_file_path
+        self.__schema_statements = tuple(schema_statements)
+        self.__busy_timeout = busy_timeout
+        self.__idle_connections: queue.LifoQueue[sqlite3.Connection] = queue.LifoQueue()
+        self.__all_connections: list[sqlite3.Connection] = []
+        self.__capacity = threading.BoundedSemaphore(size)
+        self.__lock = threading.Lock()
+        self.__schema_initialized = False
+
+    @contextlib.contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        with self.__capacity:
+            try:
+                connection = self.__idle_connections.get_nowait()
+            except queue.Empty:
+                connection = self.__connect()
+            try:
+                yield connection
+            finally:
+                self.__idle_connections.put(connection)
+
+    def close(self) -> None:
+        with self.__lock:
+            for connection in self.__all_connections:
+                connection.close()
+            self.__all_connections.clear()
+        while not self.__idle_connections.empty():
+            self.__idle_connections.get_nowait()
+
+    def __connect(self) -> sqlite3.Connection:
+        self.__database_file_path.parent.mkdir(parents=True, exist_ok=True)
+        connection = sqlite3.connect(
+            self.__database_file_path,
+            timeout=self.__busy_timeout,
+            # transactions are managed explicitly by `transaction`
+            isolation_level=None,
+            # connections are handed over between executor threads, though never used concurrently
+            check_same_thread=False,
+        )
+        # durable enough in WAL mode: committed transactions survive application crashes,
+        # only the last ones may be rolled back on power loss
+        connection.execute("PRAGMA synchronous = NORMAL")
+        with self.__lock:
+            if not self.__schema_initialized:
+                # WAL mode is persistent in the database file, shared by all connections and processes
+                connection.execute("PRAGMA journal_mode = WAL")
+                for statement in self.__schema_statements:
+                    connection.execute(statement)
+                self.__schema_initialized = True
+                LOGGER.info(f"Initialized database {self.__database_file_path.as_posix()!r}.")
+            self.__all_connections.append(connection)
+        LOGGER.debug(f"Opened connection #{len(self.__all_connections)} to database {self.__database_file_path.as_posix()!r}.")
+        return connection
+
+@contextlib.contextmanager
+def transaction(connection: sqlite3.Connection) -> Iterator[None]:
+    """
+    Run statements within a write transaction, which takes the database write lock up front.
+    """
+    connection.execute("BEGIN IMMEDIATE")
+    try:
+        yield
+    except BaseException:
+        connection.execute("ROLLBACK")
+        raise
+    else:
+        connection.execute("COMMIT")
@@ -0,0 +1,187 @@
+# encoding=utf-8
+__all__ = (
+    "SqliteDetectionStatsRepo",
+)
+import asyncio
+import concurrent.futures
+import logging
+import pathlib
+from typing import Callable, Mapping, Optional, TypeVar, override
+
+from .._detection_stats_repo import *
+from ._sqlite_connection import *
+
+LOGGER = logging.getLogger(__name__)
+
+_T = TypeVar("_T")
+
+# counts are kept at three granularities, each maintained on writing,
+# so that leaderboards are read from a few index entries rather than summed up from every hit
+_CREATE_SCHEMA_SQLS: tuple[str, ...] = (
+    """
+    CREATE TABLE IF NOT EXISTS daily_user_hits (
+        guild_id INTEGER NOT NULL,
+        day INTEGER NOT NULL,
+        user_id INTEGER NOT NULL,
+        hit_count INTEGER NOT NULL,
+        PRIMARY KEY (guild_id, day, user_id)
+    ) WITHOUT ROWID
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS user_hits (
+        guild_id INTEGER NOT NULL,
+        user_id INTEGER NOT NULL,
+        hit_count INTEGER NOT NULL,
+        PRIMARY KEY (guild_id, user_id)
+    ) WITHOUT ROWID
+    """,
+    "CREATE INDEX IF NOT EXISTS user_hits_by_count ON user_hits (guild_id, hit_count DESC, user_id)",
+    """
+    CREATE TABLE IF NOT EXISTS daily_hits (
+        guild_id INTEGER NOT NULL,
+        day INTEGER NOT NULL,
+        hit_count INTEGER NOT NULL,
+        PRIMARY KEY (guild_id, day)
+    ) WITHOUT ROWID
+    """,
+    "CREATE INDEX IF NOT EXISTS daily_hits_by_count ON daily_hits (guild_id, hit_count DESC, day)",
+)
+_UPSERT_DAILY_USER_HITS_SQL: str = """
+INSERT INTO daily_user_hits (guild_id, day, user_id, hit_count) VALUES (?, ?, ?, ?)
+ON CONFLICT (guild_id, day, user_id) DO UPDATE SET hit_count = hit_count + excluded.hit_count
+"""
+_UPSERT_USER_HITS_SQL: str = """
+INSERT INTO user_hits (guild_id, user_id, hit_count) VALUES (?, ?, ?)
+ON CONFLICT (guild_id, user_id) DO UPDATE SET hit_count = hit_count + excluded.hit_count
+"""
+_UPSERT_DAILY_HITS_SQL: str = """
+INSERT INTO daily_hits (guild_id, day, hit_count) VALUES (?, ?, ?)
+ON CONFLICT (guild_id, day) DO UPDATE SET hit_count = hit_count + excluded.hit_count
+"""
+_SELECT_TOP_USERS_SQL: str = """
+SELECT user_id, hit_count FROM user_hits WHERE guild_id = ?
+ORDER BY hit_count DESC, user_id LIMIT ?
+"""
+_SELECT_TOP_USERS_SINCE_SQL: str = """
+SELECT user_id, SUM(hit_count) AS total_hit_count FROM daily_user_hits WHERE guild_id = ? AND day >= ?
+GROUP BY user_id ORDER BY total_hit_count DESC, user_id LIMIT ?
+"""
+_SELECT_TOP_DAYS_SQL: str = """
+SELECT day, hit_count FROM daily_hits WHERE guild_id = ? AND day >= ?
+ORDER BY hit_count DESC, day LIMIT ?
+"""
+_SELECT_HIT_COUNT_SQL: str = "SELECT COALESCE(SUM(hit_count), 0) FROM daily_hits WHERE guild_id = ? AND day >= ?"
+
+class SqliteDetectionStatsRepo(DetectionStatsRepo):
+    """
+    Implement backed by a SQLite database of aggregate tables,
+    per guild, day and user; per guild and user; and per guild and day.
+
+    Counts are added to all the tables in one transaction per batch,
+    and the database is in WAL mode, so several processes can share it, as `SqliteChannelRegisterRepo`.
+    """
+    DEFAULT_POOL_SIZE: int = 2
+    DEFAULT_BUSY_TIMEOUT: float = 5.0
+
+    def __init__(
+        self,
+        data_root_path: pathlib.Path,
+        *,
+        pool_size: int = DEFAULT_POOL_SIZE,
+        busy_timeout: float = DEFAULT_BUSY_TIMEOUT,
+    ):
+        super().__init__()
+        self.__database_file_path = data_root_path.joinpath("detection-stats.sqlite3")
+        self.__connection_pool = ConnectionPool(
+            self.__database_file_path,
+            schema_statements=_CREATE_SCHEMA_SQLS,
+            size=pool_size,
+            busy_timeout=busy_timeout,
+        )
+        self.__io_executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=pool_size,
+            thread_name_prefix=f"{self.__class__.__name__}-io",
+        )
+
+    def __str__(self):
+        return f"{self.__class__.__name__}<database file path: {self.__database_file_path}>"
+
+    @override
+    async def add_hit_counts(
+        self,
+        hit_counts: Mapping[HitBucket, int],
+        /,
+    ) -> None:
+        user_hit_counts: dict[tuple[int, int], int] = {}
+        daily_hit_counts: dict[tuple[int, int], int] = {}
+        for (guild_id, day, user_id), count in hit_counts.items():
+            user_hit_counts[guild_id, user_id] = user_hit_counts.get((guild_id, user_id), 0) + count
+            daily_hit_counts[guild_id, day] = daily_hit_counts.get((guild_id, day), 0) + count
+        LOGGER.debug(f"Adding hit counts of {len(hit_counts)} buckets.")
+        await self.__run_io(
+            self.__upsert_hit_counts,
+            [(*bucket, count) for bucket, count in hit_counts.items()],
+            [(*key, count) for key, count in user_hit_counts.items()],
+            [(*key, count) for key, count in daily_hit_counts.items()],
+        )
+
+    @override
+    async def get_top_users(
+        self,
+        guild_id: int,
+        /,
+        *,
+        since_day: Optional[int] = None,
+        limit: int,
+    ) -> list[tuple[int, int]]:
+        if since_day is None:
+            return await self.__run_io(self.__select, _SELECT_TOP_USERS_SQL, (guild_id, limit))
+        return await self.__run_io(self.__select, _SELECT_TOP_USERS_SINCE_SQL, (guild_id, since_day, limit))
+
+    @override
+    async def get_top_days(
+        self,
+        guild_id: int,
+        /,
+        *,
+        since_day: Optional[int] = None,
+        limit: int,
+    ) -> list[tuple[int, int]]:
+        return await self.__run_io(self.__select, _SELECT_TOP_DAYS_SQL, (guild_id, -1 if since_day is None else since_day, limit))
+
+    @override
+    async def get_hit_count(
+        self,
+        guild_id: int,
+        /,
+        *,
+        since_day: Optional[int] = None,
+    ) -> int:
+        rows = await self.__run_io(self.__select, _SELECT_HIT_COUNT_SQL, (guild_id, -1 if since_day is None else since_day))
+        return rows[0][0]
+
+    @override
+    def close(self) -> None:
+        """
+        Close all connections to the database.
+        """
+        self.__io_executor.shutdown(wait=True)
+        self.__connection_pool.close()
+
+    async def __run_io(self, function: Callable[..., _T], *args) -> _T:
+        return await asyncio.get_running_loop().run_in_executor(self.__io_executor, function, *args)
+
+    def __upsert_hit_counts(
+        self,
+        daily_user_hit_rows: list[tuple[int, int, int, int]],
+        user_hit_rows: list[tuple[int, int, int]],
+        daily_hit_rows: list[tuple[int, int, int]],
+    ) -> None:
+        with self.__connection_pool.connection() as connection, transaction(connection):
+            connection.executemany(_UPSERT_DAILY_USER_HITS_SQL, daily_user_hit_rows)
+            connection.executemany(_UPSERT_USER_HITS_SQL, user_hit_rows)
+            connection.executemany(_UPSERT_DAILY_HITS_SQL, daily_hit_rows)
+
+    def __select(self, sql: str, parameters: tuple) -> list[tuple]:
+        with self.__connection_pool.connection() as connection:
+            return connection.execute(sql, parameters).fetchall()
@@ -0,0 +1,6 @@
+# encoding=utf-8
+from ._keyword_matcher import *
+from ._fuzzy_keyword_matcher import *
+from ._text_normalizer import *
+from ._message_scanner import *
+from ._detection_pipeline import *
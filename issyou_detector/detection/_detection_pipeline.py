@@ -0,0 +1,140 @@
+# encoding=utf-8
+__all__ = (
+    "DetectionPipeline",
+)
+import asyncio
+import collections
+import logging
+from typing import Awaitable, Callable, Generic, Hashable, Optional, TypeVar
+
+LOGGER = logging.getLogger(__name__)
+
+_T = TypeVar("_T")
+
+class DetectionPipeline(Generic[_T]):
+    """
+    Bounded queue of items (e.g. messages) to be handled by a fixed number of worker tasks,
+    decoupling the handling from where items are received (e.g. gateway event dispatching).
+
+    Items submitted when the queue is full are shed instead of waited for.
+    Items are also limited per partition key (e.g. guild ID),
+    so a flood from one partition is shed before it could crowd out the others.
+    """
+    DEFAULT_WORKER_COUNT: int = 4
+    DEFAULT_MAX_QUEUE_SIZE: int = 1000
+    DEFAULT_MAX_PARTITION_QUEUE_SIZE: int = 100
+
+    def __init__(
+        self,
+        handler: Callable[[_T], Awaitable[None]],
+        *,
+        partition_key: Callable[[_T], Hashable],
+        worker_count: int = DEFAULT_WORKER_COUNT,
+        max_queue_size: int = DEFAULT_MAX_QUEUE_SIZE,
+        max_partition_queue_size: int = DEFAULT_MAX_PARTITION_QUEUE_SIZE,
+    ):
+        self.__handler = handler
+        self.__partition_key = partition_key
+        self.__worker_count = worker_count
+        self.__max_partition_queue_size = max_partition_queue_size
+        self.__queue: asyncio.Queue[_T] = asyncio.Queue(maxsize=max_queue_size)
+        self.__partition_queue_sizes: collections.Counter[Hashable] = collections.Counter()
+        self.__workers: list[asyncio.Task] = []
+        self.__accepting = False
+        self.__shed_count: int = 0
+
+    def __str__(self):
+        return f"{self.__class__.__name__}<workers: {self.__worker_count}, max queue size: {self.__queue.maxsize}, max partition queue size: {self.__max_partition_queue_size}>"
+
+    @property
+    def queue_size(self) -> int:
+        return self.__queue.qsize()
+
+    @property
+    def max_queue_size(self) -> int:
+        return self.__queue.maxsize
+
+    @property
+    def shed_count(self) -> int:
+        """
+        Number of items shed since started.
+        """
+        return self.__shed_count
+
+    def start(self) -> None:
+        """
+        Start the workers. Should be called within a running event loop.
+        """
+        if self.__workers:
+            return
+        self.__workers = [
+            asyncio.create_task(
+                self.__work(),
+                name=f"{self.__class__.__name__}-worker-{worker_index}",
+            )
+            for worker_index in range(self.__worker_count)
+        ]
+        self.__accepting = True
+        LOGGER.info(f"Started {self.__worker_count} detection workers.")
+
+    def submit(self, item: _T) -> bool:
+        """
+        Queue the item to be handled. Never blocks.
+
+        Returns:
+            Whether the item is queued, i.e. not shed.
+        """
+        if not self.__accepting:
+            LOGGER.warning(f"Detection pipeline is not accepting items. Shedding {item!r}.")
+            self.__shed_count += 1
+            return False
+        partition_key = self.__partition_key(item)
+        if self.__partition_queue_sizes[partition_key] >= self.__max_partition_queue_size:
+            self.__shed(f"Too many items queued for partition {partition_key!r}.")
+            return False
+        try:
+            self.__queue.put_nowait(item)
+        except asyncio.QueueFull:
+            self.__shed("Queue is full.")
+            return False
+        self.__partition_queue_sizes[partition_key] += 1
+        return True
+
+    async def aclose(self, timeout: Optional[float] = None) -> None:
+        """
+        Stop accepting items, wait for queued items to be handled, then stop the workers.
+        """
+        self.__accepting = False
+        if not self.__workers:
+            return
+        if not self.__queue.empty():
+            LOGGER.info(f"Waiting for {self.__queue.qsize()} queued items to be handled...")
+        try:
+            await asyncio.wait_for(self.__queue.join(), timeout=timeout)
+        except TimeoutError:
+            LOGGER.warning(f"Gave up handling {self.__queue.qsize()} queued items.")
+        for worker in self.__workers:
+            worker.cancel()
+        await asyncio.gather(*self.__workers, return_exceptions=True)
+        self.__workers = []
+        LOGGER.info("Stopped detection workers.")
+
+    def __shed(self, reason: str) -> None:
+        self.__shed_count += 1
+        # logged sparsely, since shedding happens in floods
+        if self.__shed_count & (self.__shed_count - 1) == 0:
+            LOGGER.warning(f"Shedding items: {reason} ({self.__shed_count} items shed in total.)")
+
+    async def __work(self) -> None:
+        while True:
+            item = await self.__queue.get()
+            try:
+                await self.__handler(item)
+            except Exception as exception:
+                LOGGER.exception(f"Failed to handle {item!r}.", exc_info=exception)
+            finally:
+                partition_key = self.__partition_key(item)
+                self.__partition_queue_sizes[partition_key] -= 1
+                if self.__partition_queue_sizes[partition_key] <= 0:
+                    del self.__partition_queue_sizes[partition_key]
+                self.__queue.task_done()
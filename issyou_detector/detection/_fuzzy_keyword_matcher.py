@@ -0,0 +1,336 @@
+# encoding=utf-8
+__all__ = (
+    "FuzzyKeywordMatcher",
+)
+import logging
+import re
+import unicodedata
+from typing import Iterable, Mapping, NamedTuple, Optional
+
+from ._keyword_matcher import *
+
+LOGGER = logging.getLogger(__name__)
+
+_SEPARATOR_CATEGORIES: frozenset[str] = frozenset((
+    "Zs", "Zl", "Zp", # separators, e.g. spaces
+    "Pc", "Pd", "Ps", "Pe", "Pi", "Pf", "Po", # punctuations
+    "Cc", "Cf", # controls and formats, e.g. line feeds, zero-width spaces
+))
+"""
+Unicode general categories of characters separating words.
+"""
+
+_LATIN_WORD_PATTERN: re.Pattern = re.compile(r"[0-9A-Za-z]+")
+
+class _SeparatorTable(dict[int, int]):
+    """
+    Translation table mapping separators to spaces,
+    filled with the characters as they are first seen instead of built for all code points,
+    so that building it never blocks (nor is it ever pickled to other processes).
+    """
+    def __missing__(self, code_point: int) -> int:
+        translated = 0x20 if unicodedata.category(chr(code_point)) in _SEPARATOR_CATEGORIES else code_point
+        self[code_point] = translated
+        return translated
+
+_SEPARATOR_TABLE: _SeparatorTable = _SeparatorTable()
+
+class _FuzzyKeyword(NamedTuple):
+    keyword: str
+    max_distance: int
+    char_masks: dict[str, int]
+    """
+    char -> bit mask of positions of the char in the keyword
+    """
+    whole_word: bool
+    """
+    Whether only whole words are matched, for keywords of Latin letters and digits.
+    """
+
+class FuzzyKeywordMatcher:
+    """
+    Multi-keyword approximate matcher, finding keyword occurrences within an edit distance
+    (insertions, deletions and substitutions), e.g. "issyou" for "isshou".
+
+    The text is compacted before matching: it is split into words by separators (spaces, punctuations, ...),
+    and runs of single-character words are joined, so that spaced out keywords (e.g. "一 生", "i s s h o u") are matched as well;
+    spans of matches refer to the compacted text, i.e. the words joined by single spaces.
+    Occurrences never span words, and keywords of Latin letters and digits only match whole words
+    (of Latin letters and digits), so that e.g. "isshou" never matches "This should" nor "I miss hours".
+
+    Each keyword is matched by Myers' bit-parallel algorithm, in one pass over the text with a few integer operations per character.
+    The pass is only taken for keywords passing a pre-filter:
+    a keyword occurrence within `d` edits contains at least one of `d + 1` pieces of the keyword exactly,
+    so the pieces of all keywords are searched first in one pass by a regular expression,
+    which skips most texts at the speed of the regular expression engine.
+
+    The matcher is immutable, and picklable to match in other processes.
+    """
+    DEFAULT_MAX_DISTANCE: int = 1
+    MIN_CHARS_PER_EDIT: int = 4
+    """
+    Keywords are allowed at most one edit per this number of characters by default,
+    so that short keywords (e.g. "一生") are not matched by any text sharing a character.
+    """
+
+    def __init__(
+        self,
+        keywords: Iterable[str],
+        *,
+        max_distance: int = DEFAULT_MAX_DISTANCE,
+        keyword_max_distances: Mapping[str, int] = {},
+    ):
+        """
+        Args:
+            keywords: Keywords to search. Separators in keywords are removed.
+            max_distance: Max edit distance allowed for keywords,
+                limited by `MIN_CHARS_PER_EDIT` unless given in `keyword_max_distances`.
+            keyword_max_distances: keyword -> max edit distance allowed, overriding `max_distance`;
+                limited below the length of the keyword.
+        """
+        compacted_keyword_max_distances = {
+            _remove_separators(keyword): max_distance
+            for keyword, max_distance in keyword_max_distances.items()
+        }
+        fuzzy_keywords: dict[str, _FuzzyKeyword] = {}
+        for keyword in keywords:
+            keyword = _remove_separators(keyword)
+            if not keyword or keyword in fuzzy_keywords:
+                continue
+            keyword_max_distance = compacted_keyword_max_distances.get(keyword)
+            if keyword_max_distance is None:
+                keyword_max_distance = min(max_distance, len(keyword) // self.MIN_CHARS_PER_EDIT)
+            fuzzy_keywords[keyword] = _FuzzyKeyword(
+                keyword=keyword,
+                max_distance=max(0, min(keyword_max_distance, len(keyword) - 1)),
+                char_masks=_build_char_masks(keyword),
+                whole_word=_LATIN_WORD_PATTERN.fullmatch(keyword) is not None,
+            )
+        self.__fuzzy_keywords: tuple[_FuzzyKeyword, ...] = tuple(fuzzy_keywords.values())
+
+        piece_keyword_indexes: dict[str, set[int]] = {}
+        for keyword_index, fuzzy_keyword in enumerate(self.__fuzzy_keywords):
+            for piece in _split_pieces(fuzzy_keyword.keyword, fuzzy_keyword.max_distance + 1):
+                piece_keyword_indexes.setdefault(piece, set()).add(keyword_index)
+        self.__piece_keyword_indexes: dict[str, tuple[int, ...]] = {
+            piece: tuple(sorted(keyword_indexes))
+            for piece, keyword_indexes in piece_keyword_indexes.items()
+        }
+        # longer pieces first, as alternatives are tried in order at each position
+        self.__piece_pattern = re.compile("|".join(
+            re.escape(piece)
+            for piece in sorted(self.__piece_keyword_indexes, key=len, reverse=True)
+        )) if self.__piece_keyword_indexes else None
+        LOGGER.debug(f"Compiled fuzzy keyword matcher: {self!r}, with {len(self.__piece_keyword_indexes)} pieces for pre-filter.")
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(keyword_max_distances={self.keyword_max_distances!r})"
+
+    @property
+    def keyword_max_distances(self) -> dict[str, int]:
+        """
+        The keywords (with separators removed) -> max edit distance allowed.
+        """
+        return {
+            fuzzy_keyword.keyword: fuzzy_keyword.max_distance
+            for fuzzy_keyword in self.__fuzzy_keywords
+        }
+
+    def find_first(self, text: str) -> Optional[KeywordMatch]:
+        """
+        Find the keyword occurrence within the allowed edit distance which ends first in the compacted text.
+        """
+        if self.__piece_pattern is None:
+            return None
+        text = _compact(text)
+        # pieces never contain spaces, so each piece found lies in one word;
+        # words are matched in order, each against the keywords with pieces found in it
+        word_start = word_end = 0
+        candidate_keyword_indexes: set[int] = set()
+        for piece_match in self.__piece_pattern.finditer(text):
+            if piece_match.start() >= word_end:
+                if candidate_keyword_indexes:
+                    keyword_match = self.__find_in_word(text, word_start, word_end, candidate_keyword_indexes)
+                    if keyword_match is not None:
+                        return keyword_match
+                    candidate_keyword_indexes.clear()
+                word_start = text.rfind(" ", 0, piece_match.start()) + 1
+                word_end = text.find(" ", piece_match.end())
+                if word_end < 0:
+                    word_end = len(text)
+            candidate_keyword_indexes.update(self.__piece_keyword_indexes[piece_match.group()])
+        if candidate_keyword_indexes:
+            return self.__find_in_word(text, word_start, word_end, candidate_keyword_indexes)
+        return None
+
+    def __find_in_word(
+        self,
+        text: str,
+        word_start: int,
+        word_end: int,
+        keyword_indexes: set[int],
+    ) -> Optional[KeywordMatch]:
+        word = text[word_start:word_end]
+        first_match: Optional[KeywordMatch] = None
+        for keyword_index in sorted(keyword_indexes):
+            fuzzy_keyword = self.__fuzzy_keywords[keyword_index]
+            span = _search_whole_word(fuzzy_keyword, word) if fuzzy_keyword.whole_word else _search(fuzzy_keyword, word)
+            if span is None or (first_match is not None and word_start + span[1] >= first_match.end):
+                continue
+            first_match = KeywordMatch(fuzzy_keyword.keyword, word_start + span[0], word_start + span[1])
+        return first_match
+
+def _search(
+    fuzzy_keyword: _FuzzyKeyword,
+    text: str,
+) -> Optional[tuple[int, int]]:
+    """
+    Search the span of the first substring of the text within the edit distance to the keyword.
+    """
+    end = _search_end(fuzzy_keyword.keyword, fuzzy_keyword.char_masks, fuzzy_keyword.max_distance, text)
+    if end is None:
+        return None
+    return _search_start(fuzzy_keyword.keyword, fuzzy_keyword.max_distance, text, end), end
+
+def _search_whole_word(
+    fuzzy_keyword: _FuzzyKeyword,
+    text: str,
+) -> Optional[tuple[int, int]]:
+    """
+    Search the span of the first word of Latin letters and digits in the text within the edit distance to the keyword.
+    """
+    keyword = fuzzy_keyword.keyword
+    max_distance = fuzzy_keyword.max_distance
+    for word_match in _LATIN_WORD_PATTERN.finditer(text):
+        word = word_match.group()
+        if (
+            abs(len(word) - len(keyword)) <= max_distance
+            and _edit_distance(keyword, fuzzy_keyword.char_masks, word) <= max_distance
+        ):
+            return word_match.span()
+    return None
+
+def _search_end(
+    keyword: str,
+    char_masks: dict[str, int],
+    max_distance: int,
+    text: str,
+) -> Optional[int]:
+    """
+    Search the end (exclusive) of the first substring of the text within the edit distance to the keyword,
+    by Myers' bit-vector algorithm:
+    the column of edit distances between the keyword and substrings ending at the current character
+    is kept as bit vectors of vertical deltas, updated per character by a few bitwise operations.
+    """
+    length = len(keyword)
+    mask = (1 << length) - 1
+    last_bit = 1 << (length - 1)
+    positive_vertical = mask
+    negative_vertical = 0
+    distance = length
+    for index, char in enumerate(text):
+        equal = char_masks.get(char, 0)
+        vertical_changes = equal | negative_vertical
+        horizontal_changes = (((equal & positive_vertical) + positive_vertical) ^ positive_vertical) | equal
+        positive_horizontal = negative_vertical | ~(horizontal_changes | positive_vertical)
+        negative_horizontal = positive_vertical & horizontal_changes
+        if positive_horizontal & last_bit:
+            distance += 1
+        elif negative_horizontal & last_bit:
+            distance -= 1
+        # substrings may start anywhere, i.e. the top row stays 0, so no carry is shifted in
+        positive_horizontal = (positive_horizontal << 1) & mask
+        negative_horizontal = (negative_horizontal << 1) & mask
+        positive_vertical = (negative_horizontal | ~(vertical_changes | positive_horizontal)) & mask
+        negative_vertical = positive_horizontal & vertical_changes
+        if distance <= max_distance:
+            return index + 1
+    return None
+
+def _edit_distance(
+    keyword: str,
+    char_masks: dict[str, int],
+    text: str,
+) -> int:
+    """
+    Compute the edit distance between the keyword and the whole text,
+    by the same bit-vector algorithm as `_search_end`, except that substrings must start at the start of the text.
+    """
+    length = len(keyword)
+    mask = (1 << length) - 1
+    last_bit = 1 << (length - 1)
+    positive_vertical = mask
+    negative_vertical = 0
+    distance = length
+    for char in text:
+        equal = char_masks.get(char, 0)
+        vertical_changes = equal | negative_vertical
+        horizontal_changes = (((equal & positive_vertical) + positive_vertical) ^ positive_vertical) | equal
+        positive_horizontal = negative_vertical | ~(horizontal_changes | positive_vertical)
+        negative_horizontal = positive_vertical & horizontal_changes
+        if positive_horizontal & last_bit:
+            distance += 1
+        elif negative_horizontal & last_bit:
+            distance -= 1
+        # the top row increases by 1 per character, so a carry is shifted in
+        positive_horizontal = ((positive_horizontal << 1) | 1) & mask
+        negative_horizontal = (negative_horizontal << 1) & mask
+        positive_vertical = (negative_horizontal | ~(vertical_changes | positive_horizontal)) & mask
+        negative_vertical = positive_horizontal & vertical_changes
+    return distance
+
+def _search_start(
+    keyword: str,
+    max_distance: int,
+    text: str,
+    end: int,
+) -> int:
+    """
+    Search the start of the occurrence ending at `end`, by searching the reversed keyword backward from there.
+    """
+    window_start = max(0, end - len(keyword) - max_distance)
+    reversed_keyword = keyword[::-1]
+    reversed_length = _search_end(
+        reversed_keyword,
+        _build_char_masks(reversed_keyword),
+        max_distance,
+        text[window_start:end][::-1],
+    )
+    return window_start if reversed_length is None else end - reversed_length
+
+def _build_char_masks(keyword: str) -> dict[str, int]:
+    char_masks: dict[str, int] = {}
+    for index, char in enumerate(keyword):
+        char_masks[char] = char_masks.get(char, 0) | (1 << index)
+    return char_masks
+
+def _split_pieces(keyword: str, piece_count: int) -> tuple[str, ...]:
+    """
+    Split the keyword into the number of contiguous pieces, of lengths as equal as possible.
+    """
+    return tuple(
+        keyword[index * len(keyword) // piece_count : (index + 1) * len(keyword) // piece_count]
+        for index in range(piece_count)
+    )
+
+def _remove_separators(text: str) -> str:
+    return "".join(text.translate(_SEPARATOR_TABLE).split())
+
+def _compact(text: str) -> str:
+    """
+    Split the text into words by separators, join runs of single-character words,
+    then join the words by single spaces.
+    """
+    words: list[str] = []
+    single_chars: list[str] = []
+    for word in text.translate(_SEPARATOR_TABLE).split():
+        if len(word) == 1:
+            single_chars.append(word)
+            continue
+        if single_chars:
+            words.append("".join(single_chars))
+            single_chars.clear()
+        words.append(word)
+    if single_chars:
+        words.append("".join(single_chars))
+    return " ".join(words)
@@ -0,0 +1,175 @@
+# encoding=utf-8
+__all__ = (
+    "KeywordMatch",
+    "KeywordMatcher",
+)
+import collections
+import logging
+from typing import Iterable, Iterator, NamedTuple, Optional
+
+LOGGER = logging.getLogger(__name__)
+
+class KeywordMatch(NamedTuple):
+    """
+    A keyword occurrence found in a text.
+    """
+    keyword: str
+    start: int
+    """
+    Index of the first character of the occurrence.
+    """
+    end: int
+    """
+    Index after the last character of the occurrence, i.e. `text[start:end]` is the occurrence.
+    """
+
+class KeywordMatcher:
+    """
+    Multi-keyword matcher based on Aho-Corasick automaton.
+
+    The automaton is compiled once on construction,
+    after which any number of keywords are searched in a single linear pass over the text,
+    without copying the text.
+    The matcher is immutable; build a new one when the keyword set changes.
+    """
+    _ROOT_STATE: int = 0
+
+    def __init__(
+        self,
+        keywords: Iterable[str],
+        *,
+        ignore_case: bool = False,
+    ):
+        """
+        Args:
+            keywords: Keywords to search. Empty keywords and duplicates are ignored.
+            ignore_case: Whether to match keywords case-insensitively.
+                Case folding is compiled into the automaton transitions,
+                so the searched text is never lowered or copied.
+        """
+        self.__ignore_case = ignore_case
+        self.__keywords: tuple[str, ...] = tuple(dict.fromkeys(
+            keyword.lower() if ignore_case else keyword
+            for keyword in keywords
+            if keyword
+        ))
+        self.__transitions: list[dict[str, int]] = []
+        self.__fallbacks: list[int] = []
+        self.__outputs: list[tuple[int, ...]] = []
+        self.__compile()
+        LOGGER.debug(f"Compiled keyword matcher with {len(self.__keywords)} keywords into {len(self.__transitions)} states.")
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(keywords={self.__keywords!r}, ignore_case={self.__ignore_case!r})"
+
+    @property
+    def keywords(self) -> tuple[str, ...]:
+        """
+        The keywords this matcher searches for, in the order given.
+        """
+        return self.__keywords
+
+    @property
+    def ignore_case(self) -> bool:
+        return self.__ignore_case
+
+    def contains(self, text: str) -> bool:
+        """
+        Check whether the text contains any of the keywords.
+
+        Stops at the first occurrence found.
+        """
+        return self.find_first(text) is not None
+
+    def find_first(self, text: str) -> Optional[KeywordMatch]:
+        """
+        Find the keyword occurrence which ends first in the text.
+        """
+        return next(self.iter_matches(text), None)
+
+    def find_all(self, text: str) -> list[KeywordMatch]:
+        """
+        Find all (possibly overlapping) keyword occurrences in the text,
+        ordered by their end positions.
+        """
+        return list(self.iter_matches(text))
+
+    def iter_matches(self, text: str) -> Iterator[KeywordMatch]:
+        """
+        Iterate all (possibly overlapping) keyword occurrences in the text,
+        ordered by their end positions.
+        """
+        if not self.__keywords:
+            return
+        transitions = self.__transitions
+        fallbacks = self.__fallbacks
+        outputs = self.__outputs
+        keywords = self.__keywords
+        root = self._ROOT_STATE
+
+        state = root
+        for index, char in enumerate(text):
+            next_state = transitions[state].get(char)
+            while next_state is None and state != root:
+                state = fallbacks[state]
+                next_state = transitions[state].get(char)
+            state = root if next_state is None else next_state
+            for keyword_index in outputs[state]:
+                keyword = keywords[keyword_index]
+                yield KeywordMatch(keyword, index + 1 - len(keyword), index + 1)
+
+    def __compile(self) -> None:
+        root = self._ROOT_STATE
+        transitions = self.__transitions
+        outputs: list[list[int]] = []
+
+        def new_state() -> int:
+            transitions.append({})
+            outputs.append([])
+            return len(transitions) - 1
+
+        new_state()
+
+        # build trie
+        for keyword_index, keyword in enumerate(self.__keywords):
+            state = root
+            for char in keyword:
+                next_state = transitions[state].get(char)
+                if next_state is None:
+                    next_state = new_state()
+                    for variant in self.__char_variants(char):
+                        transitions[state][variant] = next_state
+                state = next_state
+            outputs[state].append(keyword_index)
+
+        # build fallback (failure) links breadth-first,
+        # so fallback of a state is always resolved before its children
+        fallbacks = [root] * len(transitions)
+        queue = collections.deque(set(transitions[root].values()))
+        while queue:
+            state = queue.popleft()
+            visited_children: set[int] = set()
+            for char, child in transitions[state].items():
+                if child in visited_children:
+                    # case variants share the same child
+                    continue
+                visited_children.add(child)
+                fallback = fallbacks[state]
+                while fallback != root and char not in transitions[fallback]:
+                    fallback = fallbacks[fallback]
+                fallback_child = transitions[fallback].get(char, root)
+                fallbacks[child] = fallback_child if fallback_child != child else root
+                outputs[child].extend(outputs[fallbacks[child]])
+                queue.append(child)
+
+        self.__fallbacks = fallbacks
+        self.__outputs = [tuple(state_outputs) for state_outputs in outputs]
+
+    def __char_variants(self, char: str) -> tuple[str, ...]:
+        if not self.__ignore_case:
+            return (char,)
+        return tuple(dict.fromkeys(
+            variant
+            for variant in (char, char.upper(), char.title())
+            if len(variant) == 1
+        ))
@@ -0,0 +1,273 @@
+# encoding=utf-8
+__all__ = (
+    "ScanHit",
+    "MessageScanner",
+)
+import asyncio
+import concurrent.futures
+import concurrent.futures.process
+import dataclasses
+import logging
+import multiprocessing
+from typing import Iterable, Iterator, Mapping, NamedTuple, Optional
+
+import discord
+
+from ..util.lru_cache import *
+from ._fuzzy_keyword_matcher import *
+from ._keyword_matcher import *
+from ._text_normalizer import *
+
+LOGGER = logging.getLogger(__name__)
+
+class ScanHit(NamedTuple):
+    """
+    A keyword occurrence found in a message.
+    """
+    field: str
+    """
+    Name of the message field containing the keyword, e.g. `content` or `embeds[0].description`.
+    """
+    match: KeywordMatch
+    """
+    The keyword occurrence; its span refers to the normalized text of the field,
+    compacted by `FuzzyKeywordMatcher` if `fuzzy`.
+    """
+    fuzzy: bool = False
+    """
+    Whether the occurrence is found by the fuzzy tier.
+    """
+
+@dataclasses.dataclass(slots=True)
+class _MessageMemo:
+    field_hashes: dict[str, int]
+    """
+    field name -> hash of the field text last scanned
+    """
+    hit: bool
+
+class MessageScanner:
+    """
+    Scans messages for keywords incrementally.
+
+    Messages are memorized by ID, so that scanning the same message again (e.g. after an edit)
+    only scans the fields that have changed, and a message is reported as hit at most once.
+    Scan results are also memorized by text, so that identical texts (e.g. copypasta floods)
+    are normalized and matched only once.
+    Both memos are bounded LRU caches.
+
+    Texts without keywords found exactly can go through an optional fuzzy tier (`FuzzyKeywordMatcher`),
+    which matches keywords within edit distances and across separators in spaced out words,
+    after a pre-filter which skips most texts cheaply.
+    Long texts can be fuzzily matched in a pool of processes, so that they never block the event loop;
+    the matcher is installed in each process once on starting, and the pool is replaced when keywords change.
+    """
+    DEFAULT_MESSAGE_MEMO_SIZE: int = 4096
+    DEFAULT_TEXT_MEMO_SIZE: int = 1024
+    DEFAULT_FUZZY_PROCESS_MIN_LENGTH: int = 1000
+
+    def __init__(
+        self,
+        keywords: Iterable[str],
+        *,
+        text_normalizer: Optional[TextNormalizer] = None,
+        message_memo_size: int = DEFAULT_MESSAGE_MEMO_SIZE,
+        text_memo_size: int = DEFAULT_TEXT_MEMO_SIZE,
+        fuzzy_max_distance: Optional[int] = None,
+        fuzzy_keyword_max_distances: Mapping[str, int] = {},
+        fuzzy_process_count: int = 0,
+        fuzzy_process_min_length: int = DEFAULT_FUZZY_PROCESS_MIN_LENGTH,
+    ):
+        """
+        Args:
+            fuzzy_max_distance: Max edit distance allowed for keywords by the fuzzy tier;
+                the fuzzy tier is disabled if not given.
+            fuzzy_keyword_max_distances: keyword -> max edit distance allowed, overriding `fuzzy_max_distance`.
+            fuzzy_process_count: Number of processes to fuzzily match texts of at least `fuzzy_process_min_length` characters;
+                texts are matched in place if 0.
+        """
+        self.__fuzzy_max_distance = fuzzy_max_distance
+        self.__fuzzy_keyword_max_distances = dict(fuzzy_keyword_max_distances)
+        self.__fuzzy_process_count = fuzzy_process_count
+        self.__fuzzy_process_min_length = fuzzy_process_min_length
+        self.__fuzzy_executor: Optional[concurrent.futures.ProcessPoolExecutor] = None
+        self.__text_normalizer = text_normalizer if text_normalizer is not None else TextNormalizer()
+        self.__message_memo: LruCache[int, _MessageMemo] = LruCache(message_memo_size)
+        self.__text_memo: LruCache[str, Optional[tuple[KeywordMatch, bool]]] = LruCache(text_memo_size)
+        """
+        text -> first keyword occurrence in the text and whether it is fuzzy, if any;
+        keyed by the text itself rather than its hash, so that texts of colliding hashes never share results
+        """
+        self.__keyword_matcher: KeywordMatcher
+        self.__fuzzy_keyword_matcher: Optional[FuzzyKeywordMatcher] = None
+        self.set_keywords(keywords)
+
+    @property
+    def keywords(self) -> tuple[str, ...]:
+        """
+        The normalized keywords.
+        """
+        return self.__keyword_matcher.keywords
+
+    @property
+    def fuzzy_keyword_max_distances(self) -> Optional[dict[str, int]]:
+        """
+        The keywords matched by the fuzzy tier -> max edit distance allowed, or `None` if the fuzzy tier is disabled.
+        """
+        if self.__fuzzy_keyword_matcher is None:
+            return None
+        return self.__fuzzy_keyword_matcher.keyword_max_distances
+
+    def set_keywords(self, keywords: Iterable[str]) -> None:
+        """
+        Replace the keywords to detect.
+
+        The keyword matcher is recompiled here once,
+        so that scanning messages never pays for building it.
+        Keywords are normalized the same way as message texts,
+        so variants of a keyword (e.g. katakana/hiragana, full-width/half-width) need not be listed.
+        Memorized scan results are discarded, since they may not hold for the new keywords.
+        """
+        normalized_keywords = self.__text_normalizer.normalize_all(keywords)
+        self.__keyword_matcher = KeywordMatcher(normalized_keywords)
+        if self.__fuzzy_max_distance is not None:
+            self.__fuzzy_keyword_matcher = FuzzyKeywordMatcher(
+                normalized_keywords,
+                max_distance=self.__fuzzy_max_distance,
+                keyword_max_distances={
+                    self.__text_normalizer.normalize(keyword): max_distance
+                    for keyword, max_distance in self.__fuzzy_keyword_max_distances.items()
+                },
+            )
+            if self.__fuzzy_process_count > 0:
+                self.__replace_fuzzy_executor(self.__fuzzy_keyword_matcher)
+        self.__message_memo.clear()
+        self.__text_memo.clear()
+
+    def close(self) -> None:
+        """
+        Shut down the processes to fuzzily match texts, if any.
+        """
+        if self.__fuzzy_executor is not None:
+            self.__fuzzy_executor.shutdown(wait=False, cancel_futures=True)
+            self.__fuzzy_executor = None
+
+    def __replace_fuzzy_executor(self, fuzzy_keyword_matcher: FuzzyKeywordMatcher) -> None:
+        previous_executor = self.__fuzzy_executor
+        # spawned rather than forked, as this process runs threads (e.g. datastore I/O)
+        self.__fuzzy_executor = concurrent.futures.ProcessPoolExecutor(
+            max_workers=self.__fuzzy_process_count,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_install_fuzzy_keyword_matcher,
+            initargs=(fuzzy_keyword_matcher,),
+        )
+        if previous_executor is not None:
+            # texts submitted already are still matched, with the previous keywords
+            previous_executor.shutdown(wait=False)
+
+    async def scan(self, message: discord.Message) -> Optional[ScanHit]:
+        """
+        Scan the message for keywords.
+
+        Returns:
+            The first keyword occurrence found in the fields changed since the message was last scanned;
+            `None` if there is no such occurrence, or the message has already been hit before.
+        """
+        message_memo = self.__message_memo.get(message.id)
+        if message_memo is None:
+            message_memo = _MessageMemo(
+                field_hashes={},
+                hit=False,
+            )
+            self.__message_memo.put(message.id, message_memo)
+        elif message_memo.hit:
+            LOGGER.debug("Message %d has already been hit. Skipping.", message.id)
+            return None
+
+        field_hashes = message_memo.field_hashes
+        for field, text in _iter_message_texts(message):
+            text_hash = hash(text)
+            if field_hashes.get(field) == text_hash:
+                continue
+            found = await self.__find_keyword(text)
+            # only after scanned, so that the field is scanned again (e.g. on edits) if scanning failed
+            field_hashes[field] = text_hash
+            if found is not None:
+                if message_memo.hit:
+                    # hit by another scan of the message (e.g. after an edit) meanwhile
+                    return None
+                message_memo.hit = True
+                keyword_match, fuzzy = found
+                return ScanHit(field, keyword_match, fuzzy)
+        return None
+
+    async def __find_keyword(self, text: str) -> Optional[tuple[KeywordMatch, bool]]:
+        if text in self.__text_memo:
+            return self.__text_memo.get(text)
+        found: Optional[tuple[KeywordMatch, bool]] = None
+        normalized_text = self.__text_normalizer.normalize(text)
+        keyword_match = self.__keyword_matcher.find_first(normalized_text)
+        if keyword_match is not None:
+            found = keyword_match, False
+        elif self.__fuzzy_keyword_matcher is not None:
+            keyword_match = await self.__find_fuzzy_keyword(normalized_text)
+            if keyword_match is not None:
+                found = keyword_match, True
+        self.__text_memo.put(text, found)
+        return found
+
+    async def __find_fuzzy_keyword(self, normalized_text: str) -> Optional[KeywordMatch]:
+        fuzzy_executor = self.__fuzzy_executor
+        if fuzzy_executor is None or len(normalized_text) < self.__fuzzy_process_min_length:
+            return self.__fuzzy_keyword_matcher.find_first(normalized_text)
+        # matched in place if the pool fails, e.g. broken by a process dying, or shut down by `close`
+        try:
+            future = fuzzy_executor.submit(_find_fuzzy_keyword, normalized_text)
+            return await asyncio.wrap_future(future)
+        except concurrent.futures.process.BrokenProcessPool as error:
+            LOGGER.error("Processes to fuzzily match texts are broken. Replacing them.", exc_info=error)
+            if self.__fuzzy_executor is fuzzy_executor:
+                self.__replace_fuzzy_executor(self.__fuzzy_keyword_matcher)
+        except RuntimeError as error:
+            # submitted after shut down
+            LOGGER.warning(f"Failed to submit text to fuzzily match: {error}")
+        except asyncio.CancelledError:
+            if asyncio.current_task().cancelling() > 0:
+                # cancelled the caller, rather than the future by the pool
+                raise
+            LOGGER.warning("Fuzzily matching text in processes is cancelled.")
+        return self.__fuzzy_keyword_matcher.find_first(normalized_text)
+
+_process_fuzzy_keyword_matcher: Optional[FuzzyKeywordMatcher] = None
+"""
+The matcher installed in a process of the pool to fuzzily match texts.
+"""
+
+def _install_fuzzy_keyword_matcher(fuzzy_keyword_matcher: FuzzyKeywordMatcher) -> None:
+    global _process_fuzzy_keyword_matcher
+    _process_fuzzy_keyword_matcher = fuzzy_keyword_matcher
+
+def _find_fuzzy_keyword(normalized_text: str) -> Optional[KeywordMatch]:
+    return _process_fuzzy_keyword_matcher.find_first(normalized_text)
+
+def _iter_message_texts(message: discord.Message) -> Iterator[tuple[str, str]]:
+    """
+    Iterate non-empty texts in the message, with their field names.
+    """
+    if message.content:
+        yield "content", message.content
+    for embed_index, embed in enumerate(message.embeds):
+        field_prefix = f"embeds[{embed_index}]"
+        for field, text in (
+            ("title", embed.title),
+            ("description", embed.description),
+            ("author.name", embed.author.name),
+            ("footer.text", embed.footer.text),
+        ):
+            if text:
+                yield f"{field_prefix}.{field}", text
+        for embed_field_index, embed_field in enumerate(embed.fields):
+            if embed_field.name:
+                yield f"{field_prefix}.fields[{embed_field_index}].name", embed_field.name
+            if embed_field.value:
+                yield f"{field_prefix}.fields[{embed_field_index}].value", embed_field.value
@@ -0,0 +1,126 @@
+# encoding=utf-8
+__all__ = (
+    "TextNormalizer",
+)
+import functools
+import logging
+import unicodedata
+from typing import Iterable, Mapping, Optional
+
+LOGGER = logging.getLogger(__name__)
+
+_TRANSLATION_TABLE = dict[int, Optional[str]]
+
+_KATAKANA_TO_HIRAGANA_OFFSET: int = ord("ア") - ord("あ")
+
+_COMBINING_VOICED_SOUND_MARKS: str = "\u3099\u309A"
+
+_IGNORABLE_CODE_POINTS: tuple[int, ...] = (
+    0x00AD, # soft hyphen
+    0x034F, # combining grapheme joiner
+    0x061C, # arabic letter mark
+    0x115F, # hangul choseong filler
+    0x1160, # hangul jungseong filler
+    0x17B4, # khmer vowel inherent aq
+    0x17B5, # khmer vowel inherent aa
+    0x180E, # mongolian vowel separator
+    *range(0x200B, 0x2010), # zero width space, (non-)joiner, LRM, RLM
+    *range(0x202A, 0x202F), # bidirectional embeddings & overrides
+    *range(0x2060, 0x2070), # word joiner, invisible operators, bidirectional isolates, ...
+    0x3164, # hangul filler
+    *range(0xFE00, 0xFE10), # variation selectors
+    0xFEFF, # zero width no-break space (BOM)
+    0xFFA0, # halfwidth hangul filler
+    *range(0xE0000, 0xE0080), # tags
+    *range(0xE0100, 0xE01F0), # variation selectors supplement
+)
+
+_NORMALIZED_RANGES: tuple[range, ...] = (
+    range(0x0000, 0xD800), # BMP before surrogates
+    range(0xE000, 0x10000), # BMP after surrogates
+    range(0x1D400, 0x1D800), # mathematical alphanumeric symbols
+    range(0x1F100, 0x1F200), # enclosed alphanumeric supplement
+    range(0x2F800, 0x2FA20), # CJK compatibility ideographs supplement
+)
+"""
+Code points whose per-character normalization is precomputed.
+Code points out of these ranges are left as-is.
+"""
+
+class TextNormalizer:
+    """
+    Folds text into a canonical form for keyword detection.
+
+    Folding includes:
+    - NFKC compatibility folding (full-width/half-width forms, compatibility ideographs, ...),
+    - case folding,
+    - katakana to hiragana folding,
+    - variant character folding (e.g. "壹" to "一"),
+    - removing ignorable characters (zero-width characters, variation selectors, ...).
+
+    All folding rules are precomputed per character into a single translation table,
+    so normalizing a text is done by one pass of `str.translate`.
+    Compositions across characters are not handled, except for kana with (semi-)voiced sound marks.
+    """
+    DEFAULT_VARIANT_CHARACTERS: Mapping[str, str] = {
+        "壹": "一",
+        "弌": "一",
+    }
+    """
+    Single characters to be considered as the same character as the mapped text,
+    in addition to other foldings.
+    """
+
+    def __init__(
+        self,
+        *,
+        variant_characters: Mapping[str, str] = DEFAULT_VARIANT_CHARACTERS,
+    ):
+        translation_table = dict(_build_base_translation_table())
+        for variant, canonical in variant_characters.items():
+            translation_table[ord(variant)] = canonical.translate(translation_table)
+        self.__translation_table = translation_table
+        LOGGER.debug(f"Built text normalizer with {len(self.__translation_table)} translation entries.")
+
+    def normalize(self, text: str) -> str:
+        """
+        Fold the text into the canonical form.
+        """
+        normalized_text = text.translate(self.__translation_table)
+        if any(mark in normalized_text for mark in _COMBINING_VOICED_SOUND_MARKS):
+            # half-width (semi-)voiced sound marks are translated as combining characters,
+            # which should be composed with the preceding kana (e.g. "ｶﾞ" -> "が")
+            normalized_text = unicodedata.normalize("NFC", normalized_text)
+        return normalized_text
+
+    def normalize_all(self, texts: Iterable[str]) -> tuple[str, ...]:
+        return tuple(
+            self.normalize(text)
+            for text in texts
+        )
+
+@functools.cache
+def _build_base_translation_table() -> _TRANSLATION_TABLE:
+    """
+    Build the translation table shared by all normalizers.
+    Built once on first use since it takes a while (~0.1 second).
+    """
+    translation_table: _TRANSLATION_TABLE = {}
+    for normalized_range in _NORMALIZED_RANGES:
+        for code_point in normalized_range:
+            char = chr(code_point)
+            folded = _fold_kana(unicodedata.normalize("NFKC", char).casefold())
+            if folded != char:
+                translation_table[code_point] = folded
+    for code_point in _IGNORABLE_CODE_POINTS:
+        translation_table[code_point] = None
+    return translation_table
+
+def _fold_kana(text: str) -> str:
+    return "".join(
+        chr(ord(char) - _KATAKANA_TO_HIRAGANA_OFFSET) if _is_foldable_katakana(char) else char
+        for char in text
+    )
+
+def _is_foldable_katakana(char: str) -> bool:
+    return "ァ" <= char <= "ヶ" or "ヽ" <= char <= "ヾ"
@@ -3,82 +3,553 @@ __all__ = (
     "IssyouDetector",
 )
 
+import asyncio
+import hashlib
+import json
 import logging
 import os
-from typing import Optional
+import pathlib
+import time
+from typing import Iterable, Mapping, Optional, Sequence
 
 import discord
 import discord.ext.commands
 
-from issyou_detector.cog import ChannelRegisterCog, VersionCog
-from issyou_detector.datastore import ChannelRegisterRepo
+from issyou_detector.backfill import BackfillCheckpointStore, HistoryBackfiller
+from issyou_detector.datastore import ChannelRegisterRepo, DetectionStatsRepo
+from issyou_detector.datastore.impl import InMemoryDetectionStatsRepo, InstrumentedChannelRegisterRepo
+from issyou_detector.detection import DetectionPipeline, MessageScanner, ScanHit
+from issyou_detector.metrics import DiscordRateLimitCounter, EventLoopLagMonitor, MetricsExporter, MetricsRegistry
+from issyou_detector.reporting import MessageReport, ReportChannelResolver, ReportDigester, ReportScheduler
+from issyou_detector.statistics import DetectionStatistics
+from issyou_detector.util.memory import CACHED_OBJECT_COUNTERS, count_cached_objects, get_resident_memory_bytes
 
 LOGGER = logging.getLogger(__name__)
 
-_MYGO_COLOR: int = 0x3388BB
-
-class IssyouDetector(discord.ext.commands.Bot):
+class IssyouDetector(discord.ext.commands.AutoShardedBot):
     """
     A Discord bot that detects messages containing "一生" or similar keywords,
     forward it to configured channel(s) so everyone can get notified.
     :D
+
+    Shards are run within this process:
+    the number of shards recommended by Discord by default, or the given shards out of `shard_count`,
+    e.g. a range of shards when each process of a multi-process deployment runs a part of them.
+    """
+    DEFAULT_KEYWORDS: tuple[str, ...] = (
+        "一輩子",
+        "一生",
+        "いっしょう",
+    )
+    """
+    Keywords to detect when not configured otherwise.
     """
+
     def __init__(
         self,
         *,
         channel_register_repo: ChannelRegisterRepo,
+        keywords: Iterable[str] = DEFAULT_KEYWORDS,
+        digest_guild_ids: Iterable[int] = (),
+        digest_window: float = ReportDigester.DEFAULT_WINDOW,
+        detection_worker_count: int = DetectionPipeline.DEFAULT_WORKER_COUNT,
+        detection_queue_size: int = DetectionPipeline.DEFAULT_MAX_QUEUE_SIZE,
+        metrics_registry: Optional[MetricsRegistry] = None,
+        metrics_port: Optional[int] = None,
+        metrics_host: str = MetricsExporter.DEFAULT_HOST,
+        shard_count: Optional[int] = None,
+        shard_ids: Optional[Sequence[int]] = None,
+        sync_commands: bool = True,
+        command_sync_state_path: Optional[pathlib.Path] = None,
+        low_memory: bool = False,
+        backfill_checkpoint_path: Optional[pathlib.Path] = None,
+        backfill_concurrency: int = HistoryBackfiller.DEFAULT_CONCURRENCY,
+        detection_stats_repo: Optional[DetectionStatsRepo] = None,
+        statistics_flush_interval: float = DetectionStatistics.DEFAULT_FLUSH_INTERVAL,
+        fuzzy_max_distance: Optional[int] = None,
+        fuzzy_keyword_max_distances: Mapping[str, int] = {},
+        fuzzy_process_count: int = 0,
+        fuzzy_process_min_length: int = MessageScanner.DEFAULT_FUZZY_PROCESS_MIN_LENGTH,
     ):
-        intents = discord.Intents.default()
+        """
+        Args:
+            detection_worker_count: Number of workers detecting received messages.
+            detection_queue_size: Max number of received messages waiting for detection;
+                messages received beyond this are dropped.
+            digest_guild_ids: Guilds opted in digest mode,
+                where detected messages are reported as one digest per `digest_window` seconds
+                instead of one report per message.
+            metrics_port: Port to export metrics over HTTP in Prometheus text format;
+                metrics are not exported if not given, but still shown by the stats command.
+            shard_count: Total number of shards, across all processes; recommended by Discord if not given.
+            shard_ids: Shards to run in this process, out of `shard_count`; all shards if not given.
+            sync_commands: Whether to sync application commands on setup,
+                which only one process of a multi-process deployment should do.
+            command_sync_state_path: File to persist the hash of commands last synced,
+                so that commands are synced only when changed (or the file is deleted);
+                commands are synced on every setup if not given.
+            low_memory: Whether to subscribe and cache only what detecting and reporting need,
+                i.e. guilds (with their channels) and guild messages,
+                without caching members, users or messages.
+                Channels not cached are fetched when needed.
+            backfill_checkpoint_path: File to persist checkpoints of backfilling history,
+                so that backfilling interrupted is resumed on next start;
+                checkpoints are kept in memory only if not given.
+            backfill_concurrency: Max number of channels backfilled concurrently, across all guilds.
+            detection_stats_repo: Repository of detection statistics for leaderboards; kept in memory if not given.
+            statistics_flush_interval: Interval (in seconds) of adding detection statistics counted in memory to the repository.
+            fuzzy_max_distance: Max edit distance allowed for keywords by the fuzzy tier of detection;
+                the fuzzy tier is disabled if not given.
+            fuzzy_keyword_max_distances: keyword -> max edit distance allowed, overriding `fuzzy_max_distance`.
+            fuzzy_process_count: Number of processes to fuzzily match texts of at least `fuzzy_process_min_length` characters;
+                texts are matched within the event loop if 0.
+        """
+        cache_options: dict = {}
+        if low_memory:
+            intents = discord.Intents.none()
+            intents.guilds = True
+            intents.guild_messages = True
+            cache_options = dict(
+                member_cache_flags=discord.MemberCacheFlags.none(),
+                max_messages=None,
+                chunk_guilds_at_startup=False,
+            )
+        else:
+            intents = discord.Intents.default()
         intents.message_content = True
         super().__init__(
             command_prefix="/",
             intents=intents,
+            **cache_options,
+            # long rate limits are raised (as discord.RateLimited) instead of waited within the request,
+            # so that the report scheduler can pause the whole route;
+            # this applies to every request of the client (e.g. interaction responses, backfilling history),
+            # which fail on such rate limits instead (e.g. the command errors, the channel is backfilled on resuming)
+            max_ratelimit_timeout=30.0,
+            shard_count=shard_count,
+            shard_ids=None if shard_ids is None else list(shard_ids),
         )
+        self.__sync_commands = sync_commands
+        self.__command_sync_state_path = command_sync_state_path
+        self.__created_at = time.monotonic()
+        self.__ready_count: int = 0
+        self.__shard_disconnected_at: dict[int, float] = {}
+        self.__startup_task: Optional[asyncio.Task] = None
+        LOGGER.info(f"Using {"low-memory" if low_memory else "default"} profile, with intents {intents!r}.")
+
+        self._metrics_registry = metrics_registry if metrics_registry is not None else MetricsRegistry()
+        self.__init_metrics()
+        self._event_loop_lag_monitor = EventLoopLagMonitor(self._metrics_registry)
+        # counted from discord.py's logs, since it retries most rate limited requests internally
+        self._discord_rate_limit_counter = DiscordRateLimitCounter(self._metrics_registry)
+        self._discord_rate_limit_counter.install()
+        self._metrics_exporter: Optional[MetricsExporter] = None
+        if metrics_port is not None:
+            self._metrics_exporter = MetricsExporter(
+                self._metrics_registry,
+                port=metrics_port,
+                host=metrics_host,
+            )
+            LOGGER.info(f"Using metrics exporter: {self._metrics_exporter}.")
 
-        self._channel_register_repo = channel_register_repo
+        self._channel_register_repo: ChannelRegisterRepo = InstrumentedChannelRegisterRepo(
+            channel_register_repo,
+            metrics_registry=self._metrics_registry,
+        )
 
         LOGGER.info(f"Using ChannelRegisterRepo implementation: {channel_register_repo}.")
+        self._report_channel_resolver = ReportChannelResolver(
+            self,
+            self._channel_register_repo,
+            metrics_registry=self._metrics_registry,
+        )
+
+        if fuzzy_max_distance is not None and fuzzy_process_count > 0:
+            LOGGER.info(f"Using {fuzzy_process_count} processes to fuzzily match texts of at least {fuzzy_process_min_length} characters.")
+        self._message_scanner = MessageScanner(
+            keywords,
+            fuzzy_max_distance=fuzzy_max_distance,
+            fuzzy_keyword_max_distances=fuzzy_keyword_max_distances,
+            fuzzy_process_count=fuzzy_process_count,
+            fuzzy_process_min_length=fuzzy_process_min_length,
+        )
+        self.__log_keywords()
+        self._detection_stats_repo: DetectionStatsRepo = detection_stats_repo if detection_stats_repo is not None else InMemoryDetectionStatsRepo()
+        self._detection_statistics = DetectionStatistics(
+            self._detection_stats_repo,
+            flush_interval=statistics_flush_interval,
+            metrics_registry=self._metrics_registry,
+        )
+        LOGGER.info(f"Using detection statistics: {self._detection_statistics}.")
+        self._history_backfiller = HistoryBackfiller(
+            self._detect_message,
+            BackfillCheckpointStore(backfill_checkpoint_path),
+            concurrency=backfill_concurrency,
+            metrics_registry=self._metrics_registry,
+        )
+        LOGGER.info(f"Using history backfiller: {self._history_backfiller}.")
+        self._detection_pipeline: DetectionPipeline[discord.Message] = DetectionPipeline(
+            self._detect_message,
+            partition_key=lambda message: message.guild.id,
+            worker_count=detection_worker_count,
+            max_queue_size=detection_queue_size,
+        )
+        LOGGER.info(f"Using detection pipeline: {self._detection_pipeline}.")
+        self._metrics_registry.gauge(
+            "issyou_detector_queued_messages",
+            "Number of received messages waiting for detection.",
+        ).set_function(lambda: self._detection_pipeline.queue_size)
+
+        self._report_scheduler = ReportScheduler(
+            metrics_registry=self._metrics_registry,
+        )
+        LOGGER.info(f"Using report scheduler: {self._report_scheduler}.")
+        self._report_digester = ReportDigester(
+            self._report_scheduler,
+            window=digest_window,
+        )
+        self._digest_guild_ids: frozenset[int] = frozenset(digest_guild_ids)
+        if self._digest_guild_ids:
+            LOGGER.info(f"Using report digester: {self._report_digester}, for guilds {sorted(self._digest_guild_ids)!r}.")
 
         self.__dev_guild: Optional[discord.abc.Snowflake] = None
         self.__dev_guild_initialized: bool = False
 
-    async def on_ready(self):
-        LOGGER.info(f"Successfully logged in as {self.user}.")
-        LOGGER.debug(f"Bot user details: {self.user!r}.")
+    def __init_metrics(self) -> None:
+        self.__on_message_latency = self._metrics_registry.histogram(
+            "issyou_detector_on_message_seconds",
+            "Latency of handling message events, until submitted for detection.",
+        )
+        self.__detection_latency = self._metrics_registry.histogram(
+            "issyou_detector_detection_seconds",
+            "Latency of detecting a message, including reporting it if detected.",
+        )
+        self.__scanned_message_counter = self._metrics_registry.counter(
+            "issyou_detector_messages_scanned_total",
+            "Number of messages scanned for keywords.",
+        )
+        self.__matched_message_counter = self._metrics_registry.counter(
+            "issyou_detector_messages_matched_total",
+            "Number of messages found containing keywords.",
+        )
+        self.__fuzzy_matched_message_counter = self._metrics_registry.counter(
+            "issyou_detector_messages_fuzzy_matched_total",
+            "Number of messages found containing keywords by the fuzzy tier only.",
+        )
+        self.__shed_message_counter = self._metrics_registry.counter(
+            "issyou_detector_messages_shed_total",
+            "Number of messages not detected since the detection queue is full.",
+        )
+        cached_object_gauge = self._metrics_registry.gauge(
+            "issyou_detector_cached_objects",
+            "Number of objects held in caches of the Discord client.",
+            ("cache",),
+        )
+        for cache_name, count_objects in CACHED_OBJECT_COUNTERS.items():
+            cached_object_gauge.labels(cache_name).set_function(lambda count_objects=count_objects: count_objects(self))
+        self._metrics_registry.gauge(
+            "process_resident_memory_bytes",
+            "Resident memory size in bytes.",
+        ).set_function(lambda: get_resident_memory_bytes() or 0)
+        self.__startup_duration_gauge = self._metrics_registry.gauge(
+            "issyou_detector_startup_seconds",
+            "Time from creating the bot until all shards are ready for the first time.",
+        )
+        self.__reconnect_latency = self._metrics_registry.histogram(
+            "issyou_detector_gateway_reconnect_seconds",
+            "Time from a shard disconnecting until it resumed or identified again.",
+            ("reconnect",),
+            buckets=(0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0),
+        )
+
+    async def setup_hook(self):
+        # run once after login, unlike on_ready which is also called after reconnecting (without resuming)
+        setup_started_at = time.monotonic()
+        self._detection_pipeline.start()
+        self._event_loop_lag_monitor.start()
+        self._detection_statistics.start()
+        if self._metrics_exporter is not None:
+            try:
+                await self._metrics_exporter.start()
+            except OSError as error:
+                LOGGER.error(f"Failed to start metrics exporter {self._metrics_exporter}; metrics are not exported.", exc_info=error)
+                self._metrics_exporter = None
+
+        await self.__load_cogs()
+        if self.__sync_commands:
+            await self.__sync_commands_if_changed()
+        else:
+            LOGGER.info("Skipping syncing commands, which is left to another process.")
+        LOGGER.info(f"Setup finished in {time.monotonic() - setup_started_at:.3f} seconds.")
 
+    async def __load_cogs(self) -> None:
         LOGGER.info("Loading Cogs...")
+        # imported only when needed, as the commands are not needed before logged in
+        from issyou_detector.cog import BackfillCog, ChannelRegisterCog, LeaderboardCog, StatsCog, VersionCog
         for cog in (
             VersionCog(),
             ChannelRegisterCog(
                 channel_register_repo=self._channel_register_repo,
+                report_channel_resolver=self._report_channel_resolver,
+            ),
+            StatsCog(
+                metrics_registry=self._metrics_registry,
+            ),
+            BackfillCog(
+                history_backfiller=self._history_backfiller,
+            ),
+            LeaderboardCog(
+                detection_statistics=self._detection_statistics,
             ),
         ):
             await self.add_cog(cog)
         LOGGER.info("Cogs loaded.")
 
+    async def __sync_commands_if_changed(self) -> None:
+        """
+        Sync application commands, unless they are the same as last synced,
+        since syncing is heavily rate limited by Discord.
+        """
         if self._dev_guild is not None:
             # https://stackoverflow.com/questions/75136546/slash-commands-not-syncing-to-specific-guilds-in-discord-py
             self.tree.copy_global_to(guild=self._dev_guild)
-        synced_commands = await self.tree.sync(guild=self._dev_guild)
-        LOGGER.info(f"{len(synced_commands)} commands synced {"globally" if self._dev_guild is None else f"in dev guild {self._dev_guild.id}"}.")
+        sync_scope = "globally" if self._dev_guild is None else f"in dev guild {self._dev_guild.id}"
+        commands_hash = self.__hash_commands()
+        if commands_hash == self.__load_synced_commands_hash():
+            LOGGER.info(f"Commands are not changed since last synced {sync_scope}. Skipping syncing commands.")
+            return
+
+        try:
+            synced_commands = await self.tree.sync(guild=self._dev_guild)
+        except discord.HTTPException as error:
+            LOGGER.error(f"Failed to sync commands {sync_scope}.", exc_info=error)
+            return
+        LOGGER.info(f"{len(synced_commands)} commands synced {sync_scope}.")
         LOGGER.debug(f"Synced commands: {synced_commands}.")
+        self.__save_synced_commands_hash(commands_hash)
+
+    def __hash_commands(self) -> str:
+        command_definitions = {
+            "guild_id": None if self._dev_guild is None else self._dev_guild.id,
+            "commands": [
+                command.to_dict(self.tree)
+                for command in self.tree.get_commands(guild=self._dev_guild)
+            ],
+        }
+        return hashlib.sha256(json.dumps(command_definitions, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def __load_synced_commands_hash(self) -> Optional[str]:
+        if self.__command_sync_state_path is None:
+            return None
+        try:
+            return self.__command_sync_state_path.read_text(encoding="utf-8").strip()
+        except FileNotFoundError:
+            return None
+        except OSError as error:
+            LOGGER.warning(f"Failed to read hash of commands last synced from {self.__command_sync_state_path}.", exc_info=error)
+            return None
+
+    def __save_synced_commands_hash(self, commands_hash: str) -> None:
+        if self.__command_sync_state_path is None:
+            return
+        try:
+            self.__command_sync_state_path.parent.mkdir(parents=True, exist_ok=True)
+            # not written atomically: a corrupted file merely causes syncing once more
+            self.__command_sync_state_path.write_text(commands_hash, encoding="utf-8")
+        except OSError as error:
+            LOGGER.warning(f"Failed to save hash of commands synced to {self.__command_sync_state_path}.", exc_info=error)
+
+    async def on_ready(self):
+        self.__ready_count += 1
+        LOGGER.info(f"Successfully logged in as {self.user}, running shards {sorted(self.shards)!r} out of {self.shard_count}.")
+        LOGGER.debug(f"Bot user details: {self.user!r}.")
+        if self.__ready_count == 1:
+            startup_duration = time.monotonic() - self.__created_at
+            self.__startup_duration_gauge.set(startup_duration)
+            LOGGER.info(f"Ready in {startup_duration:.3f} seconds since the bot was created.")
+            # in the background, as detection resolves report channels on demand meanwhile
+            self.__startup_task = asyncio.create_task(self.__run_startup_tasks())
+        else:
+            LOGGER.info(f"Ready again, after identifying again ({self.__ready_count} times ready in total).")
+        self.__log_memory_report()
+
+    async def __run_startup_tasks(self) -> None:
+        await self.__warm_up_report_channels()
+        await self.__resume_backfilling()
+
+    async def __warm_up_report_channels(self) -> None:
+        started_at = time.monotonic()
+        try:
+            await self._report_channel_resolver.warm_up(
+                self.guilds,
+                is_own_guild=self.__is_own_guild,
+            )
+        except Exception as error:
+            LOGGER.error("Failed to warm up report channels; they are resolved when needed instead.", exc_info=error)
+        else:
+            LOGGER.info(f"Warmed up report channels in {time.monotonic() - started_at:.3f} seconds.")
+
+    async def __resume_backfilling(self) -> None:
+        try:
+            await self._history_backfiller.resume_all({guild.id: guild for guild in self.guilds if not guild.unavailable})
+        except Exception as error:
+            LOGGER.error("Failed to resume backfilling history.", exc_info=error)
+
+    def __is_own_guild(self, guild_id: int) -> bool:
+        """
+        Check whether the guild is served by shards of this process, if the bot is in it.
+        """
+        # https://discord.com/developers/docs/topics/gateway#sharding-sharding-formula
+        return (guild_id >> 22) % (self.shard_count or 1) in self.shards
+
+    async def on_shard_disconnect(self, shard_id: int):
+        self.__shard_disconnected_at.setdefault(shard_id, time.monotonic())
+        LOGGER.info(f"Shard {shard_id} disconnected.")
+
+    async def on_shard_resumed(self, shard_id: int):
+        self.__observe_reconnected(shard_id, "resumed")
+
+    async def on_shard_ready(self, shard_id: int):
+        self.__observe_reconnected(shard_id, "identified")
+
+    def __observe_reconnected(self, shard_id: int, reconnect: str) -> None:
+        disconnected_at = self.__shard_disconnected_at.pop(shard_id, None)
+        if disconnected_at is None:
+            # connected for the first time
+            LOGGER.info(f"Shard {shard_id} ready.")
+            return
+        reconnect_duration = time.monotonic() - disconnected_at
+        self.__reconnect_latency.labels(reconnect).observe(reconnect_duration)
+        LOGGER.info(f"Shard {shard_id} reconnected ({reconnect}) in {reconnect_duration:.3f} seconds.")
+
+    async def close(self):
+        if self.__startup_task is not None:
+            self.__startup_task.cancel()
+            # waited for, so that it is not left using the pipeline and repos closed below
+            await asyncio.gather(self.__startup_task, return_exceptions=True)
+        await self._history_backfiller.aclose()
+        await self._detection_pipeline.aclose(timeout=10.0)
+        self._report_digester.flush_all()
+        await self._report_scheduler.aclose(timeout=10.0)
+        self._message_scanner.close()
+        try:
+            await self._detection_statistics.aclose()
+        except Exception as error:
+            LOGGER.error("Failed to flush detection statistics on closing; pending counts are lost.", exc_info=error)
+        await self._event_loop_lag_monitor.aclose()
+        self._discord_rate_limit_counter.uninstall()
+        if self._metrics_exporter is not None:
+            await self._metrics_exporter.aclose()
+        await super().close()
+        # after the connection is closed, so that no event handler uses the repos anymore
+        self._channel_register_repo.close()
+        self._detection_stats_repo.close()
+
+    async def on_guild_channel_delete(self, channel: discord.abc.GuildChannel):
+        await self._report_channel_resolver.on_channel_deleted(channel)
+
+    async def on_guild_channel_update(self, before: discord.abc.GuildChannel, after: discord.abc.GuildChannel):
+        # e.g. permission overwrites changed
+        self._report_channel_resolver.invalidate(after.guild.id)
+
+    async def on_raw_thread_delete(self, payload: discord.RawThreadDeleteEvent):
+        # threads can be report channels, but on_guild_channel_delete is not dispatched for them;
+        # the raw event is dispatched even if the thread is not cached
+        await self._report_channel_resolver.on_thread_deleted(payload.guild_id, payload.thread_id)
+
+    async def on_thread_update(self, before: discord.Thread, after: discord.Thread):
+        if (before.archived, before.locked) != (after.archived, after.locked):
+            self._report_channel_resolver.invalidate(after.guild.id)
+
+    async def on_guild_role_update(self, before: discord.Role, after: discord.Role):
+        self._report_channel_resolver.invalidate(after.guild.id)
+
+    async def on_guild_role_delete(self, role: discord.Role):
+        self._report_channel_resolver.invalidate(role.guild.id)
+
+    async def on_member_update(self, before: discord.Member, after: discord.Member):
+        # only dispatched with the (privileged) members intent, which is not requested;
+        # otherwise, cached report channels are resolved again once expired
+        if after.id == self.user.id:
+            # e.g. roles of the bot changed
+            self._report_channel_resolver.invalidate(after.guild.id)
+
+    async def on_guild_remove(self, guild: discord.Guild):
+        self._report_channel_resolver.invalidate(guild.id)
 
     async def on_message(self, message: discord.Message):
+        with self.__on_message_latency.time():
+            if message.author == self.user:
+                return
+
+            if message.guild is None:
+                LOGGER.warning(f"Ignoring message outside guild (probably private message?).")
+                return
+
+            self._history_backfiller.observe_live_message(message)
+            self.__submit_for_detection(message)
+
+    async def on_raw_message_edit(self, payload: discord.RawMessageUpdateEvent):
+        # edits include embeds (e.g. link previews) resolved after the message is sent,
+        # which is why the raw event is used: the message may not be in the message cache
+        message = payload.message
         if message.author == self.user:
             return
 
         if message.guild is None:
-            LOGGER.warning(f"Ignoring message outside guild (probably private message?).")
             return
 
-        if not self._contains_issyou(message):
-            LOGGER.debug(f"The message is considered not containing target content.")
+        LOGGER.debug("Message %d edited. Scanning changed fields.", message.id)
+        self.__submit_for_detection(message)
+
+    def __submit_for_detection(self, message: discord.Message) -> None:
+        """
+        Queue the message to be detected by detection workers,
+        so that the gateway event handler returns without waiting for detection or reporting.
+        """
+        if not message.content and not message.embeds:
+            # e.g. attachments or stickers only
+            return
+        if not self._detection_pipeline.submit(message):
+            self.__shed_message_counter.inc()
+
+    async def _detect_message(self, message: discord.Message) -> None:
+        with self.__detection_latency.time():
+            await self.__detect_message(message)
+
+    async def __detect_message(self, message: discord.Message) -> None:
+        if not await self._contains_issyou(message):
+            LOGGER.debug("The message is considered not containing target content.")
             return
 
-        LOGGER.info(f"Target content detected in guild {str(message.guild)!r}, channel {str(message.channel)!r}, by user {str(message.author)!r}.")
-        LOGGER.debug(f"Detected message details: {message!r}.")
+        # formatted lazily (as the other logs on the per-message path), so that records filtered out cost nothing
+        LOGGER.info("Target content detected in guild '%s', channel '%s', by user '%s'.", message.guild, message.channel, message.author)
+        LOGGER.debug("Detected message details: %r.", message)
+        self._detection_statistics.record(message.guild.id, message.author.id, message.created_at)
         await self._handle_target_message(message)
 
+    def set_keywords(self, keywords: Iterable[str]) -> None:
+        """
+        Replace the keywords to detect.
+        """
+        self._message_scanner.set_keywords(keywords)
+        self.__log_keywords()
+
+    def __log_memory_report(self) -> None:
+        resident_memory_bytes = get_resident_memory_bytes()
+        LOGGER.info(
+            f"Memory report: RSS {"unknown" if resident_memory_bytes is None else f"{resident_memory_bytes / 2**20:.1f} MiB"}, "
+            f"cached objects {count_cached_objects(self)!r}."
+        )
+
+    def __log_keywords(self) -> None:
+        if not self._message_scanner.keywords:
+            LOGGER.warning("No keyword is configured; no message will be detected.")
+        LOGGER.info(f"Using keywords: {self._message_scanner.keywords!r}.")
+        fuzzy_keyword_max_distances = self._message_scanner.fuzzy_keyword_max_distances
+        if fuzzy_keyword_max_distances is not None:
+            LOGGER.info(f"Using fuzzy matching with max edit distances: {fuzzy_keyword_max_distances!r}.")
+
     @property
     def _dev_guild(self) -> Optional[discord.abc.Snowflake]:
         """
@@ -99,70 +570,44 @@ class IssyouDetector(discord.ext.commands.Bot):
                 LOGGER.warning(f"Failed to parse dev guild ID from environment variable {ENVIRONMENT_VARIABLE_NAME!r} with value {config_value!r}.", exc_info=exception)
                 self.__dev_guild = None
             else:
+                # guilds are not cached yet on setup; syncing fails if the bot is not in the guild
                 self.__dev_guild = discord.Object(id=guild_id)
-                dev_guild = self.get_guild(guild_id)
-                if dev_guild is None:
-                    LOGGER.warning(f"Dev guild {guild_id!r} not found. Considering as not set.")
-                    self.__dev_guild = None
-                else:
-                    self.__dev_guild = dev_guild
         LOGGER.debug(f"Using dev guild: {self.__dev_guild!r}.")
         self.__dev_guild_initialized = True
         return self.__dev_guild
 
-    def _contains_issyou(self, message: discord.Message) -> bool:
-        keywords = (
-            "一輩子",
-            "一生",
-            "いっしょう",
-        )
-        if any(keyword in message.content.lower() for keyword in keywords):
-            LOGGER.debug(f"Keyword found in `message.content` ({message.content!r}).")
-            return True
+    async def _contains_issyou(self, message: discord.Message) -> bool:
+        """
+        Check whether the message contains keywords, in its content or embeds.
 
-        # TODO: embed content?
+        Only the fields changed since the message was last checked are scanned,
+        and a message is considered containing keywords at most once.
+        """
+        scan_hit: Optional[ScanHit] = await self._message_scanner.scan(message)
+        self.__scanned_message_counter.inc()
+        if scan_hit is not None:
+            self.__matched_message_counter.inc()
+            if scan_hit.fuzzy:
+                self.__fuzzy_matched_message_counter.inc()
+            LOGGER.debug("Keyword %r found%s at %d:%d in normalized `message.%s`.", scan_hit.match.keyword, " fuzzily" if scan_hit.fuzzy else "", scan_hit.match.start, scan_hit.match.end, scan_hit.field)
+            return True
 
         return False
 
     async def _handle_target_message(self, message: discord.Message) -> None:
         report_channel = await self._get_report_channel(message)
         if report_channel is None:
-            LOGGER.debug(f"No report channel available for guild {message.guild!r}. Aborting.")
+            LOGGER.debug("No report channel available for guild %r. Aborting.", message.guild)
             return
-        LOGGER.debug(f"Forwarding message {message.id} to channel {report_channel!r}.")
-
-        # TODO: additional reactions, like embed?
-        # embed = self._build_notification_embed(message)
-        await message.forward(report_channel)
-        await report_channel.send(
-            "いっしょう...！",
-            # embed=embed,
-        )
+        if message.guild.id in self._digest_guild_ids:
+            LOGGER.debug("Adding message %d to digest of channel %r.", message.id, report_channel)
+            self._report_digester.add(report_channel, message)
+            return
+        LOGGER.debug("Queueing report of message %d to channel %r.", message.id, report_channel)
+        self._report_scheduler.submit(report_channel, MessageReport(message))
 
     async def _get_report_channel(
         self,
         message: discord.Message,
     ) -> Optional["discord.abc.MessageableChannel"]:
-        guild: discord.Guild = message.guild
-        report_channel_id = await self._channel_register_repo.get_report_channel(guild.id)
-        if report_channel_id is None:
-            LOGGER.info(f"No report channel configured in guild {message.guild}.")
-            return None
-        report_channel = guild.get_channel_or_thread(report_channel_id)
-        if report_channel is None:
-            LOGGER.warning(f"Report channel {report_channel_id!r} in guild {message.guild} is not found (may have been deleted?).")
-            return None
-        return report_channel
-
-    def _build_notification_embed(
-        self,
-        message: discord.Message,
-    ) -> discord.Embed:
-        embed = discord.Embed(
-            color=_MYGO_COLOR,
-        )
-        embed.set_author(
-            name=message.author.display_name,
-            icon_url=message.author.display_avatar.url,
-        )
-        return embed
+        return await self._report_channel_resolver.resolve(message.guild)
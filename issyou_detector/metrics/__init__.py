@@ -0,0 +1,6 @@
+# encoding=utf-8
+from ._metrics import *
+from ._metrics_registry import *
+from ._metrics_exporter import *
+from ._event_loop_lag_monitor import *
+from ._discord_rate_limit_counter import *
@@ -0,0 +1,39 @@
+# encoding=utf-8
+__all__ = (
+    "DiscordRateLimitCounter",
+)
+import logging
+
+from ._metrics import *
+from ._metrics_registry import *
+
+class DiscordRateLimitCounter(logging.Filter):
+    """
+    Counts Discord API responses of HTTP 429 (rate limited), as a filter of the logger of discord.py's HTTP client,
+    which logs a warning on each of them, including those it retries internally without raising.
+
+    Records are never filtered out. Responses are only counted while the logger is enabled for warnings.
+    """
+    LOGGER_NAME: str = "discord.http"
+    _RATE_LIMITED_MESSAGE_PREFIX: str = "We are being rate limited."
+
+    def __init__(
+        self,
+        metrics_registry: MetricsRegistry,
+    ):
+        super().__init__()
+        self.__rate_limited_counter = metrics_registry.counter(
+            "issyou_detector_discord_rate_limited_total",
+            "Number of Discord API responses of HTTP 429 (rate limited), including those retried by discord.py.",
+        )
+
+    def install(self) -> None:
+        logging.getLogger(self.LOGGER_NAME).addFilter(self)
+
+    def uninstall(self) -> None:
+        logging.getLogger(self.LOGGER_NAME).removeFilter(self)
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno == logging.WARNING and isinstance(record.msg, str) and record.msg.startswith(self._RATE_LIMITED_MESSAGE_PREFIX):
+            self.__rate_limited_counter.inc()
+        return True
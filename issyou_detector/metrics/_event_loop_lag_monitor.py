@@ -0,0 +1,73 @@
+# encoding=utf-8
+__all__ = (
+    "EventLoopLagMonitor",
+)
+import asyncio
+import logging
+import time
+from typing import Optional
+
+from ._metrics import *
+from ._metrics_registry import *
+
+LOGGER = logging.getLogger(__name__)
+
+_LAG_BUCKETS: tuple[float, ...] = (
+    0.001, 0.005,
+    0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5,
+    1.0, 2.5, 5.0,
+)
+
+class EventLoopLagMonitor:
+    """
+    Measures how late the event loop wakes up a task sleeping for a fixed interval,
+    which is how long callbacks (e.g. gateway events) wait behind others blocking the loop.
+    """
+    DEFAULT_INTERVAL: float = 0.5
+    WARNING_LAG: float = 1.0
+    """
+    Lag (in seconds) worth a warning, since it may delay gateway heartbeats.
+    """
+
+    def __init__(
+        self,
+        metrics_registry: MetricsRegistry,
+        *,
+        interval: float = DEFAULT_INTERVAL,
+    ):
+        self.__interval = interval
+        self.__lag_histogram = metrics_registry.histogram(
+            "issyou_detector_event_loop_lag_seconds",
+            "Delay of the event loop waking up a task sleeping for a fixed interval.",
+            buckets=_LAG_BUCKETS,
+        )
+        self.__last_lag_gauge = metrics_registry.gauge(
+            "issyou_detector_event_loop_last_lag_seconds",
+            "Last measured delay of the event loop.",
+        )
+        self.__task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """
+        Start measuring. Should be called within a running event loop.
+        """
+        if self.__task is None:
+            self.__task = asyncio.create_task(self.__monitor(), name=self.__class__.__name__)
+
+    async def aclose(self) -> None:
+        if self.__task is None:
+            return
+        self.__task.cancel()
+        await asyncio.gather(self.__task, return_exceptions=True)
+        self.__task = None
+
+    async def __monitor(self) -> None:
+        while True:
+            started_at = time.perf_counter()
+            await asyncio.sleep(self.__interval)
+            lag = max(0.0, time.perf_counter() - started_at - self.__interval)
+            self.__lag_histogram.observe(lag)
+            self.__last_lag_gauge.set(lag)
+            if lag >= self.WARNING_LAG:
+                LOGGER.warning(f"Event loop lagged for {lag:.3f} seconds.")
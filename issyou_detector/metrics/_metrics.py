@@ -0,0 +1,400 @@
+# encoding=utf-8
+__all__ = (
+    "DEFAULT_LATENCY_BUCKETS",
+    "MetricSnapshot",
+    "Metric",
+    "Counter",
+    "Gauge",
+    "Histogram",
+)
+import abc
+import bisect
+import math
+import time
+from typing import Any, Callable, Generic, Iterator, NamedTuple, Optional, Sequence, TypeVar, override
+
+DEFAULT_LATENCY_BUCKETS: tuple[float, ...] = (
+    0.0001, 0.00025, 0.0005,
+    0.001, 0.0025, 0.005,
+    0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5,
+    1.0, 2.5, 5.0,
+    10.0,
+)
+"""
+Default upper bounds (in seconds) of histogram buckets, from sub-millisecond in-memory work to slow API requests.
+"""
+
+_C = TypeVar("_C")
+
+class MetricSnapshot(NamedTuple):
+    """
+    Picklable copy of the values of a metric, e.g. to be sent to another process.
+    """
+    type: str
+    name: str
+    documentation: str
+    label_names: tuple[str, ...]
+    children: dict[tuple[str, ...], Any]
+    """
+    label values -> state of the child
+    """
+    buckets: tuple[float, ...] = ()
+    """
+    Upper bounds of buckets, for histograms.
+    """
+
+class Metric(abc.ABC, Generic[_C]):
+    """
+    A named metric, with one child per combination of label values.
+
+    Metrics are updated without locking, thus should be updated from the event loop thread only.
+    """
+    TYPE: str
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        label_names: Sequence[str] = (),
+    ):
+        self.__name = name
+        self.__documentation = documentation
+        self.__label_names = tuple(label_names)
+        self.__children: dict[tuple[str, ...], _C] = {}
+        if not self.__label_names:
+            # exported even before updated, as Prometheus expects
+            self.labels()
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(name={self.__name!r}, label_names={self.__label_names!r})"
+
+    @property
+    def name(self) -> str:
+        return self.__name
+
+    @property
+    def documentation(self) -> str:
+        return self.__documentation
+
+    @property
+    def label_names(self) -> tuple[str, ...]:
+        return self.__label_names
+
+    def labels(self, *label_values: object) -> _C:
+        """
+        Get the child of the label values (in the order of `label_names`), creating it on first use.
+        """
+        key = tuple(str(label_value) for label_value in label_values)
+        child = self.__children.get(key)
+        if child is None:
+            if len(key) != len(self.__label_names):
+                raise ValueError(f"Metric {self.__name!r} expects label values of {self.__label_names!r}, got {label_values!r}.")
+            child = self.__children[key] = self._create_child()
+        return child
+
+    def children(self) -> Iterator[tuple[dict[str, str], _C]]:
+        """
+        Iterate over (labels, child) of every child created.
+        """
+        for key, child in self.__children.items():
+            yield dict(zip(self.__label_names, key)), child
+
+    def snapshot(self) -> MetricSnapshot:
+        return MetricSnapshot(
+            type=self.TYPE,
+            name=self.__name,
+            documentation=self.__documentation,
+            label_names=self.__label_names,
+            children={
+                key: self._dump_child(child)
+                for key, child in self.__children.items()
+            },
+        )
+
+    @abc.abstractmethod
+    def _create_child(self) -> _C:
+        pass
+
+    @abc.abstractmethod
+    def _dump_child(self, child: _C) -> Any:
+        """
+        Copy the state of the child into picklable values.
+        """
+
+    @abc.abstractmethod
+    def _load_child(self, child: _C, state: Any) -> None:
+        """
+        Add the state dumped by `_dump_child` to the child.
+        """
+
+    def load_snapshot(self, snapshot: MetricSnapshot, *extra_label_values: str) -> None:
+        """
+        Add values of the snapshot to the children of the same label values,
+        followed by the extra label values for labels this metric has beyond the snapshot.
+        """
+        for key, state in snapshot.children.items():
+            self._load_child(self.labels(*key, *extra_label_values), state)
+
+    @abc.abstractmethod
+    def _iter_samples(self, child: _C) -> Iterator[tuple[str, dict[str, str], float]]:
+        """
+        Iterate over (name suffix, extra labels, value) of samples of the child.
+        """
+
+    def render_text(self) -> Iterator[str]:
+        """
+        Render as lines of Prometheus text exposition format.
+        """
+        yield f"# HELP {self.__name} {_escape_documentation(self.__documentation)}"
+        yield f"# TYPE {self.__name} {self.TYPE}"
+        for labels, child in self.children():
+            for name_suffix, extra_labels, value in self._iter_samples(child):
+                yield f"{self.__name}{name_suffix}{_format_labels(labels | extra_labels)} {_format_value(value)}"
+
+class _CounterChild:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value: float = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        if amount < 0:
+            raise ValueError(f"Counter can only increase, got {amount!r}.")
+        self.value += amount
+
+class Counter(Metric[_CounterChild]):
+    """
+    Monotonically increasing value, e.g. number of messages scanned.
+    """
+    TYPE = "counter"
+
+    def inc(self, amount: float = 1.0) -> None:
+        """
+        Increase the counter without labels.
+        """
+        self.labels().inc(amount)
+
+    @override
+    def _create_child(self) -> _CounterChild:
+        return _CounterChild()
+
+    @override
+    def _dump_child(self, child: _CounterChild) -> float:
+        return child.value
+
+    @override
+    def _load_child(self, child: _CounterChild, state: float) -> None:
+        child.inc(state)
+
+    @override
+    def _iter_samples(self, child: _CounterChild) -> Iterator[tuple[str, dict[str, str], float]]:
+        yield "", {}, child.value
+
+class _GaugeChild:
+    __slots__ = ("__value", "__function")
+
+    def __init__(self):
+        self.__value: float = 0.0
+        self.__function: Optional[Callable[[], float]] = None
+
+    @property
+    def value(self) -> float:
+        return self.__function() if self.__function is not None else self.__value
+
+    def set(self, value: float) -> None:
+        self.__value = value
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.__value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.__value -= amount
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        """
+        Evaluate the value by the function on collection, e.g. size of a queue.
+        """
+        self.__function = function
+
+class Gauge(Metric[_GaugeChild]):
+    """
+    Value which can go up and down, e.g. number of queued messages.
+    """
+    TYPE = "gauge"
+
+    def set(self, value: float) -> None:
+        """
+        Set the gauge without labels.
+        """
+        self.labels().set(value)
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        """
+        Evaluate the gauge without labels by the function on collection.
+        """
+        self.labels().set_function(function)
+
+    @override
+    def _create_child(self) -> _GaugeChild:
+        return _GaugeChild()
+
+    @override
+    def _dump_child(self, child: _GaugeChild) -> float:
+        return child.value
+
+    @override
+    def _load_child(self, child: _GaugeChild, state: float) -> None:
+        child.inc(state)
+
+    @override
+    def _iter_samples(self, child: _GaugeChild) -> Iterator[tuple[str, dict[str, str], float]]:
+        yield "", {}, child.value
+
+class _Timer:
+    __slots__ = ("__histogram_child", "__started_at")
+
+    def __init__(self, histogram_child: "_HistogramChild"):
+        self.__histogram_child = histogram_child
+        self.__started_at: float = 0.0
+
+    def __enter__(self) -> "_Timer":
+        self.__started_at = time.perf_counter()
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.__histogram_child.observe(time.perf_counter() - self.__started_at)
+
+class _HistogramChild:
+    __slots__ = ("upper_bounds", "bucket_counts", "sum", "count")
+
+    def __init__(self, upper_bounds: tuple[float, ...]):
+        self.upper_bounds = upper_bounds
+        self.bucket_counts: list[int] = [0] * (len(upper_bounds) + 1)
+        """
+        Non-cumulative count per bucket, the last of which is the +Inf bucket.
+        """
+        self.sum: float = 0.0
+        self.count: int = 0
+
+    def observe(self, value: float) -> None:
+        self.bucket_counts[bisect.bisect_left(self.upper_bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def time(self) -> _Timer:
+        """
+        Context manager observing the time (in seconds) spent within.
+        """
+        return _Timer(self)
+
+    def quantile(self, quantile: float) -> Optional[float]:
+        """
+        Estimate the quantile by linear interpolation within the bucket it falls in,
+        as `histogram_quantile` of Prometheus does.
+
+        Returns:
+            The estimation, or `None` if nothing is observed.
+        """
+        if self.count == 0:
+            return None
+        rank = quantile * self.count
+        cumulative_count = 0
+        for index, bucket_count in enumerate(self.bucket_counts):
+            if cumulative_count + bucket_count >= rank and bucket_count > 0:
+                if index == len(self.upper_bounds):
+                    # no upper bound to interpolate to
+                    return self.upper_bounds[-1] if self.upper_bounds else math.nan
+                lower_bound = self.upper_bounds[index - 1] if index > 0 else 0.0
+                upper_bound = self.upper_bounds[index]
+                return lower_bound + (upper_bound - lower_bound) * (rank - cumulative_count) / bucket_count
+            cumulative_count += bucket_count
+        return self.upper_bounds[-1] if self.upper_bounds else math.nan
+
+class Histogram(Metric[_HistogramChild]):
+    """
+    Distribution of observed values in buckets, e.g. latency of handling messages.
+    """
+    TYPE = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        label_names: Sequence[str] = (),
+        *,
+        buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS,
+    ):
+        # set before the child without labels is created
+        self.__upper_bounds = tuple(sorted(buckets))
+        super().__init__(name, documentation, label_names)
+
+    def observe(self, value: float) -> None:
+        """
+        Observe the value without labels.
+        """
+        self.labels().observe(value)
+
+    def time(self) -> _Timer:
+        """
+        Context manager observing the time spent within, without labels.
+        """
+        return self.labels().time()
+
+    @property
+    def buckets(self) -> tuple[float, ...]:
+        return self.__upper_bounds
+
+    @override
+    def snapshot(self) -> MetricSnapshot:
+        return super().snapshot()._replace(buckets=self.__upper_bounds)
+
+    @override
+    def _create_child(self) -> _HistogramChild:
+        return _HistogramChild(self.__upper_bounds)
+
+    @override
+    def _dump_child(self, child: _HistogramChild) -> tuple[tuple[int, ...], float, int]:
+        return tuple(child.bucket_counts), child.sum, child.count
+
+    @override
+    def _load_child(self, child: _HistogramChild, state: tuple[tuple[int, ...], float, int]) -> None:
+        bucket_counts, sum_, count = state
+        if len(bucket_counts) != len(child.bucket_counts):
+            raise ValueError(f"Histogram {self.name!r} has {len(child.bucket_counts)} buckets, got {len(bucket_counts)}.")
+        for index, bucket_count in enumerate(bucket_counts):
+            child.bucket_counts[index] += bucket_count
+        child.sum += sum_
+        child.count += count
+
+    @override
+    def _iter_samples(self, child: _HistogramChild) -> Iterator[tuple[str, dict[str, str], float]]:
+        cumulative_count = 0
+        for upper_bound, bucket_count in zip((*child.upper_bounds, math.inf), child.bucket_counts):
+            cumulative_count += bucket_count
+            yield "_bucket", {"le": _format_value(upper_bound)}, cumulative_count
+        yield "_sum", {}, child.sum
+        yield "_count", {}, child.count
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if math.isnan(value):
+        return "NaN"
+    if isinstance(value, int) or value.is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+def _format_labels(labels: dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(
+        f"{label_name}=\"{_escape_label_value(label_value)}\""
+        for label_name, label_value in labels.items()
+    ) + "}"
+
+def _escape_label_value(label_value: str) -> str:
+    return label_value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+def _escape_documentation(documentation: str) -> str:
+    return documentation.replace("\\", "\\\\").replace("\n", "\\n")
@@ -0,0 +1,93 @@
+# encoding=utf-8
+__all__ = (
+    "MetricsExporter",
+)
+import asyncio
+import logging
+from typing import Optional
+
+from ._metrics_registry import *
+
+LOGGER = logging.getLogger(__name__)
+
+_CONTENT_TYPE: str = "text/plain; version=0.0.4; charset=utf-8"
+
+class MetricsExporter:
+    """
+    Minimal HTTP server exposing metrics at `/metrics` in Prometheus text format, for scraping.
+
+    Served on the event loop, so rendering is cheap enough only for a local scraper at a modest interval;
+    it is bound to localhost by default, since metrics are not meant to be public.
+    """
+    DEFAULT_HOST: str = "127.0.0.1"
+    REQUEST_TIMEOUT: float = 5.0
+
+    def __init__(
+        self,
+        metrics_registry: MetricsRegistry,
+        *,
+        port: int,
+        host: str = DEFAULT_HOST,
+    ):
+        self.__metrics_registry = metrics_registry
+        self.__host = host
+        self.__port = port
+        self.__server: Optional[asyncio.Server] = None
+
+    def __str__(self):
+        return f"{self.__class__.__name__}<address: http://{self.__host}:{self.__port}/metrics>"
+
+    async def start(self) -> None:
+        if self.__server is not None:
+            return
+        self.__server = await asyncio.start_server(self.__handle_connection, self.__host, self.__port)
+        LOGGER.info(f"Exporting metrics at http://{self.__host}:{self.__port}/metrics.")
+
+    async def aclose(self) -> None:
+        if self.__server is None:
+            return
+        self.__server.close()
+        await self.__server.wait_closed()
+        self.__server = None
+        LOGGER.info("Stopped exporting metrics.")
+
+    async def __handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            request_line = await asyncio.wait_for(reader.readline(), timeout=self.REQUEST_TIMEOUT)
+            # headers are irrelevant, but read through before responding
+            while await asyncio.wait_for(reader.readline(), timeout=self.REQUEST_TIMEOUT) not in (b"\r\n", b"\n", b""):
+                pass
+            method, path, *_ = request_line.decode("latin-1").split(" ") + ["", ""]
+            if method not in ("GET", "HEAD"):
+                self.__write_response(writer, 405, "Method Not Allowed", b"")
+            elif path.split("?", 1)[0] != "/metrics":
+                self.__write_response(writer, 404, "Not Found", b"")
+            else:
+                body = self.__metrics_registry.render_text().encode("utf-8")
+                self.__write_response(writer, 200, "OK", b"" if method == "HEAD" else body, content_length=len(body))
+            await writer.drain()
+        except (TimeoutError, ConnectionError) as error:
+            LOGGER.debug(f"Metrics request aborted: {error!r}.")
+        except Exception as exception:
+            LOGGER.exception("Failed to serve metrics request.", exc_info=exception)
+        finally:
+            writer.close()
+
+    @staticmethod
+    def __write_response(
+        writer: asyncio.StreamWriter,
+        status_code: int,
+        reason: str,
+        body: bytes,
+        *,
+        content_length: Optional[int] = None,
+    ) -> None:
+        writer.write("\r\n".join((
+            f"HTTP/1.1 {status_code} {reason}",
+            f"Content-Type: {_CONTENT_TYPE}",
+            f"Content-Length: {len(body) if content_length is None else content_length}",
+            "Connection: close",
+            "",
+            "",
+        )).encode("latin-1"))
+        writer.write(body)
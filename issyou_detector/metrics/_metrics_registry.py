@@ -0,0 +1,131 @@
+# encoding=utf-8
+__all__ = (
+    "MetricsRegistry",
+    "MetricsAggregator",
+)
+import logging
+from typing import Optional, Sequence, TypeVar
+
+from ._metrics import *
+
+LOGGER = logging.getLogger(__name__)
+
+_M = TypeVar("_M", bound=Metric)
+
+class MetricsRegistry:
+    """
+    Collection of metrics by name, rendered together for exporting.
+
+    Getting a metric by a name already registered returns the registered one,
+    so that components can declare the metrics they use independently.
+    """
+    def __init__(
+        self,
+    ):
+        self.__metrics: dict[str, Metric] = {}
+
+    def counter(
+        self,
+        name: str,
+        documentation: str,
+        label_names: Sequence[str] = (),
+    ) -> Counter:
+        return self.__get_or_register(Counter, Counter(name, documentation, label_names))
+
+    def gauge(
+        self,
+        name: str,
+        documentation: str,
+        label_names: Sequence[str] = (),
+    ) -> Gauge:
+        return self.__get_or_register(Gauge, Gauge(name, documentation, label_names))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        label_names: Sequence[str] = (),
+        *,
+        buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS,
+    ) -> Histogram:
+        return self.__get_or_register(Histogram, Histogram(name, documentation, label_names, buckets=buckets))
+
+    def get(self, name: str) -> Optional[Metric]:
+        return self.__metrics.get(name)
+
+    def snapshot(self) -> list[MetricSnapshot]:
+        """
+        Copy the values of all metrics, e.g. to be aggregated by another process.
+        """
+        return [metric.snapshot() for metric in self.__metrics.values()]
+
+    def load_snapshot(self, snapshot: MetricSnapshot, extra_labels: Optional[dict[str, str]] = None) -> None:
+        """
+        Add values of the snapshot to the metric of the same name (registered if not yet),
+        with the extra labels added to every child.
+        """
+        extra_labels = extra_labels or {}
+        label_names = (*snapshot.label_names, *extra_labels)
+        metric: Metric
+        match snapshot.type:
+            case Counter.TYPE:
+                metric = self.counter(snapshot.name, snapshot.documentation, label_names)
+            case Gauge.TYPE:
+                metric = self.gauge(snapshot.name, snapshot.documentation, label_names)
+            case Histogram.TYPE:
+                metric = self.histogram(snapshot.name, snapshot.documentation, label_names, buckets=snapshot.buckets)
+            case _:
+                raise ValueError(f"Unknown metric type {snapshot.type!r} of metric {snapshot.name!r}.")
+        metric.load_snapshot(snapshot, *extra_labels.values())
+
+    def render_text(self) -> str:
+        """
+        Render all metrics in Prometheus text exposition format (version 0.0.4).
+        """
+        return "".join(
+            f"{line}\n"
+            for metric in self.__metrics.values()
+            for line in metric.render_text()
+        )
+
+    def __get_or_register(self, metric_type: type[_M], metric: _M) -> _M:
+        registered_metric = self.__metrics.get(metric.name)
+        if registered_metric is None:
+            self.__metrics[metric.name] = metric
+            return metric
+        if type(registered_metric) is not metric_type or registered_metric.label_names != metric.label_names:
+            raise ValueError(f"Metric {metric.name!r} is already registered as {registered_metric!r}.")
+        return registered_metric
+
+class MetricsAggregator(MetricsRegistry):
+    """
+    Registry which also renders the latest snapshots of other registries (e.g. in worker processes),
+    each child labeled by the source of the snapshot.
+    """
+    def __init__(
+        self,
+        *,
+        source_label_name: str = "worker",
+    ):
+        super().__init__()
+        self.__source_label_name = source_label_name
+        self.__snapshots: dict[str, list[MetricSnapshot]] = {}
+
+    def update(self, source: str, snapshots: list[MetricSnapshot]) -> None:
+        """
+        Replace the snapshots of the source.
+        """
+        self.__snapshots[source] = snapshots
+
+    def remove(self, source: str) -> None:
+        self.__snapshots.pop(source, None)
+
+    def render_text(self) -> str:
+        aggregated_registry = MetricsRegistry()
+        for source, snapshots in self.__snapshots.items():
+            for snapshot in snapshots:
+                try:
+                    aggregated_registry.load_snapshot(snapshot, {self.__source_label_name: source})
+                except ValueError as error:
+                    LOGGER.warning(f"Skipping metric {snapshot.name!r} from {source!r}, which conflicts with others: {error}")
+        return super().render_text() + aggregated_registry.render_text()
@@ -0,0 +1,5 @@
+# encoding=utf-8
+from ._report import *
+from ._report_scheduler import *
+from ._report_digester import *
+from ._report_channel_resolver import *
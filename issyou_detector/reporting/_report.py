@@ -0,0 +1,228 @@
+# encoding=utf-8
+__all__ = (
+    "Report",
+    "MessageReport",
+    "DigestReport",
+)
+import abc
+import collections
+import logging
+from typing import Union, override
+
+import discord
+
+from ..metrics import *
+from ..util.discord import *
+
+LOGGER = logging.getLogger(__name__)
+
+_MYGO_COLOR: int = 0x3388BB
+
+class Report(abc.ABC):
+    """
+    Something to be sent to a report channel.
+    """
+
+    @property
+    @abc.abstractmethod
+    def request_count(self) -> int:
+        """
+        Number of API requests sending this report takes, for rate limiting.
+        """
+
+    @abc.abstractmethod
+    async def send(
+        self,
+        report_channel: "discord.abc.MessageableChannel",
+        *,
+        request_latency: Histogram,
+    ) -> None:
+        """
+        Send this report to the report channel.
+
+        Args:
+            request_latency: Histogram to observe the latency of each API request,
+                labeled by the kind of request (`forward` or `send`).
+
+        Raises:
+            discord.HTTPException: If sending failed.
+        """
+
+    def merge(self, other: "Report") -> bool:
+        """
+        Try to merge the other report into this one, so that both are sent by sending this one.
+
+        Returns:
+            Whether the other report is merged.
+        """
+        return False
+
+class MessageReport(Report):
+    """
+    Report of detected messages.
+
+    A single message is forwarded, followed by a notification;
+    merged messages are listed by links in one notification instead.
+    """
+    MAX_MESSAGE_COUNT: int = 20
+    """
+    Max number of messages merged into one report.
+    """
+    MAX_CONTENT_LENGTH: int = 2000
+    """
+    Max length of the content of one Discord message; messages are never merged beyond it.
+    """
+
+    def __init__(
+        self,
+        message: discord.Message,
+    ):
+        super().__init__()
+        self.__messages: list[discord.Message] = [message]
+        self.__forwarded = False
+        """
+        Whether the single message has been forwarded, so that retrying never forwards it again.
+        """
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(message_ids={[message.id for message in self.__messages]!r})"
+
+    @property
+    def messages(self) -> tuple[discord.Message, ...]:
+        return tuple(self.__messages)
+
+    @property
+    @override
+    def request_count(self) -> int:
+        return 2 if len(self.__messages) == 1 and not self.__forwarded else 1
+
+    @override
+    async def send(
+        self,
+        report_channel: "discord.abc.MessageableChannel",
+        *,
+        request_latency: Histogram,
+    ) -> None:
+        if len(self.__messages) == 1:
+            # TODO: additional reactions, like embed?
+            if not self.__forwarded:
+                with request_latency.labels("forward").time():
+                    await self.__messages[0].forward(report_channel)
+                self.__forwarded = True
+            with request_latency.labels("send").time():
+                await report_channel.send("いっしょう...！")
+            return
+
+        with request_latency.labels("send").time():
+            await report_channel.send(self.__build_content(self.__messages))
+
+    @override
+    def merge(self, other: Report) -> bool:
+        if not isinstance(other, MessageReport) or self.__forwarded:
+            return False
+        if len(self.__messages) + len(other.__messages) > self.MAX_MESSAGE_COUNT:
+            return False
+        if len(self.__build_content(self.__messages + other.__messages)) > self.MAX_CONTENT_LENGTH:
+            # e.g. long display names
+            return False
+        self.__messages.extend(other.__messages)
+        return True
+
+    @staticmethod
+    def __build_content(messages: list[discord.Message]) -> str:
+        return "\n".join((
+            f"いっしょう...！×{len(messages)}",
+            *(
+                f"- {to_masked_link(message.author.display_name, message.jump_url)}"
+                for message in messages
+            ),
+        ))
+
+class DigestReport(Report):
+    """
+    Report of messages detected within a time window, sent as one message with an embed listing them.
+
+    Only the messages listed are kept, so that a flood of messages costs a counter per author, not the messages.
+    """
+    MAX_LISTED_MESSAGE_COUNT: int = 25
+    """
+    Max number of messages listed in the embed, to fit in the embed description limit;
+    the rest are only counted.
+    """
+
+    def __init__(
+        self,
+    ):
+        super().__init__()
+        self.__listed_messages: list[discord.Message] = []
+        self.__unlisted_message_count: int = 0
+        self.__author_counts: collections.Counter[int] = collections.Counter()
+        self.__authors: dict[int, Union[discord.User, discord.Member]] = {}
+        """
+        author ID -> the author, as in the first message of the author
+        """
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(message_count={len(self)})"
+
+    def __len__(self) -> int:
+        return len(self.__listed_messages) + self.__unlisted_message_count
+
+    def add(self, message: discord.Message) -> None:
+        if len(self.__listed_messages) < self.MAX_LISTED_MESSAGE_COUNT:
+            self.__listed_messages.append(message)
+        else:
+            self.__unlisted_message_count += 1
+        self.__author_counts[message.author.id] += 1
+        self.__authors.setdefault(message.author.id, message.author)
+
+    @property
+    @override
+    def request_count(self) -> int:
+        return 1
+
+    @override
+    async def send(
+        self,
+        report_channel: "discord.abc.MessageableChannel",
+        *,
+        request_latency: Histogram,
+    ) -> None:
+        embed = self.__build_embed()
+        with request_latency.labels("send").time():
+            await report_channel.send(
+                f"いっしょう...！×{len(self)}",
+                embed=embed,
+            )
+
+    @override
+    def merge(self, other: Report) -> bool:
+        if not isinstance(other, DigestReport):
+            return False
+        listed_count = min(len(other.__listed_messages), self.MAX_LISTED_MESSAGE_COUNT - len(self.__listed_messages))
+        self.__listed_messages.extend(other.__listed_messages[:listed_count])
+        self.__unlisted_message_count += len(other) - listed_count
+        self.__author_counts.update(other.__author_counts)
+        for author_id, author in other.__authors.items():
+            self.__authors.setdefault(author_id, author)
+        return True
+
+    def __build_embed(self) -> discord.Embed:
+        description_lines = [
+            f"- {to_masked_link(message.author.display_name, message.jump_url)}"
+            for message in self.__listed_messages
+        ]
+        if self.__unlisted_message_count > 0:
+            description_lines.append(f"...+{self.__unlisted_message_count}")
+        embed = discord.Embed(
+            color=_MYGO_COLOR,
+            description="\n".join(description_lines),
+        )
+
+        top_author_id, top_author_count = self.__author_counts.most_common(1)[0]
+        top_author = self.__authors[top_author_id]
+        embed.set_author(
+            name=top_author.display_name if len(self.__author_counts) == 1 else f"{top_author.display_name} ×{top_author_count}",
+            icon_url=top_author.display_avatar.url,
+        )
+        return embed
@@ -0,0 +1,254 @@
+# encoding=utf-8
+__all__ = (
+    "ReportChannelResolver",
+)
+import asyncio
+import logging
+import time
+from typing import Callable, Iterable, Iterator, Optional
+
+import discord
+
+from ..datastore import *
+from ..metrics import *
+
+LOGGER = logging.getLogger(__name__)
+
+class ReportChannelResolver:
+    """
+    Resolves the report channel of guilds, caching the result per guild,
+    including that a guild has no usable report channel,
+    so that resolving costs one dict lookup until the cache of the guild is invalidated or expires.
+
+    The cache should be invalidated when the registration, the channel or permissions may have changed,
+    e.g. on the corresponding gateway events.
+    Results expire after `cache_ttl` seconds, for changes without such events,
+    e.g. roles of the bot changed without the (privileged) members intent, or the datastore edited by other processes.
+    Registrations of channels found deleted are unregistered.
+    """
+    REQUIRED_PERMISSIONS: discord.Permissions = discord.Permissions(
+        view_channel=True,
+        send_messages=True,
+        # for forwarding messages
+        read_message_history=True,
+    )
+    DEFAULT_CACHE_TTL: float = 300.0
+    WARM_UP_CONCURRENCY: int = 8
+    """
+    Max number of channels fetched concurrently on warming up, for channels not cached.
+    """
+
+    def __init__(
+        self,
+        client: discord.Client,
+        channel_register_repo: ChannelRegisterRepo,
+        *,
+        cache_ttl: float = DEFAULT_CACHE_TTL,
+        metrics_registry: Optional[MetricsRegistry] = None,
+    ):
+        if metrics_registry is None:
+            metrics_registry = MetricsRegistry()
+        self.__client = client
+        self.__channel_register_repo = channel_register_repo
+        self.__cache_ttl = cache_ttl
+        self.__resolved_channels: dict[int, tuple[Optional["discord.abc.MessageableChannel"], float]] = {}
+        """
+        guild ID -> (report channel, or `None` if there is no usable one; monotonic time to expire at)
+        """
+        self.__version: int = 0
+        """
+        Increased on every invalidation, so that results resolved across an invalidation are not cached.
+        """
+        self.__resolution_counter = metrics_registry.counter(
+            "issyou_detector_report_channel_resolutions_total",
+            "Number of report channels resolved, by whether from the cache.",
+            ("source",),
+        )
+        self.__pruned_registration_counter = metrics_registry.counter(
+            "issyou_detector_report_channels_pruned_total",
+            "Number of report channel registrations removed since the channel was deleted.",
+        )
+
+    def __str__(self):
+        return f"{self.__class__.__name__}<{len(self.__resolved_channels)} guilds cached>"
+
+    async def resolve(self, guild: discord.Guild) -> Optional["discord.abc.MessageableChannel"]:
+        """
+        Get the report channel of the guild.
+
+        Returns:
+            The report channel, or `None` if there is none registered,
+            or the one registered is not found, not messageable or not permitted to report in.
+        """
+        resolved_channel = self.__resolved_channels.get(guild.id)
+        if resolved_channel is not None and resolved_channel[1] > time.monotonic():
+            self.__resolution_counter.labels("cache").inc()
+            return resolved_channel[0]
+
+        version = self.__version
+        report_channel = await self.__resolve(guild)
+        self.__resolution_counter.labels("resolved").inc()
+        if version == self.__version:
+            self.__resolved_channels[guild.id] = report_channel, time.monotonic() + self.__cache_ttl
+        return report_channel
+
+    async def warm_up(
+        self,
+        guilds: Iterable[discord.Guild],
+        *,
+        is_own_guild: Callable[[int], bool],
+    ) -> None:
+        """
+        Resolve report channels of the guilds in one pass over all registrations, caching the results,
+        then unregister in one batch the registrations of deleted channels,
+        and of guilds left, i.e. guilds which `is_own_guild` (e.g. served by shards of this process) but not given.
+
+        Channels not cached are fetched up to `WARM_UP_CONCURRENCY` at a time.
+        Unavailable guilds (e.g. due to outages) and channels failed to fetch are left to be resolved when needed.
+        """
+        started_version = self.__version
+        guilds = list(guilds)
+        joined_guild_ids = {guild.id for guild in guilds}
+        guilds_by_id = {
+            guild.id: guild
+            for guild in guilds
+            if not guild.unavailable
+        }
+        registered_guild_ids: set[int] = set()
+        dead_registrations: dict[int, int] = {}
+        """
+        guild ID -> channel ID, of registrations to unregister
+        """
+        left_guild_count = 0
+        failed_guild_count = 0
+        registrations: list[tuple[discord.Guild, int]] = []
+        async for guild_id, report_channel_id in self.__channel_register_repo.iter_report_channels():
+            guild = guilds_by_id.get(guild_id)
+            if guild is None:
+                if guild_id not in joined_guild_ids and is_own_guild(guild_id):
+                    dead_registrations[guild_id] = report_channel_id
+                    left_guild_count += 1
+                continue
+            registered_guild_ids.add(guild_id)
+            registrations.append((guild, report_channel_id))
+
+        async def resolve_registrations(registration_iterator: Iterator[tuple[discord.Guild, int]]) -> None:
+            nonlocal failed_guild_count
+            for guild, report_channel_id in registration_iterator:
+                version = self.__version
+                try:
+                    report_channel, deleted = await self.__resolve_registered(guild, report_channel_id)
+                except Exception as error:
+                    # e.g. server errors or timeouts of fetching the channel
+                    LOGGER.warning(f"Failed to resolve report channel {report_channel_id!r} in guild {guild}; to be resolved when needed: {error!r}")
+                    failed_guild_count += 1
+                    continue
+                if deleted:
+                    dead_registrations[guild.id] = report_channel_id
+                if version == self.__version:
+                    self.__resolved_channels[guild.id] = report_channel, time.monotonic() + self.__cache_ttl
+
+        # workers sharing one iterator, so that at most this number of fetches are in flight
+        registration_iterator = iter(registrations)
+        await asyncio.gather(*(
+            resolve_registrations(registration_iterator)
+            for _ in range(self.WARM_UP_CONCURRENCY)
+        ))
+        if started_version == self.__version:
+            # otherwise, some may have been registered meanwhile
+            expires_at = time.monotonic() + self.__cache_ttl
+            for guild_id in guilds_by_id.keys() - registered_guild_ids:
+                self.__resolved_channels[guild_id] = None, expires_at
+
+        if dead_registrations:
+            # skip those changed since iterated
+            current_registrations = await self.__channel_register_repo.get_report_channels(dead_registrations)
+            unregistered_channel_ids = await self.__channel_register_repo.unregister_report_channels(
+                guild_id
+                for guild_id, report_channel_id in dead_registrations.items()
+                if current_registrations.get(guild_id) == report_channel_id
+            )
+            self.__pruned_registration_counter.inc(len(unregistered_channel_ids))
+            LOGGER.warning(f"Unregistered {len(unregistered_channel_ids)} report channels, in guilds left or deleted: {unregistered_channel_ids!r}.")
+        LOGGER.info(f"Warmed up report channels of {len(guilds_by_id)} guilds ({len(registered_guild_ids)} registered, {failed_guild_count} failed); found {left_guild_count} guilds left and {len(dead_registrations) - left_guild_count} channels deleted.")
+
+    def invalidate(self, guild_id: int) -> None:
+        """
+        Drop the cached report channel of the guild, to be resolved again when needed.
+        """
+        self.__version += 1
+        self.__resolved_channels.pop(guild_id, None)
+
+    def invalidate_all(self) -> None:
+        self.__version += 1
+        self.__resolved_channels.clear()
+
+    async def on_channel_deleted(self, channel: discord.abc.GuildChannel) -> None:
+        """
+        Invalidate the cache of the guild, and unregister the channel if it is the report channel.
+        """
+        self.invalidate(channel.guild.id)
+        await self.__prune(channel.guild.id, channel.id)
+
+    async def on_thread_deleted(self, guild_id: int, thread_id: int) -> None:
+        """
+        Invalidate the cache of the guild, and unregister the thread if it is the report channel.
+
+        Takes IDs, since deleted threads may not be cached.
+        """
+        self.invalidate(guild_id)
+        await self.__prune(guild_id, thread_id)
+
+    async def __resolve(self, guild: discord.Guild) -> Optional["discord.abc.MessageableChannel"]:
+        report_channel_id = await self.__channel_register_repo.get_report_channel(guild.id)
+        if report_channel_id is None:
+            LOGGER.info("No report channel configured in guild %s.", guild)
+            return None
+        report_channel, deleted = await self.__resolve_registered(guild, report_channel_id)
+        if deleted:
+            await self.__prune(guild.id, report_channel_id)
+        return report_channel
+
+    async def __resolve_registered(
+        self,
+        guild: discord.Guild,
+        report_channel_id: int,
+    ) -> tuple[Optional["discord.abc.MessageableChannel"], bool]:
+        """
+        Returns:
+            The report channel, or `None` if it is not usable; and whether it is found deleted.
+        """
+        report_channel = guild.get_channel_or_thread(report_channel_id)
+        if report_channel is None:
+            # not cached, e.g. archived threads, or anything when caches are trimmed
+            LOGGER.debug("Report channel %r in guild %s is not cached. Fetching it.", report_channel_id, guild)
+            try:
+                report_channel = await self.__client.fetch_channel(report_channel_id)
+            except discord.NotFound:
+                return None, True
+            except discord.Forbidden as error:
+                LOGGER.warning(f"Report channel {report_channel_id!r} in guild {guild} is not accessible: {error}")
+                return None, False
+
+        if not isinstance(report_channel, discord.abc.Messageable):
+            LOGGER.warning(f"Report channel {report_channel!r} in guild {guild} is not messageable.")
+            return None, False
+        missing_permissions = self.REQUIRED_PERMISSIONS & ~report_channel.permissions_for(guild.me)
+        if missing_permissions.value:
+            LOGGER.warning(f"Missing permissions {[name for name, value in missing_permissions if value]!r} to report in channel {report_channel!r} in guild {guild}.")
+            return None, False
+        return report_channel, False
+
+    async def __prune(self, guild_id: int, report_channel_id: int) -> None:
+        """
+        Unregister the deleted channel, if it is still the report channel of the guild.
+        """
+        if await self.__channel_register_repo.get_report_channel(guild_id) != report_channel_id:
+            return
+        try:
+            await self.__channel_register_repo.unregister_report_channel(guild_id)
+        except ChannelNotRegisteredError:
+            # unregistered meanwhile
+            return
+        self.__pruned_registration_counter.inc()
+        LOGGER.warning(f"Report channel {report_channel_id!r} in guild {guild_id!r} is deleted. Unregistered it.")
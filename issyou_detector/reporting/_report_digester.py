@@ -0,0 +1,82 @@
+# encoding=utf-8
+__all__ = (
+    "ReportDigester",
+)
+import asyncio
+import dataclasses
+import logging
+
+import discord
+
+from ._report import *
+from ._report_scheduler import *
+
+LOGGER = logging.getLogger(__name__)
+
+@dataclasses.dataclass(slots=True)
+class _PendingDigest:
+    report_channel: "discord.abc.MessageableChannel"
+    report: DigestReport
+    flush_handle: asyncio.TimerHandle
+
+class ReportDigester:
+    """
+    Aggregates detected messages per report channel within a time window,
+    then submits them to the report scheduler as one digest report.
+
+    The window starts on the first message detected after the previous digest,
+    so a quiet channel costs nothing, and a busy channel gets at most one digest per window.
+    """
+    DEFAULT_WINDOW: float = 60.0
+    """
+    Default time window (in seconds) to aggregate messages.
+    """
+
+    def __init__(
+        self,
+        report_scheduler: ReportScheduler,
+        *,
+        window: float = DEFAULT_WINDOW,
+    ):
+        self.__report_scheduler = report_scheduler
+        self.__window = window
+        self.__pending_digests: dict[int, _PendingDigest] = {}
+        """
+        report channel ID -> digest being aggregated
+        """
+
+    def __str__(self):
+        return f"{self.__class__.__name__}<window: {self.__window} seconds>"
+
+    def add(
+        self,
+        report_channel: "discord.abc.MessageableChannel",
+        message: discord.Message,
+    ) -> None:
+        """
+        Add the detected message to the digest of the report channel.
+        """
+        pending_digest = self.__pending_digests.get(report_channel.id)
+        if pending_digest is None:
+            LOGGER.debug("Starting digest window of %s seconds for channel %d.", self.__window, report_channel.id)
+            pending_digest = self.__pending_digests[report_channel.id] = _PendingDigest(
+                report_channel=report_channel,
+                report=DigestReport(),
+                flush_handle=asyncio.get_running_loop().call_later(self.__window, self.__flush, report_channel.id),
+            )
+        pending_digest.report.add(message)
+
+    def flush_all(self) -> None:
+        """
+        Submit all digests being aggregated now, e.g. on shutdown.
+        """
+        for report_channel_id in tuple(self.__pending_digests):
+            self.__flush(report_channel_id)
+
+    def __flush(self, report_channel_id: int) -> None:
+        pending_digest = self.__pending_digests.pop(report_channel_id, None)
+        if pending_digest is None:
+            return
+        pending_digest.flush_handle.cancel()
+        LOGGER.debug(f"Submitting digest of {len(pending_digest.report)} messages to channel {report_channel_id}.")
+        self.__report_scheduler.submit(pending_digest.report_channel, pending_digest.report)
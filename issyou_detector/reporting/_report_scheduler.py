@@ -0,0 +1,291 @@
+# encoding=utf-8
+__all__ = (
+    "OverflowPolicy",
+    "ReportScheduler",
+)
+import asyncio
+import collections
+import enum
+import logging
+import time
+from typing import Optional
+
+import discord
+
+from ..metrics import *
+from ._report import *
+
+LOGGER = logging.getLogger(__name__)
+
+class OverflowPolicy(enum.Enum):
+    """
+    What to do with a report submitted to a full queue.
+    """
+    DROP = "drop"
+    """
+    Drop the report.
+    """
+    MERGE = "merge"
+    """
+    Merge the report into the last queued report if possible, otherwise drop it.
+    """
+
+class _RateLimitBucket:
+    """
+    Token bucket pacing requests of a route,
+    which is paused entirely when Discord reports the route is rate limited.
+    """
+    def __init__(
+        self,
+        *,
+        capacity: int,
+        period: float,
+    ):
+        self.__capacity = capacity
+        self.__refill_rate = capacity / period
+        self.__tokens: float = capacity
+        self.__updated_at = time.monotonic()
+        self.__blocked_until: float = 0.0
+
+    async def acquire(self, token_count: int) -> None:
+        """
+        Wait until the tokens are available, then take them.
+        """
+        token_count = min(token_count, self.__capacity)
+        while True:
+            now = time.monotonic()
+            if now < self.__blocked_until:
+                await asyncio.sleep(self.__blocked_until - now)
+                continue
+            self.__tokens = min(self.__capacity, self.__tokens + (now - self.__updated_at) * self.__refill_rate)
+            self.__updated_at = now
+            if self.__tokens >= token_count:
+                self.__tokens -= token_count
+                return
+            await asyncio.sleep((token_count - self.__tokens) / self.__refill_rate)
+
+    def block(self, retry_after: float) -> None:
+        """
+        Block the route for the given seconds.
+        """
+        self.__blocked_until = max(self.__blocked_until, time.monotonic() + retry_after)
+        self.__tokens = 0
+
+    def get_seconds_until_full(self) -> float:
+        """
+        Get the seconds until the bucket is unblocked and refilled,
+        from when it is the same as a new bucket, thus can be discarded.
+        """
+        now = time.monotonic()
+        tokens = min(self.__capacity, self.__tokens + (now - self.__updated_at) * self.__refill_rate)
+        refill_starts_at = max(now, self.__blocked_until)
+        return refill_starts_at - now + (self.__capacity - tokens) / self.__refill_rate
+
+class _ChannelQueue:
+    def __init__(
+        self,
+        report_channel: "discord.abc.MessageableChannel",
+        *,
+        bucket: _RateLimitBucket,
+    ):
+        self.report_channel = report_channel
+        self.bucket = bucket
+        self.reports: collections.deque[Report] = collections.deque()
+        self.worker: Optional[asyncio.Task] = None
+
+class ReportScheduler:
+    """
+    Sends reports in the background, so that detection never waits for Discord API requests.
+
+    Each report channel has its own queue, drained by its own worker:
+    reports are sent in order within a channel, and concurrently across channels.
+    Requests to a channel are paced by a token bucket per route (i.e. per channel),
+    which is paused when Discord reports a rate limit.
+    Queues are bounded; reports submitted to a full queue are handled by the overflow policy.
+    Queues are discarded once drained, and buckets once refilled, so that idle channels cost nothing.
+    """
+    DEFAULT_MAX_QUEUE_SIZE: int = 50
+    DEFAULT_BUCKET_CAPACITY: int = 5
+    DEFAULT_BUCKET_PERIOD: float = 5.0
+    """
+    Default period (in seconds) to refill a full bucket, which is the typical message rate limit of a channel.
+    """
+    MAX_SEND_ATTEMPTS: int = 3
+
+    def __init__(
+        self,
+        *,
+        max_queue_size: int = DEFAULT_MAX_QUEUE_SIZE,
+        overflow_policy: OverflowPolicy = OverflowPolicy.MERGE,
+        bucket_capacity: int = DEFAULT_BUCKET_CAPACITY,
+        bucket_period: float = DEFAULT_BUCKET_PERIOD,
+        metrics_registry: Optional[MetricsRegistry] = None,
+    ):
+        self.__max_queue_size = max_queue_size
+        self.__overflow_policy = overflow_policy
+        self.__bucket_capacity = bucket_capacity
+        self.__bucket_period = bucket_period
+        self.__channel_queues: dict[int, _ChannelQueue] = {}
+        self.__buckets: dict[int, _RateLimitBucket] = {}
+        self.__closed = False
+
+        if metrics_registry is None:
+            metrics_registry = MetricsRegistry()
+        self.__request_latency = metrics_registry.histogram(
+            "issyou_detector_discord_request_seconds",
+            "Latency of Discord API requests sending reports.",
+            ("request",),
+        )
+        report_counter = metrics_registry.counter(
+            "issyou_detector_reports_total",
+            "Number of reports, by outcome.",
+            ("outcome",),
+        )
+        self.__sent_report_counter = report_counter.labels("sent")
+        self.__failed_report_counter = report_counter.labels("failed")
+        self.__merged_report_counter = report_counter.labels("merged")
+        self.__dropped_report_counter = report_counter.labels("dropped")
+        metrics_registry.gauge(
+            "issyou_detector_queued_reports",
+            "Number of reports waiting to be sent.",
+        ).set_function(lambda: self.queued_report_count)
+
+    def __str__(self):
+        return f"{self.__class__.__name__}<max queue size: {self.__max_queue_size}, overflow policy: {self.__overflow_policy.value}>"
+
+    @property
+    def queued_report_count(self) -> int:
+        return sum(
+            len(channel_queue.reports)
+            for channel_queue in self.__channel_queues.values()
+        )
+
+    def submit(
+        self,
+        report_channel: "discord.abc.MessageableChannel",
+        report: Report,
+    ) -> bool:
+        """
+        Queue the report to be sent to the report channel. Never blocks.
+
+        Returns:
+            Whether the report is queued (or merged into a queued one), i.e. not dropped.
+        """
+        if self.__closed:
+            LOGGER.warning(f"Report scheduler is closed. Dropping report {report!r}.")
+            self.__dropped_report_counter.inc()
+            return False
+
+        channel_queue = self.__channel_queues.get(report_channel.id)
+        if channel_queue is None:
+            channel_queue = self.__channel_queues[report_channel.id] = _ChannelQueue(
+                report_channel,
+                bucket=self.__get_bucket(report_channel.id),
+            )
+
+        reports = channel_queue.reports
+        if len(reports) >= self.__max_queue_size:
+            if self.__overflow_policy is OverflowPolicy.MERGE and reports[-1].merge(report):
+                LOGGER.debug("Report queue of channel %d is full. Merged report %r into %r.", report_channel.id, report, reports[-1])
+                self.__merged_report_counter.inc()
+                return True
+            LOGGER.warning(f"Report queue of channel {report_channel.id} is full. Dropping report {report!r}.")
+            self.__dropped_report_counter.inc()
+            return False
+
+        reports.append(report)
+        if channel_queue.worker is None:
+            channel_queue.worker = asyncio.create_task(
+                self.__drain(channel_queue),
+                name=f"{self.__class__.__name__}-{report_channel.id}",
+            )
+        return True
+
+    async def aclose(self, timeout: Optional[float] = None) -> None:
+        """
+        Stop accepting reports, and wait for queued reports to be sent.
+        """
+        self.__closed = True
+        workers = [
+            channel_queue.worker
+            for channel_queue in self.__channel_queues.values()
+            if channel_queue.worker is not None
+        ]
+        if not workers:
+            return
+        LOGGER.info(f"Waiting for {self.queued_report_count} queued reports to be sent...")
+        done, pending = await asyncio.wait(workers, timeout=timeout)
+        for worker in pending:
+            worker.cancel()
+        if pending:
+            LOGGER.warning(f"Gave up sending reports queued for {len(pending)} channels.")
+
+    def __get_bucket(self, channel_id: int) -> _RateLimitBucket:
+        # buckets outlive queues until refilled, so that a new queue never bypasses the pacing of the previous one
+        bucket = self.__buckets.get(channel_id)
+        if bucket is None:
+            bucket = self.__buckets[channel_id] = _RateLimitBucket(
+                capacity=self.__bucket_capacity,
+                period=self.__bucket_period,
+            )
+        return bucket
+
+    async def __drain(self, channel_queue: _ChannelQueue) -> None:
+        """
+        Send reports in the queue in order, until the queue is empty.
+        """
+        report_channel = channel_queue.report_channel
+        reports = channel_queue.reports
+        try:
+            while reports:
+                # taken out before sending, so that it is never merged into while being sent
+                report = reports.popleft()
+                await self.__send(channel_queue, report)
+        finally:
+            channel_queue.worker = None
+            if not reports and self.__channel_queues.get(report_channel.id) is channel_queue:
+                del self.__channel_queues[report_channel.id]
+                self.__discard_bucket_when_full(report_channel.id)
+
+    def __discard_bucket_when_full(self, channel_id: int) -> None:
+        if channel_id in self.__channel_queues:
+            # in use again; to be discarded once the queue is drained
+            return
+        bucket = self.__buckets.get(channel_id)
+        if bucket is None:
+            return
+        seconds_until_full = bucket.get_seconds_until_full()
+        if seconds_until_full > 0:
+            asyncio.get_running_loop().call_later(seconds_until_full, self.__discard_bucket_when_full, channel_id)
+            return
+        del self.__buckets[channel_id]
+
+    async def __send(
+        self,
+        channel_queue: _ChannelQueue,
+        report: Report,
+    ) -> None:
+        report_channel = channel_queue.report_channel
+        for attempt in range(1, self.MAX_SEND_ATTEMPTS + 1):
+            await channel_queue.bucket.acquire(report.request_count)
+            try:
+                await report.send(report_channel, request_latency=self.__request_latency)
+            except discord.RateLimited as exception:
+                # counted by DiscordRateLimitCounter, as is every 429 response
+                LOGGER.warning(f"Rate limited on channel {report_channel.id} for {exception.retry_after:.1f} seconds (attempt {attempt}/{self.MAX_SEND_ATTEMPTS}).")
+                channel_queue.bucket.block(exception.retry_after)
+            except discord.HTTPException as exception:
+                LOGGER.warning(f"Failed to send report {report!r} to channel {report_channel!r}; reason: {exception.text!r}. Dropping it.")
+                LOGGER.debug("Exception info:", exc_info=exception)
+                self.__failed_report_counter.inc()
+                return
+            except Exception as exception:
+                LOGGER.exception(f"Unexpected error sending report {report!r} to channel {report_channel!r}. Dropping it.", exc_info=exception)
+                self.__failed_report_counter.inc()
+                return
+            else:
+                LOGGER.debug("Sent report %r to channel %d.", report, report_channel.id)
+                self.__sent_report_counter.inc()
+                return
+        LOGGER.warning(f"Gave up sending report {report!r} to channel {report_channel!r} after {self.MAX_SEND_ATTEMPTS} attempts.")
+        self.__failed_report_counter.inc()
@@ -0,0 +1,2 @@
+# encoding=utf-8
+from ._detection_statistics import *
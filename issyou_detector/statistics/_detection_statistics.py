@@ -0,0 +1,196 @@
+# encoding=utf-8
+__all__ = (
+    "DetectionStatistics",
+    "to_day",
+    "from_day",
+)
+import asyncio
+import datetime
+import logging
+from typing import Optional
+
+from ..datastore import *
+from ..metrics import *
+
+LOGGER = logging.getLogger(__name__)
+
+_EPOCH_DATE = datetime.date(1970, 1, 1)
+
+def to_day(timestamp: datetime.datetime) -> int:
+    """
+    Get the day (days since the Unix epoch, in UTC) of the aware datetime.
+    """
+    return (timestamp.astimezone(datetime.timezone.utc).date() - _EPOCH_DATE).days
+
+def from_day(day: int) -> datetime.date:
+    return _EPOCH_DATE + datetime.timedelta(days=day)
+
+class DetectionStatistics:
+    """
+    Counts messages detected per guild, day and author,
+    in memory on recording, then added to the repository in one batch per `flush_interval`,
+    so that recording costs one dict update, without I/O on the detection path.
+
+    Queries flush pending counts first, so that they are answered up to date.
+    Pending counts are lost if the process crashes, at most those of one interval.
+    """
+    DEFAULT_FLUSH_INTERVAL: float = 30.0
+
+    def __init__(
+        self,
+        detection_stats_repo: DetectionStatsRepo,
+        *,
+        flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+        metrics_registry: Optional[MetricsRegistry] = None,
+    ):
+        if metrics_registry is None:
+            metrics_registry = MetricsRegistry()
+        self.__detection_stats_repo = detection_stats_repo
+        self.__flush_interval = flush_interval
+        self.__pending_hit_counts: dict[HitBucket, int] = {}
+        self.__flush_lock = asyncio.Lock()
+        self.__write_task: Optional[asyncio.Task] = None
+        """
+        Task adding a batch to the repository, left running by a flush cancelled meanwhile.
+        """
+        self.__task: Optional[asyncio.Task] = None
+        metrics_registry.gauge(
+            "issyou_detector_statistics_pending_buckets",
+            "Number of detection statistics buckets counted in memory, waiting to be flushed.",
+        ).set_function(lambda: len(self.__pending_hit_counts))
+        self.__flush_latency = metrics_registry.histogram(
+            "issyou_detector_statistics_flush_seconds",
+            "Latency of flushing a batch of detection statistics to the repository.",
+        )
+
+    def __str__(self):
+        return f"{self.__class__.__name__}<flush interval: {self.__flush_interval} seconds, repository: {self.__detection_stats_repo}>"
+
+    def record(
+        self,
+        guild_id: int,
+        user_id: int,
+        timestamp: datetime.datetime,
+    ) -> None:
+        """
+        Count a message detected, by when it was sent.
+        """
+        bucket = HitBucket(guild_id, to_day(timestamp), user_id)
+        self.__pending_hit_counts[bucket] = self.__pending_hit_counts.get(bucket, 0) + 1
+
+    def start(self) -> None:
+        """
+        Start flushing periodically. Should be called within a running event loop.
+        """
+        if self.__task is None:
+            self.__task = asyncio.create_task(self.__flush_periodically(), name=self.__class__.__name__)
+
+    async def aclose(self) -> None:
+        """
+        Stop flushing periodically, and flush pending counts.
+        """
+        if self.__task is not None:
+            self.__task.cancel()
+            await asyncio.gather(self.__task, return_exceptions=True)
+            self.__task = None
+        await self.flush()
+
+    async def flush(self) -> None:
+        """
+        Add pending counts to the repository, as one batch.
+        Counts failed to be added are kept pending, to be retried on next flush.
+
+        The batch is written in a shielded task, since the write (e.g. in an executor thread) cannot be stopped:
+        cancelling the flush leaves the write running, to be waited for by the next flush,
+        and never puts the counts back, which would count them twice.
+        """
+        async with self.__flush_lock:
+            if self.__write_task is not None:
+                await asyncio.wait((self.__write_task,))
+                error = self.__write_task.exception()
+                self.__write_task = None
+                if error is not None:
+                    LOGGER.error("Failed to write detection statistics left by a cancelled flush; to be retried.", exc_info=error)
+            if not self.__pending_hit_counts:
+                return
+            hit_counts, self.__pending_hit_counts = self.__pending_hit_counts, {}
+            write_task = self.__write_task = asyncio.create_task(self.__write(hit_counts))
+            try:
+                await asyncio.shield(write_task)
+            finally:
+                if write_task.done():
+                    self.__write_task = None
+            LOGGER.debug(f"Flushed detection statistics of {len(hit_counts)} buckets.")
+
+    async def __write(self, hit_counts: dict[HitBucket, int]) -> None:
+        try:
+            with self.__flush_latency.time():
+                await self.__detection_stats_repo.add_hit_counts(hit_counts)
+        except Exception:
+            # merged back with those recorded meanwhile
+            for bucket, count in hit_counts.items():
+                self.__pending_hit_counts[bucket] = self.__pending_hit_counts.get(bucket, 0) + count
+            raise
+
+    async def get_top_users(
+        self,
+        guild_id: int,
+        *,
+        since: Optional[datetime.datetime] = None,
+        limit: int,
+    ) -> list[tuple[int, int]]:
+        """
+        Get users with the most messages detected in the guild, since the day of `since` or of all time.
+
+        Returns:
+            Pairs of user ID and count, in descending order of count.
+        """
+        await self.flush()
+        return await self.__detection_stats_repo.get_top_users(
+            guild_id,
+            since_day=None if since is None else to_day(since),
+            limit=limit,
+        )
+
+    async def get_top_days(
+        self,
+        guild_id: int,
+        *,
+        since: Optional[datetime.datetime] = None,
+        limit: int,
+    ) -> list[tuple[datetime.date, int]]:
+        """
+        Get days (in UTC) with the most messages detected in the guild, since the day of `since` or of all time.
+
+        Returns:
+            Pairs of date and count, in descending order of count.
+        """
+        await self.flush()
+        return [
+            (from_day(day), count)
+            for day, count in await self.__detection_stats_repo.get_top_days(
+                guild_id,
+                since_day=None if since is None else to_day(since),
+                limit=limit,
+            )
+        ]
+
+    async def get_hit_count(
+        self,
+        guild_id: int,
+        *,
+        since: Optional[datetime.datetime] = None,
+    ) -> int:
+        await self.flush()
+        return await self.__detection_stats_repo.get_hit_count(
+            guild_id,
+            since_day=None if since is None else to_day(since),
+        )
+
+    async def __flush_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.__flush_interval)
+            try:
+                await self.flush()
+            except Exception as error:
+                LOGGER.error("Failed to flush detection statistics; to be retried on next flush.", exc_info=error)
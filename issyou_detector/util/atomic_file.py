@@ -0,0 +1,58 @@
+# encoding=utf-8
+__all__ = (
+    "write_file_atomically",
+)
+import os
+import pathlib
+import stat
+import tempfile
+from typing import BinaryIO, Callable
+
+_DEFAULT_FILE_MODE: int = 0o644
+
+def write_file_atomically(
+    file_path: pathlib.Path,
+    write: Callable[[BinaryIO], None],
+) -> None:
+    """
+    Write a file so that it has either the old or the new content even if the process crashes midway.
+
+    The content is written to a temporary file in the same directory by `write`,
+    flushed to disk, then renamed to replace the target file.
+    """
+    file_path.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        file_mode = stat.S_IMODE(file_path.stat().st_mode)
+    except FileNotFoundError:
+        file_mode = _DEFAULT_FILE_MODE
+
+    file_descriptor, temp_file_name = tempfile.mkstemp(
+        prefix=f".{file_path.name}.",
+        suffix=".tmp",
+        dir=file_path.parent,
+    )
+    temp_file_path = pathlib.Path(temp_file_name)
+    try:
+        with os.fdopen(file_descriptor, "wb") as temp_file:
+            write(temp_file)
+            temp_file.flush()
+            os.fsync(temp_file.fileno())
+        os.chmod(temp_file_path, file_mode)
+        os.replace(temp_file_path, file_path)
+    except BaseException:
+        temp_file_path.unlink(missing_ok=True)
+        raise
+    _fsync_directory(file_path.parent)
+
+def _fsync_directory(directory_path: pathlib.Path) -> None:
+    """
+    Flush the directory entry changes (e.g. renaming) to disk.
+    """
+    if os.name != "posix":
+        # directories cannot be opened on other platforms
+        return
+    directory_descriptor = os.open(directory_path, os.O_RDONLY)
+    try:
+        os.fsync(directory_descriptor)
+    finally:
+        os.close(directory_descriptor)
@@ -4,6 +4,7 @@ __all__ = (
     "to_masked_link",
     "to_block_quote",
     "to_channel_mention",
+    "to_user_mention",
 )
 
 def to_stroke(text: str) -> str:
@@ -24,3 +25,6 @@ def to_block_quote(text: str) -> str:
 
 def to_channel_mention(channel_id: int) -> str:
     return f"<#{channel_id}>"
+
+def to_user_mention(user_id: int) -> str:
+    return f"<@{user_id}>"
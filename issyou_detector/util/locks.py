@@ -0,0 +1,64 @@
+# encoding=utf-8
+__all__ = (
+    "KeyedLock",
+)
+import asyncio
+import contextlib
+from typing import AsyncIterator, Generic, Hashable, Iterable, TypeVar
+
+_K = TypeVar("_K", bound=Hashable)
+
+class KeyedLock(Generic[_K]):
+    """
+    A set of asyncio locks, one per key.
+
+    Holding the lock of a key never blocks holders of other keys.
+    Locks are created on demand and discarded once no one holds or waits for them,
+    so the memory used is bounded by the number of keys in use.
+    """
+    def __init__(
+        self,
+    ):
+        self.__locks: dict[_K, asyncio.Lock] = {}
+        self.__lock_users: dict[_K, int] = {}
+        """
+        key -> number of holders and waiters of the lock
+        """
+
+    def __len__(self) -> int:
+        return len(self.__locks)
+
+    def locked(self, key: _K) -> bool:
+        lock = self.__locks.get(key)
+        return lock is not None and lock.locked()
+
+    @contextlib.asynccontextmanager
+    async def hold(self, key: _K) -> AsyncIterator[None]:
+        """
+        Hold the lock of the key within the context.
+        """
+        lock = self.__locks.get(key)
+        if lock is None:
+            lock = self.__locks[key] = asyncio.Lock()
+        self.__lock_users[key] = self.__lock_users.get(key, 0) + 1
+        try:
+            async with lock:
+                yield
+        finally:
+            self.__lock_users[key] -= 1
+            if self.__lock_users[key] == 0:
+                del self.__lock_users[key]
+                del self.__locks[key]
+
+    @contextlib.asynccontextmanager
+    async def hold_all(self, keys: Iterable[_K]) -> AsyncIterator[None]:
+        """
+        Hold the locks of all the keys within the context.
+
+        Locks are taken in sorted order of keys (which thus should be comparable),
+        so that holders of overlapping keys never deadlock each other.
+        """
+        async with contextlib.AsyncExitStack() as exit_stack:
+            for key in sorted(set(keys)):
+                await exit_stack.enter_async_context(self.hold(key))
+            yield
@@ -0,0 +1,108 @@
+# encoding=utf-8
+"""
+Logging filters for hot paths, configurable from the logging config file, e.g.:
+
+    filters:
+      hot_path_rate_limit:
+        (): issyou_detector.util.logging.RateLimitFilter
+        max_level: DEBUG
+        rate: 10
+        period: 1.0
+"""
+__all__ = (
+    "RateLimitFilter",
+    "SamplingFilter",
+    "ForwardingHandler",
+)
+import logging
+import random
+import time
+from typing import Union
+
+class RateLimitFilter(logging.Filter):
+    """
+    Passes at most `rate` records per `period` seconds from each logging call site,
+    among records at or below `max_level`; records above it always pass.
+    If `name` is given, only records of that logger (and its children) are limited.
+
+    Call sites are told apart by file and line rather than message,
+    so that records of f-string messages (all different) are limited together.
+    The number of records dropped is appended to the next record passed from the same call site.
+    """
+    def __init__(
+        self,
+        name: str = "",
+        *,
+        max_level: Union[int, str] = logging.DEBUG,
+        rate: int = 10,
+        period: float = 1.0,
+    ):
+        super().__init__(name)
+        self.__max_level = _to_level_number(max_level)
+        self.__rate = rate
+        self.__period = period
+        self.__windows: dict[tuple[str, int], list] = {}
+        """
+        (path name, line number) -> [start of the current window, records passed in it, records dropped since the last passed]
+        """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > self.__max_level or not super().filter(record):
+            return True
+        now = time.monotonic()
+        key = (record.pathname, record.lineno)
+        window = self.__windows.get(key)
+        if window is None:
+            window = self.__windows[key] = [now, 0, 0]
+        elif now - window[0] >= self.__period:
+            window[0] = now
+            window[1] = 0
+        if window[1] >= self.__rate:
+            window[2] += 1
+            return False
+        window[1] += 1
+        if window[2] > 0:
+            _append_dropped_count(record, window[2])
+            window[2] = 0
+        return True
+
+class SamplingFilter(logging.Filter):
+    """
+    Passes a random `ratio` of records at or below `max_level`; records above it always pass.
+    If `name` is given, only records of that logger (and its children) are sampled.
+    """
+    def __init__(
+        self,
+        name: str = "",
+        *,
+        max_level: Union[int, str] = logging.DEBUG,
+        ratio: float = 0.01,
+    ):
+        super().__init__(name)
+        self.__max_level = _to_level_number(max_level)
+        self.__ratio = ratio
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > self.__max_level or not super().filter(record):
+            return True
+        return random.random() < self.__ratio
+
+class ForwardingHandler(logging.Handler):
+    """
+    Handler passing records (e.g. received from other processes) to the logger of the same name in this process,
+    so that they are handled as configured here, as if they were logged here.
+    """
+    def emit(self, record: logging.LogRecord) -> None:
+        logger = logging.getLogger(record.name)
+        if logger.isEnabledFor(record.levelno):
+            logger.handle(record)
+
+def _to_level_number(level: Union[int, str]) -> int:
+    if isinstance(level, int):
+        return level
+    return logging.getLevelNamesMapping()[level.upper()]
+
+def _append_dropped_count(record: logging.LogRecord, dropped_count: int) -> None:
+    # the message may be still to be formatted with its arguments, thus nothing like "%" is appended
+    if isinstance(record.msg, str):
+        record.msg = f"{record.msg} ({dropped_count} similar records dropped by rate limit)"
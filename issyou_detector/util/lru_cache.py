@@ -0,0 +1,57 @@
+# encoding=utf-8
+__all__ = (
+    "LruCache",
+)
+import collections
+from typing import Generic, Optional, TypeVar
+
+_K = TypeVar("_K")
+_V = TypeVar("_V")
+
+class LruCache(Generic[_K, _V]):
+    """
+    Size-bounded mapping which evicts the least recently used entry when full.
+    """
+    def __init__(
+        self,
+        max_size: int,
+    ):
+        if max_size <= 0:
+            raise ValueError(f"max_size should be positive, got {max_size!r}.")
+        self.__max_size = max_size
+        self.__entries: collections.OrderedDict[_K, _V] = collections.OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self.__entries)
+
+    def __contains__(self, key: _K) -> bool:
+        return key in self.__entries
+
+    @property
+    def max_size(self) -> int:
+        return self.__max_size
+
+    def get(self, key: _K, default: Optional[_V] = None) -> Optional[_V]:
+        """
+        Get the value of the key, marking the entry as most recently used.
+        """
+        try:
+            self.__entries.move_to_end(key)
+        except KeyError:
+            return default
+        return self.__entries[key]
+
+    def put(self, key: _K, value: _V) -> None:
+        """
+        Put the value of the key, marking the entry as most recently used.
+        """
+        self.__entries[key] = value
+        self.__entries.move_to_end(key)
+        if len(self.__entries) > self.__max_size:
+            self.__entries.popitem(last=False)
+
+    def pop(self, key: _K, default: Optional[_V] = None) -> Optional[_V]:
+        return self.__entries.pop(key, default)
+
+    def clear(self) -> None:
+        self.__entries.clear()
@@ -0,0 +1,57 @@
+# encoding=utf-8
+__all__ = (
+    "get_resident_memory_bytes",
+    "CACHED_OBJECT_COUNTERS",
+    "count_cached_objects",
+)
+import os
+import sys
+from typing import Callable, Optional
+
+import discord
+
+def get_resident_memory_bytes() -> Optional[int]:
+    """
+    Get the resident set size (RSS) of this process.
+
+    Returns:
+        The current RSS on Linux, the peak RSS on other POSIX systems, or `None` if not available.
+    """
+    try:
+        with open("/proc/self/statm", "r", encoding="ascii") as statm_file:
+            return int(statm_file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        # e.g. Windows
+        return None
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # in bytes on macOS, in kilobytes elsewhere
+    return max_rss if sys.platform == "darwin" else max_rss * 1024
+
+CACHED_OBJECT_COUNTERS: dict[str, Callable[[discord.Client], int]] = {
+    "guilds": lambda client: len(client.guilds),
+    "channels": lambda client: sum(len(guild.channels) for guild in client.guilds),
+    "threads": lambda client: sum(len(guild.threads) for guild in client.guilds),
+    "roles": lambda client: sum(len(guild.roles) for guild in client.guilds),
+    "members": lambda client: sum(len(guild.members) for guild in client.guilds),
+    "users": lambda client: len(client.users),
+    "emojis": lambda client: len(client.emojis),
+    "stickers": lambda client: len(client.stickers),
+    "messages": lambda client: len(client.cached_messages),
+    "private_channels": lambda client: len(client.private_channels),
+}
+"""
+Name of cache -> function counting objects held in the cache of a client.
+"""
+
+def count_cached_objects(client: discord.Client) -> dict[str, int]:
+    """
+    Count objects held in the caches of the client, by cache.
+    """
+    return {
+        cache_name: count_objects(client)
+        for cache_name, count_objects in CACHED_OBJECT_COUNTERS.items()
+    }
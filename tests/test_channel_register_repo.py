@@ -0,0 +1,233 @@
+# encoding=utf-8
+import asyncio
+import pathlib
+import tempfile
+import unittest
+import unittest.mock
+
+from issyou_detector.datastore import *
+from issyou_detector.datastore.impl import *
+from issyou_detector.metrics import *
+
+class _ChannelRegisterRepoContract:
+    """
+    Tests of the behavior every ChannelRegisterRepo implement should have.
+    """
+    PERSISTENT: bool = True
+
+    def create_repo(self, data_root_path: pathlib.Path) -> ChannelRegisterRepo:
+        raise NotImplementedError
+
+    async def asyncSetUp(self):
+        self.temporary_directory = tempfile.TemporaryDirectory()
+        self.data_root_path = pathlib.Path(self.temporary_directory.name)
+        self.repo = self.create_repo(self.data_root_path)
+
+    async def asyncTearDown(self):
+        self.repo.close()
+        self.temporary_directory.cleanup()
+
+    async def reopen_repo(self) -> ChannelRegisterRepo:
+        self.repo.close()
+        self.repo = self.create_repo(self.data_root_path)
+        return self.repo
+
+    async def test_get_unregistered(self):
+        self.assertIsNone(await self.repo.get_report_channel(1))
+
+    async def test_register(self):
+        await self.repo.register_report_channel(1, 10)
+        await self.repo.register_report_channel(2, 20)
+        self.assertEqual(await self.repo.get_report_channel(1), 10)
+        self.assertEqual(await self.repo.get_report_channel(2), 20)
+
+    async def test_register_registered(self):
+        await self.repo.register_report_channel(1, 10)
+        with self.assertRaises(ChannelAlreadyRegisteredError) as context:
+            await self.repo.register_report_channel(1, 11)
+        self.assertEqual((context.exception.guild_id, context.exception.channel_id), (1, 10))
+        self.assertEqual(await self.repo.get_report_channel(1), 10)
+
+    async def test_unregister(self):
+        await self.repo.register_report_channel(1, 10)
+        self.assertEqual(await self.repo.unregister_report_channel(1), 10)
+        self.assertIsNone(await self.repo.get_report_channel(1))
+
+    async def test_unregister_unregistered(self):
+        with self.assertRaises(ChannelNotRegisteredError) as context:
+            await self.repo.unregister_report_channel(1)
+        self.assertEqual(context.exception.guild_id, 1)
+
+    async def test_replace_unregistered(self):
+        self.assertIsNone(await self.repo.replace_report_channel(1, 10))
+        self.assertEqual(await self.repo.get_report_channel(1), 10)
+
+    async def test_replace_registered(self):
+        await self.repo.register_report_channel(1, 10)
+        await self.repo.register_report_channel(2, 20)
+        self.assertEqual(await self.repo.replace_report_channel(1, 11), 10)
+        self.assertEqual(await self.repo.get_report_channel(1), 11)
+        self.assertEqual(await self.repo.get_report_channel(2), 20)
+
+    async def test_concurrent_replaces_are_atomic(self):
+        channel_ids = list(range(100, 120))
+        replaced_channel_ids = await asyncio.gather(*(
+            self.repo.replace_report_channel(1, channel_id)
+            for channel_id in channel_ids
+        ))
+        # each replace sees the channel of exactly one other, as a chain from none to the final one
+        self.assertEqual(replaced_channel_ids.count(None), 1)
+        final_channel_id = await self.repo.get_report_channel(1)
+        self.assertCountEqual(
+            [channel_id for channel_id in replaced_channel_ids if channel_id is not None] + [final_channel_id],
+            channel_ids,
+        )
+
+    async def test_get_report_channels(self):
+        await self.repo.register_report_channel(1, 10)
+        await self.repo.register_report_channel(3, 30)
+        self.assertEqual(await self.repo.get_report_channels([1, 2, 3]), {1: 10, 3: 30})
+        self.assertEqual(await self.repo.get_report_channels([]), {})
+
+    async def test_iter_report_channels(self):
+        # more than one batch of some implements
+        registrations = {guild_id: guild_id * 10 for guild_id in range(1, 1200)}
+        for guild_id, channel_id in registrations.items():
+            await self.repo.register_report_channel(guild_id, channel_id)
+        iterated_registrations = [
+            registration
+            async for registration in self.repo.iter_report_channels()
+        ]
+        self.assertCountEqual(iterated_registrations, registrations.items())
+
+    async def test_unregister_report_channels(self):
+        await self.repo.register_report_channel(1, 10)
+        await self.repo.register_report_channel(2, 20)
+        await self.repo.register_report_channel(3, 30)
+        self.assertEqual(await self.repo.unregister_report_channels([1, 3, 4]), {1: 10, 3: 30})
+        self.assertEqual(await self.repo.unregister_report_channels([1, 4]), {})
+        self.assertEqual(await self.repo.get_report_channels([1, 2, 3]), {2: 20})
+
+    async def test_changes_persisted(self):
+        if not self.PERSISTENT:
+            self.skipTest("not persistent")
+        await self.repo.register_report_channel(1, 10)
+        await self.repo.register_report_channel(2, 20)
+        await self.repo.replace_report_channel(1, 11)
+        await self.repo.unregister_report_channel(2)
+        await self.repo.register_report_channel(3, 30)
+        await self.repo.register_report_channel(4, 40)
+        await self.repo.unregister_report_channels([3])
+        repo = await self.reopen_repo()
+        self.assertEqual(await repo.get_report_channel(1), 11)
+        self.assertIsNone(await repo.get_report_channel(2))
+        self.assertEqual(await repo.get_report_channels([1, 2, 3, 4]), {1: 11, 4: 40})
+
+class InMemoryChannelRegisterRepoTest(_ChannelRegisterRepoContract, unittest.IsolatedAsyncioTestCase):
+    PERSISTENT = False
+
+    def create_repo(self, data_root_path: pathlib.Path) -> ChannelRegisterRepo:
+        return InMemoryChannelRegisterRepo()
+
+class _SlowSavingChannelRegisterRepo(InMemoryChannelRegisterRepo):
+    """
+    Repo of which each save waits until allowed.
+    """
+    def __init__(self):
+        super().__init__()
+        self.saving = asyncio.Event()
+        self.save_allowed = asyncio.Event()
+
+    async def _save_data(self, data):
+        self.saving.set()
+        await self.save_allowed.wait()
+        self.save_allowed.clear()
+        self.saving.clear()
+        await super()._save_data(data)
+
+class SimpleChannelRegisterRepoCommitTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.repo = _SlowSavingChannelRegisterRepo()
+        self.first_task = asyncio.create_task(self.repo.register_report_channel(1, 10))
+        await self.repo.saving.wait()
+        # queued behind the first save, to be saved together by the first of them
+        self.saving_task = asyncio.create_task(self.repo.register_report_channel(2, 20))
+        self.waiting_task = asyncio.create_task(self.repo.register_report_channel(3, 30))
+        await asyncio.sleep(0)
+        self.repo.save_allowed.set()
+        await self.first_task
+        await self.repo.saving.wait()
+
+    async def __cancel_saving_task(self) -> None:
+        self.saving_task.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await self.saving_task
+
+    async def test_cancelled_save_retried_by_waiting_writers(self):
+        await self.__cancel_saving_task()
+        self.repo.save_allowed.set()
+        await self.waiting_task
+        self.assertEqual(await self.repo.get_report_channel(3), 30)
+
+    async def test_cancelled_save_retried_with_changes_queued_after(self):
+        queued_task = asyncio.create_task(self.repo.register_report_channel(4, 40))
+        await asyncio.sleep(0)
+        await self.__cancel_saving_task()
+        self.repo.save_allowed.set()
+        await asyncio.gather(self.waiting_task, queued_task)
+        self.assertEqual(await self.repo.get_report_channels([3, 4]), {3: 30, 4: 40})
+
+class JsonChannelRegisterRepoTest(_ChannelRegisterRepoContract, unittest.IsolatedAsyncioTestCase):
+    def create_repo(self, data_root_path: pathlib.Path) -> ChannelRegisterRepo:
+        return JsonChannelRegisterRepo(data_root_path)
+
+class JournalChannelRegisterRepoTest(_ChannelRegisterRepoContract, unittest.IsolatedAsyncioTestCase):
+    def create_repo(self, data_root_path: pathlib.Path) -> ChannelRegisterRepo:
+        # compacted on nearly every change
+        return JournalChannelRegisterRepo(data_root_path, compaction_threshold=64)
+
+    async def test_failed_append_rolled_back_and_truncated(self):
+        await self.repo.register_report_channel(1, 10)
+        # records written, but not flushed to disk
+        with unittest.mock.patch("os.fsync", side_effect=OSError("disk failure")):
+            with self.assertRaises(OSError):
+                await self.repo.register_report_channel(2, 20)
+        self.assertIsNone(await self.repo.get_report_channel(2))
+        await self.repo.register_report_channel(3, 30)
+        repo = await self.reopen_repo()
+        self.assertEqual(await repo.get_report_channels([1, 2, 3]), {1: 10, 3: 30})
+
+class SqliteChannelRegisterRepoTest(_ChannelRegisterRepoContract, unittest.IsolatedAsyncioTestCase):
+    def create_repo(self, data_root_path: pathlib.Path) -> ChannelRegisterRepo:
+        return SqliteChannelRegisterRepo(data_root_path)
+
+class BinaryChannelRegisterRepoTest(_ChannelRegisterRepoContract, unittest.IsolatedAsyncioTestCase):
+    def create_repo(self, data_root_path: pathlib.Path) -> ChannelRegisterRepo:
+        return BinaryChannelRegisterRepo(data_root_path)
+
+    async def test_concurrent_writes_of_repos_sharing_file_are_kept(self):
+        # as with repos of different processes, which share no asyncio lock
+        other_repo = self.create_repo(self.data_root_path)
+        try:
+            await asyncio.gather(*(
+                repo.register_report_channel(guild_id, guild_id * 10)
+                for guild_id in range(1, 41)
+                for repo in (self.repo if guild_id % 2 else other_repo,)
+            ))
+        finally:
+            other_repo.close()
+        repo = await self.reopen_repo()
+        self.assertEqual(
+            await repo.get_report_channels(range(1, 41)),
+            {guild_id: guild_id * 10 for guild_id in range(1, 41)},
+        )
+
+class InstrumentedChannelRegisterRepoTest(_ChannelRegisterRepoContract, unittest.IsolatedAsyncioTestCase):
+    def create_repo(self, data_root_path: pathlib.Path) -> ChannelRegisterRepo:
+        return InstrumentedChannelRegisterRepo(
+            SqliteChannelRegisterRepo(data_root_path),
+            metrics_registry=MetricsRegistry(),
+        )
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,24 @@
+# encoding=utf-8
+import logging
+import unittest
+
+from issyou_detector.metrics import *
+
+class DiscordRateLimitCounterTest(unittest.TestCase):
+    def test_counts_rate_limited_responses(self):
+        metrics_registry = MetricsRegistry()
+        counter = DiscordRateLimitCounter(metrics_registry)
+        counter.install()
+        try:
+            logger = logging.getLogger(DiscordRateLimitCounter.LOGGER_NAME)
+            with self.assertLogs(logger, logging.DEBUG):
+                # as logged by discord.py, for retried and raised ones
+                logger.warning("We are being rate limited. %s %s responded with 429. Retrying in %.2f seconds.", "POST", "https://discord.com/api/v10/channels/1/messages", 1.5)
+                logger.warning("We are being rate limited. %s %s responded with 429. Timeout of %.2f was too long, erroring instead.", "POST", "https://discord.com/api/v10/channels/1/messages", 60.0)
+                logger.debug("Done sleeping for the rate limit. Retrying...")
+        finally:
+            counter.uninstall()
+        self.assertEqual(metrics_registry.get("issyou_detector_discord_rate_limited_total").snapshot().children, {(): 2.0})
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,134 @@
+# encoding=utf-8
+import random
+import unittest
+
+from issyou_detector.detection import *
+from issyou_detector.detection._fuzzy_keyword_matcher import _build_char_masks, _edit_distance, _search_end
+
+def _levenshtein(keyword: str, text: str) -> int:
+    distances = list(range(len(text) + 1))
+    for keyword_index, keyword_char in enumerate(keyword, 1):
+        previous_distances = distances[:]
+        distances[0] = keyword_index
+        for text_index, text_char in enumerate(text, 1):
+            distances[text_index] = min(
+                previous_distances[text_index] + 1,
+                distances[text_index - 1] + 1,
+                previous_distances[text_index - 1] + (keyword_char != text_char),
+            )
+    return distances[-1]
+
+class FuzzyKeywordMatcherTest(unittest.TestCase):
+    def setUp(self):
+        self.matcher = FuzzyKeywordMatcher(
+            ("一輩子", "一生", "いっしょう", "isshou"),
+            max_distance=1,
+        )
+
+    def test_max_distances_limited_by_keyword_length(self):
+        self.assertEqual(
+            self.matcher.keyword_max_distances,
+            {"一輩子": 0, "一生": 0, "いっしょう": 1, "isshou": 1},
+        )
+
+    def test_keyword_max_distances_override(self):
+        matcher = FuzzyKeywordMatcher(("一輩子",), keyword_max_distances={"一輩子": 1})
+        self.assertEqual(matcher.keyword_max_distances, {"一輩子": 1})
+        self.assertIsNotNone(matcher.find_first("一輩"))
+
+    def test_matches_variants(self):
+        for text, keyword in (
+            ("issyou", "isshou"),
+            ("我issyou了", "isshou"),
+            ("いっしよう", "いっしょう"),
+            ("我 いっしよう 都", "いっしょう"),
+        ):
+            with self.subTest(text=text):
+                keyword_match = self.matcher.find_first(text)
+                self.assertIsNotNone(keyword_match)
+                self.assertEqual(keyword_match.keyword, keyword)
+
+    def test_matches_spaced_out_keywords(self):
+        for text, keyword in (
+            ("一 生", "一生"),
+            ("一　生，", "一生"),
+            ("i s s h o u", "isshou"),
+            ("i.s.s.y.o.u", "isshou"),
+            ("it i s s h o u", "isshou"),
+        ):
+            with self.subTest(text=text):
+                keyword_match = self.matcher.find_first(text)
+                self.assertIsNotNone(keyword_match)
+                self.assertEqual(keyword_match.keyword, keyword)
+
+    def test_never_matches_across_words(self):
+        for text in (
+            "This should work",
+            "his shoulder hurts",
+            "it is shown here",
+            "I miss hours",
+            "iss hou",
+            "一個 生",
+        ):
+            with self.subTest(text=text):
+                self.assertIsNone(self.matcher.find_first(text.casefold()))
+
+    def test_latin_keywords_match_whole_words_only(self):
+        for text in (
+            "isshoukenmei",
+            "missyou",
+            "issyoux",
+        ):
+            with self.subTest(text=text):
+                self.assertIsNone(self.matcher.find_first(text))
+
+    def test_span_refers_to_compacted_text(self):
+        self.assertEqual(
+            self.matcher.find_first("hello,  i s s y o u!"),
+            KeywordMatch("isshou", 6, 12),
+        )
+
+    def test_first_match_by_end(self):
+        keyword_match = self.matcher.find_first("いっしよう 一 生")
+        self.assertEqual(keyword_match.keyword, "いっしょう")
+
+    def test_no_keywords(self):
+        self.assertIsNone(FuzzyKeywordMatcher(()).find_first("一生"))
+
+class BitParallelSearchTest(unittest.TestCase):
+    def test_edit_distance_agrees_with_dynamic_programming(self):
+        generator = random.Random(0)
+        for _ in range(2000):
+            keyword = "".join(generator.choice("abc") for _ in range(generator.randint(1, 8)))
+            text = "".join(generator.choice("abcd") for _ in range(generator.randint(0, 10)))
+            self.assertEqual(
+                _edit_distance(keyword, _build_char_masks(keyword), text),
+                _levenshtein(keyword, text),
+                (keyword, text),
+            )
+
+    def test_search_end_agrees_with_dynamic_programming(self):
+        generator = random.Random(0)
+        for _ in range(2000):
+            keyword = "".join(generator.choice("abc") for _ in range(generator.randint(1, 8)))
+            text = "".join(generator.choice("abcd") for _ in range(generator.randint(0, 12)))
+            max_distance = generator.randint(0, 2)
+            expected_end = next(
+                (
+                    end
+                    for end in range(len(text) + 1)
+                    if min(_levenshtein(keyword, text[start:end]) for start in range(end + 1)) <= max_distance
+                ),
+                None,
+            )
+            if expected_end == 0:
+                # an empty substring is never reported
+                continue
+            self.assertEqual(
+                _search_end(keyword, _build_char_masks(keyword), max_distance, text),
+                expected_end,
+                (keyword, text, max_distance),
+            )
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,89 @@
+# encoding=utf-8
+import asyncio
+import datetime
+import types
+import unittest
+
+import discord.utils
+
+from issyou_detector.backfill import *
+
+_SELF_USER_ID = 1
+
+def _snowflake(days_ago: float) -> int:
+    return discord.utils.time_snowflake(discord.utils.utcnow() - datetime.timedelta(days=days_ago))
+
+class _FakeChannel:
+    def __init__(self, guild: "_FakeGuild", id: int, message_ids: list[int]):
+        self.guild = guild
+        self.id = id
+        self.messages = [
+            types.SimpleNamespace(id=message_id, channel=self, author=types.SimpleNamespace(id=2))
+            for message_id in sorted(message_ids)
+        ]
+
+    def permissions_for(self, member):
+        return types.SimpleNamespace(view_channel=True, read_message_history=True)
+
+    async def history(self, *, limit, after, before, oldest_first):
+        for message in self.messages:
+            if after.id < message.id < before.id:
+                yield message
+
+class _FakeGuild:
+    def __init__(self, id: int):
+        self.id = id
+        self.me = types.SimpleNamespace(id=_SELF_USER_ID)
+        self.text_channels: list[_FakeChannel] = []
+
+class HistoryBackfillerTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.detected_message_ids: list[int] = []
+        self.checkpoint_store = BackfillCheckpointStore(None)
+        self.backfiller = HistoryBackfiller(self.__detect, self.checkpoint_store)
+        self.guild = _FakeGuild(100)
+        # channel created 60 days ago, with a message per 5 days
+        self.channel = _FakeChannel(self.guild, _snowflake(60), [_snowflake(days_ago) for days_ago in range(55, 0, -5)])
+        self.guild.text_channels.append(self.channel)
+
+    async def asyncTearDown(self):
+        await self.backfiller.aclose()
+
+    async def __detect(self, message) -> None:
+        self.detected_message_ids.append(message.id)
+
+    async def __backfill(self, days: int) -> None:
+        progress = await self.backfiller.start(self.guild, since=discord.utils.utcnow() - datetime.timedelta(days=days))
+        if progress is not None:
+            while self.backfiller.get_progress(self.guild.id) is not None:
+                await asyncio.sleep(0)
+
+    async def test_backfills_since(self):
+        await self.__backfill(days=12)
+        self.assertEqual(self.detected_message_ids, [message.id for message in self.channel.messages[-2:]])
+
+    async def test_stops_at_first_live_message(self):
+        self.backfiller.observe_live_message(self.channel.messages[-1])
+        await self.__backfill(days=12)
+        self.assertEqual(self.detected_message_ids, [self.channel.messages[-2].id])
+
+    async def test_drops_completed_checkpoints(self):
+        await self.__backfill(days=12)
+        self.assertEqual(await self.checkpoint_store.get_incomplete_guild_ids(), [])
+        self.assertEqual(await self.checkpoint_store.get_guild_checkpoints(self.guild.id), {})
+
+    async def test_extends_completed_checkpoints(self):
+        # e.g. left completed by an earlier version
+        checkpoints = await self.checkpoint_store.get_guild_checkpoints(self.guild.id)
+        start_message_id = _snowflake(12)
+        checkpoints[self.channel.id] = ChannelCheckpoint(
+            start_message_id=start_message_id,
+            end_message_id=_snowflake(0),
+            last_message_id=start_message_id,
+            completed=True,
+        )
+        await self.__backfill(days=22)
+        self.assertEqual(self.detected_message_ids, [message.id for message in self.channel.messages[-4:-2]])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+# encoding=utf-8
+import random
+import unittest
+
+from issyou_detector.detection import *
+
+class KeywordMatcherTest(unittest.TestCase):
+    def test_find_first(self):
+        matcher = KeywordMatcher(("一輩子", "一生", "いっしょう"))
+        self.assertEqual(matcher.find_first("我這一生都不會忘記"), KeywordMatch("一生", 2, 4))
+        self.assertIsNone(matcher.find_first("一輩"))
+        self.assertIsNone(matcher.find_first(""))
+
+    def test_find_first_by_end(self):
+        matcher = KeywordMatcher(("abcd", "bc"))
+        self.assertEqual(matcher.find_first("abcd"), KeywordMatch("bc", 1, 3))
+
+    def test_find_all_overlapping(self):
+        matcher = KeywordMatcher(("he", "she", "his", "hers"))
+        self.assertEqual(
+            matcher.find_all("ushers"),
+            [KeywordMatch("she", 1, 4), KeywordMatch("he", 2, 4), KeywordMatch("hers", 2, 6)],
+        )
+
+    def test_contains(self):
+        matcher = KeywordMatcher(("一生",))
+        self.assertTrue(matcher.contains("一生"))
+        self.assertFalse(matcher.contains("一 生"))
+
+    def test_empty_and_duplicate_keywords_ignored(self):
+        matcher = KeywordMatcher(("一生", "", "一輩子", "一生"))
+        self.assertEqual(matcher.keywords, ("一生", "一輩子"))
+        self.assertIsNone(KeywordMatcher(()).find_first("一生"))
+
+    def test_ignore_case(self):
+        matcher = KeywordMatcher(("IsShou",), ignore_case=True)
+        self.assertEqual(matcher.keywords, ("isshou",))
+        self.assertEqual(matcher.find_first("ISSHOU"), KeywordMatch("isshou", 0, 6))
+        self.assertIsNone(KeywordMatcher(("isshou",)).find_first("ISSHOU"))
+
+    def test_agrees_with_naive_search(self):
+        generator = random.Random(0)
+        for _ in range(500):
+            keywords = [
+                "".join(generator.choice("abc") for _ in range(generator.randint(1, 4)))
+                for _ in range(generator.randint(1, 5))
+            ]
+            text = "".join(generator.choice("abcd") for _ in range(generator.randint(0, 30)))
+            matcher = KeywordMatcher(keywords)
+            expected_matches = sorted(
+                (
+                    KeywordMatch(keyword, start, start + len(keyword))
+                    for keyword in matcher.keywords
+                    for start in range(len(text) - len(keyword) + 1)
+                    if text.startswith(keyword, start)
+                ),
+                key=lambda keyword_match: (keyword_match.end, -len(keyword_match.keyword)),
+            )
+            self.assertEqual(
+                sorted(matcher.find_all(text), key=lambda keyword_match: (keyword_match.end, -len(keyword_match.keyword))),
+                expected_matches,
+                (keywords, text),
+            )
+            self.assertEqual(
+                None if matcher.find_first(text) is None else matcher.find_first(text).end,
+                expected_matches[0].end if expected_matches else None,
+            )
+
+if __name__ == "__main__":
+    unittest.main()
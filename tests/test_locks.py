@@ -0,0 +1,69 @@
+# encoding=utf-8
+import asyncio
+import unittest
+
+from issyou_detector.util.locks import *
+
+class KeyedLockTest(unittest.IsolatedAsyncioTestCase):
+    async def test_hold_blocks_same_key_only(self):
+        keyed_lock: KeyedLock[int] = KeyedLock()
+        async with keyed_lock.hold(1):
+            self.assertTrue(keyed_lock.locked(1))
+            self.assertFalse(keyed_lock.locked(2))
+            async with keyed_lock.hold(2):
+                self.assertTrue(keyed_lock.locked(2))
+        self.assertEqual(len(keyed_lock), 0)
+
+    async def test_hold_all(self):
+        keyed_lock: KeyedLock[int] = KeyedLock()
+        async with keyed_lock.hold_all([3, 1, 2, 1]):
+            self.assertTrue(all(keyed_lock.locked(key) for key in (1, 2, 3)))
+            self.assertEqual(len(keyed_lock), 3)
+        self.assertEqual(len(keyed_lock), 0)
+
+    async def test_hold_all_waits_for_holders(self):
+        keyed_lock: KeyedLock[int] = KeyedLock()
+        events: list[str] = []
+        async def hold_all() -> None:
+            async with keyed_lock.hold_all([1, 2]):
+                events.append("hold_all")
+        async with keyed_lock.hold(2):
+            task = asyncio.create_task(hold_all())
+            await asyncio.sleep(0.01)
+            # holding 1 while waiting for 2
+            self.assertTrue(keyed_lock.locked(1))
+            events.append("hold")
+        await task
+        self.assertEqual(events, ["hold", "hold_all"])
+
+    async def test_overlapping_hold_all_never_deadlock(self):
+        keyed_lock: KeyedLock[int] = KeyedLock()
+        holding_count = 0
+        async def hold_all(keys: list[int]) -> None:
+            nonlocal holding_count
+            async with keyed_lock.hold_all(keys):
+                holding_count += 1
+                await asyncio.sleep(0)
+                holding_count -= 1
+        await asyncio.wait_for(
+            asyncio.gather(*(
+                hold_all(keys)
+                for _ in range(50)
+                for keys in ([1, 2, 3], [3, 2, 1], [2, 4], [4, 1])
+            )),
+            timeout=10.0,
+        )
+        self.assertEqual(holding_count, 0)
+        self.assertEqual(len(keyed_lock), 0)
+
+    async def test_hold_all_released_on_error(self):
+        keyed_lock: KeyedLock[int] = KeyedLock()
+        with self.assertRaises(ValueError):
+            async with keyed_lock.hold_all([1, 2]):
+                raise ValueError()
+        self.assertFalse(keyed_lock.locked(1))
+        self.assertFalse(keyed_lock.locked(2))
+        self.assertEqual(len(keyed_lock), 0)
+
+if __name__ == "__main__":
+    unittest.main()
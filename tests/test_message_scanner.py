@@ -0,0 +1,100 @@
+# encoding=utf-8
+import asyncio
+import concurrent.futures.process
+import logging
+import os
+import unittest
+import unittest.mock
+
+from issyou_detector.detection import *
+
+class _FakeMessage:
+    def __init__(self, id: int, content: str):
+        self.id = id
+        self.content = content
+        self.embeds = []
+
+class MessageScannerTest(unittest.IsolatedAsyncioTestCase):
+    async def test_exact_hit(self):
+        scanner = MessageScanner(("一生",))
+        scan_hit = await scanner.scan(_FakeMessage(1, "我一生都不會忘記"))
+        self.assertEqual(scan_hit, ScanHit("content", KeywordMatch("一生", 1, 3)))
+
+    async def test_message_hit_at_most_once(self):
+        scanner = MessageScanner(("一生",))
+        self.assertIsNotNone(await scanner.scan(_FakeMessage(1, "一生")))
+        self.assertIsNone(await scanner.scan(_FakeMessage(1, "一生 一生")))
+
+    async def test_identical_texts_share_results(self):
+        scanner = MessageScanner(("一生",))
+        self.assertIsNotNone(await scanner.scan(_FakeMessage(1, "一生")))
+        self.assertIsNotNone(await scanner.scan(_FakeMessage(2, "一生")))
+        self.assertIsNone(await scanner.scan(_FakeMessage(3, "一輩")))
+
+    async def test_texts_of_colliding_hashes_never_share_results(self):
+        scanner = MessageScanner(("一生",))
+        class _CollidingText(str):
+            def __hash__(self):
+                return 0
+        self.assertIsNotNone(await scanner.scan(_FakeMessage(1, _CollidingText("一生"))))
+        self.assertIsNone(await scanner.scan(_FakeMessage(2, _CollidingText("一輩"))))
+
+    async def test_edited_fields_rescanned(self):
+        scanner = MessageScanner(("一生",))
+        self.assertIsNone(await scanner.scan(_FakeMessage(1, "一輩")))
+        self.assertIsNotNone(await scanner.scan(_FakeMessage(1, "一生")))
+
+    async def test_fuzzy_tier_disabled_by_default(self):
+        scanner = MessageScanner(("一生",))
+        self.assertIsNone(await scanner.scan(_FakeMessage(1, "一 生")))
+        self.assertIsNone(scanner.fuzzy_keyword_max_distances)
+
+    async def test_fuzzy_hit(self):
+        scanner = MessageScanner(("一生",), fuzzy_max_distance=1)
+        scan_hit = await scanner.scan(_FakeMessage(1, "一 生"))
+        self.assertEqual(scan_hit, ScanHit("content", KeywordMatch("一生", 0, 2), fuzzy=True))
+
+    async def test_fuzzy_hit_in_processes(self):
+        scanner = MessageScanner(
+            ("isshou",),
+            fuzzy_max_distance=1,
+            fuzzy_process_count=1,
+            fuzzy_process_min_length=10,
+        )
+        try:
+            scan_hit = await scanner.scan(_FakeMessage(1, "hello world, i s s y o u"))
+            self.assertEqual(scan_hit, ScanHit("content", KeywordMatch("isshou", 12, 18), fuzzy=True))
+            # processes are replaced to match with the new keywords
+            scanner.set_keywords(("いっしょう",))
+            self.assertIsNone(await scanner.scan(_FakeMessage(2, "hello world, i s s y o u")))
+            self.assertIsNotNone(await scanner.scan(_FakeMessage(3, "hello world, いっしよう")))
+        finally:
+            scanner.close()
+
+    async def test_fuzzy_hit_after_processes_broken(self):
+        scanner = MessageScanner(
+            ("isshou",),
+            fuzzy_max_distance=1,
+            fuzzy_process_count=1,
+            fuzzy_process_min_length=10,
+        )
+        try:
+            # a process dying breaks the pool
+            with self.assertRaises(concurrent.futures.process.BrokenProcessPool):
+                await asyncio.wrap_future(scanner._MessageScanner__fuzzy_executor.submit(os._exit, 1))
+            # matched in place, then in the processes replacing the broken ones
+            with self.assertLogs("issyou_detector.detection", logging.ERROR):
+                self.assertIsNotNone(await scanner.scan(_FakeMessage(1, "hello world, i s s y o u")))
+            self.assertIsNotNone(await scanner.scan(_FakeMessage(2, "hello world, i s s h o u")))
+        finally:
+            scanner.close()
+
+    async def test_field_scanned_again_after_failure(self):
+        scanner = MessageScanner(("一生",))
+        with unittest.mock.patch.object(scanner, "_MessageScanner__find_keyword", side_effect=OSError("failure")):
+            with self.assertRaises(OSError):
+                await scanner.scan(_FakeMessage(1, "一生"))
+        self.assertIsNotNone(await scanner.scan(_FakeMessage(1, "一生")))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,51 @@
+# encoding=utf-8
+import types
+import unittest
+
+from issyou_detector.metrics import *
+from issyou_detector.reporting import *
+
+def _fake_message(index: int):
+    # as long as real ones: 19-digit snowflakes, and display names of the max length (32)
+    message_id = 1300000000000000000 + index
+    return types.SimpleNamespace(
+        id=message_id,
+        author=types.SimpleNamespace(display_name=f"{index:02d}" + "名" * 30),
+        jump_url=f"https://discord.com/channels/1200000000000000000/1250000000000000000/{message_id}",
+    )
+
+class _FakeChannel:
+    def __init__(self):
+        self.sent_contents: list[str] = []
+
+    async def send(self, content: str) -> None:
+        self.sent_contents.append(content)
+
+class MessageReportTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.request_latency = MetricsRegistry().histogram("request_latency", "", ("kind",))
+
+    async def test_merged_report_fits_in_one_message(self):
+        messages = [_fake_message(index) for index in range(MessageReport.MAX_MESSAGE_COUNT)]
+        self.assertEqual(len(messages[0].jump_url), 88)
+        report = MessageReport(messages[0])
+        merged_count = 1 + sum(report.merge(MessageReport(message)) for message in messages[1:])
+        self.assertGreater(merged_count, 1)
+        self.assertLess(merged_count, MessageReport.MAX_MESSAGE_COUNT)
+        self.assertEqual(len(report.messages), merged_count)
+
+        channel = _FakeChannel()
+        await report.send(channel, request_latency=self.request_latency)
+        self.assertLessEqual(len(channel.sent_contents[0]), MessageReport.MAX_CONTENT_LENGTH)
+        self.assertEqual(len(channel.sent_contents[0].splitlines()), 1 + merged_count)
+
+    async def test_merged_up_to_max_message_count(self):
+        messages = [_fake_message(index) for index in range(MessageReport.MAX_MESSAGE_COUNT + 1)]
+        for message in messages:
+            message.author.display_name = "名"
+        report = MessageReport(messages[0])
+        merged = [report.merge(MessageReport(message)) for message in messages[1:]]
+        self.assertEqual(merged, [True] * (MessageReport.MAX_MESSAGE_COUNT - 1) + [False])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,97 @@
+# encoding=utf-8
+import asyncio
+import types
+import unittest
+
+import discord
+import discord.abc
+
+from issyou_detector.datastore.impl import *
+from issyou_detector.reporting import *
+
+class _FakeChannel(discord.abc.Messageable):
+    def __init__(self, id: int):
+        self.id = id
+
+    def permissions_for(self, member):
+        return discord.Permissions.all()
+
+class _FakeGuild:
+    def __init__(self, id: int):
+        self.id = id
+        self.unavailable = False
+        self.me = types.SimpleNamespace(id=1)
+
+    def get_channel_or_thread(self, channel_id: int):
+        # nothing cached, as with trimmed caches
+        return None
+
+class _FakeClient:
+    def __init__(self, failing_channel_ids: set[int], deleted_channel_ids: set[int]):
+        self.failing_channel_ids = failing_channel_ids
+        self.deleted_channel_ids = deleted_channel_ids
+        self.fetching_count = 0
+        self.max_fetching_count = 0
+
+    async def fetch_channel(self, channel_id: int):
+        self.fetching_count += 1
+        self.max_fetching_count = max(self.max_fetching_count, self.fetching_count)
+        try:
+            await asyncio.sleep(0.001)
+            if channel_id in self.failing_channel_ids:
+                raise discord.DiscordServerError(types.SimpleNamespace(status=503, reason="Service Unavailable"), "unavailable")
+            if channel_id in self.deleted_channel_ids:
+                raise discord.NotFound(types.SimpleNamespace(status=404, reason="Not Found"), "unknown channel")
+            return _FakeChannel(channel_id)
+        finally:
+            self.fetching_count -= 1
+
+class ReportChannelResolverWarmUpTest(unittest.IsolatedAsyncioTestCase):
+    async def test_warm_up_continues_after_failures(self):
+        guilds = [_FakeGuild(guild_id) for guild_id in range(1, 51)]
+        repo = InMemoryChannelRegisterRepo()
+        for guild in guilds:
+            await repo.register_report_channel(guild.id, guild.id * 100)
+        client = _FakeClient(failing_channel_ids={300, 1000}, deleted_channel_ids={500})
+        resolver = ReportChannelResolver(client, repo)
+
+        await resolver.warm_up(guilds, is_own_guild=lambda guild_id: True)
+
+        self.assertLessEqual(client.max_fetching_count, ReportChannelResolver.WARM_UP_CONCURRENCY)
+        self.assertGreater(client.max_fetching_count, 1)
+        # deleted channels are unregistered, failed ones are kept to be resolved when needed
+        self.assertIsNone(await repo.get_report_channel(5))
+        self.assertEqual(await repo.get_report_channel(3), 300)
+        # resolved channels are cached, failed ones are fetched again
+        fetch_count = 0
+        original_fetch_channel = client.fetch_channel
+        async def counting_fetch_channel(channel_id: int):
+            nonlocal fetch_count
+            fetch_count += 1
+            return await original_fetch_channel(channel_id)
+        client.fetch_channel = counting_fetch_channel
+        self.assertEqual((await resolver.resolve(guilds[1])).id, 200)
+        self.assertEqual(fetch_count, 0)
+        client.failing_channel_ids.clear()
+        self.assertEqual((await resolver.resolve(guilds[2])).id, 300)
+        self.assertEqual(fetch_count, 1)
+
+class ReportChannelResolverInvalidationTest(unittest.IsolatedAsyncioTestCase):
+    async def test_deleted_report_thread_unregistered(self):
+        guild = _FakeGuild(1)
+        repo = InMemoryChannelRegisterRepo()
+        await repo.register_report_channel(guild.id, 100)
+        client = _FakeClient(failing_channel_ids=set(), deleted_channel_ids=set())
+        resolver = ReportChannelResolver(client, repo)
+        self.assertEqual((await resolver.resolve(guild)).id, 100)
+
+        client.deleted_channel_ids.add(100)
+        # another thread of the guild
+        await resolver.on_thread_deleted(guild.id, 101)
+        self.assertEqual(await repo.get_report_channel(guild.id), 100)
+        await resolver.on_thread_deleted(guild.id, 100)
+        self.assertIsNone(await repo.get_report_channel(guild.id))
+        self.assertIsNone(await resolver.resolve(guild))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,49 @@
+# encoding=utf-8
+import unittest
+
+from issyou_detector.detection import *
+
+class TextNormalizerTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.normalizer = TextNormalizer()
+
+    def test_width_folding(self):
+        self.assertEqual(self.normalizer.normalize("ＩＳＳＨＯＵ１２３"), "isshou123")
+        self.assertEqual(self.normalizer.normalize("ｲｯｼｮｳ"), "いっしょう")
+
+    def test_case_folding(self):
+        self.assertEqual(self.normalizer.normalize("IsShou Straße"), "isshou strasse")
+
+    def test_katakana_folding(self):
+        self.assertEqual(self.normalizer.normalize("イッショウ"), "いっしょう")
+        self.assertEqual(self.normalizer.normalize("ヴァ"), "ゔぁ")
+
+    def test_half_width_voiced_sound_marks_composed(self):
+        self.assertEqual(self.normalizer.normalize("ｶﾞｷﾞﾊﾟ"), "がぎぱ")
+
+    def test_variant_characters(self):
+        self.assertEqual(self.normalizer.normalize("壹生"), "一生")
+        self.assertEqual(self.normalizer.normalize("弌生"), "一生")
+        normalizer = TextNormalizer(variant_characters={"壱": "一"})
+        self.assertEqual(normalizer.normalize("壱生"), "一生")
+        self.assertEqual(normalizer.normalize("壹生"), "壹生")
+
+    def test_compatibility_ideographs(self):
+        # CJK compatibility ideograph and enclosed forms
+        self.assertEqual(self.normalizer.normalize("\uf967"), "不")
+        self.assertEqual(self.normalizer.normalize("㊀"), "一")
+
+    def test_ignorable_characters_removed(self):
+        self.assertEqual(self.normalizer.normalize("一\u200b生\ufe0f"), "一生")
+        self.assertEqual(self.normalizer.normalize("i\u00adsshou"), "isshou")
+
+    def test_unchanged_text(self):
+        text = "我這一生 都不會忘記 🐧"
+        self.assertEqual(self.normalizer.normalize(text), text)
+
+    def test_normalize_all(self):
+        self.assertEqual(self.normalizer.normalize_all(("一生", "イッショウ")), ("一生", "いっしょう"))
+
+if __name__ == "__main__":
+    unittest.main()